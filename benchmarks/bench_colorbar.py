@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of add_colorbar(), scaling with the number of ticks.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import os
+
+import journal_figure as jf
+
+from .common import new_figure
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% colorbar
+class ColorbarSuite():
+    params = ([11, 101], ['vertical', 'horizontal'])
+    param_names = ['number_of_ticks', 'orientation']
+
+    def setup(self, number_of_ticks, orientation):
+        self.figure = new_figure()
+        if( orientation == 'vertical' ):
+            self.axes_colorbar = self.figure.add_axes([0.85, 0.10, 0.10, 0.80])
+        else:
+            self.axes_colorbar = self.figure.add_axes([0.10, 0.85, 0.80, 0.10])
+        self.colormap = mpl.colormaps['viridis']
+        self.style_labels = {'which_axis':'NE', 'label_format':'{0:.2f}', 'label_align':'W', 'rotation_angle':-45.0,
+                             'rotation_origin':'anchor', 'padding_x':0.0, 'padding_y':0.0}
+        self.style_colorbar = {'orientation':orientation, 'xlabel':'', 'ylabel':'', 'title':'', 'boundaries':[]}
+
+    def time_add_colorbar(self, number_of_ticks, orientation):
+        jf.add_colorbar(self.axes_colorbar, self.colormap, 0.0, 1.0, style_labels=self.style_labels,
+                        style_ticks={'number_of_ticks':number_of_ticks, 'ticks_start':0.0, 'ticks_end':1.0},
+                        style_colorbar=self.style_colorbar)
+
+    def time_add_colorbar_savefig(self, number_of_ticks, orientation):
+        jf.add_colorbar(self.axes_colorbar, self.colormap, 0.0, 1.0, style_labels=self.style_labels,
+                        style_ticks={'number_of_ticks':number_of_ticks, 'ticks_start':0.0, 'ticks_end':1.0},
+                        style_colorbar=self.style_colorbar)
+        self.figure.savefig(os.devnull, format='pdf')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the detail axes: pretty_detail_axis(), pretty_detail_axes() 
+and propose_detail_specs(), scaling with the number of insets and points.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import journal_figure as jf
+
+from .common import new_figure, series
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% specification of the insets
+def _specs(number_of_insets):
+    """
+    Insets spread along the x-axis of a main axes with limits [0, 100].
+    """
+
+    width = 100.0/number_of_insets
+    return [{'detail_limits': [[idx*width, (idx + 0.5)*width], [-1.0, 1.0]],
+             'detail_pos': [[(idx + 0.1)*width, (idx + 0.9)*width], [1.3, 2.0]],
+             'connections': [{'connector_detail':'NW', 'connector_detail_ax':'SW'},
+                             {'connector_detail':'NE', 'connector_detail_ax':'SE'}]}
+            for idx in range(number_of_insets)]
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% detail axes
+class DetailAxesSuite():
+    params = ([1, 4, 16, 64], [False, True])
+    param_names = ['number_of_insets', 'batched']
+
+    def setup(self, number_of_insets, batched):
+        self.figure = new_figure()
+        self.main_ax = self.figure.add_axes([0.10, 0.10, 0.80, 0.50])
+        self.specs = _specs(number_of_insets)
+
+    def time_pretty_detail_axis(self, number_of_insets, batched):
+        for spec in self.specs:
+            detail_ax = self.figure.add_axes([0.0, 0.0, 0.1, 0.1])
+            jf.pretty_detail_axis(self.main_ax, detail_ax, [[0.0, 100.0], [-1.1, 2.1]], spec['detail_limits'],
+                                  spec['detail_pos'], connections=spec['connections'], batched=batched)
+
+    def time_pretty_detail_axes(self, number_of_insets, batched):
+        jf.pretty_detail_axes(self.main_ax, self.specs, main_limits=[[0.0, 100.0], [-1.1, 2.1]], batched=batched)
+
+#%% proposed detail axes
+class ProposeDetailSuite():
+    params = ([10**3, 10**5, 10**7], [1, 4])
+    param_names = ['number_of_points', 'number_of_details']
+    timeout = 300
+
+    def setup(self, number_of_points, number_of_details):
+        self.figure = new_figure()
+        self.main_ax = self.figure.add_axes([0.10, 0.10, 0.80, 0.80])
+        self.main_ax.set_xlim([0.0, 100.0])
+        self.main_ax.set_ylim([-1.5, 1.5])
+        self.x, self.y = series(number_of_points)
+
+    def time_propose_detail_specs(self, number_of_points, number_of_details):
+        jf.propose_detail_specs(self.main_ax, self.x, self.y, number_of_details=number_of_details)
+
+    def peakmem_propose_detail_specs(self, number_of_points, number_of_details):
+        jf.propose_detail_specs(self.main_ax, self.x, self.y, number_of_details=number_of_details)
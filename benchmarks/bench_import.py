@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark, the import time of journal_figure measured in a fresh 
+interpreter (asv-style suite, runnable as a script as well).
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import subprocess
+import statistics
+import sys
+import json
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% fresh interpreter
+# measured within the child process, the interpreter startup is excluded
+_MEASURE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+print(json.dumps({{'time': time.perf_counter() - start, 
+                  'pyplot': 'matplotlib.pyplot' in sys.modules,
+                  'matplotlib': 'matplotlib' in sys.modules}}))
+"""
+
+def measure_import(statement='import journal_figure', repeat=5):
+    """
+    Run "statement" in "repeat" fresh interpreters.
+
+    Parameters
+    ----------
+    statement : <string>, optional
+        Python statement(s) to be timed. Default value is 
+        \'import journal_figure\'.
+    repeat : <int>, optional
+        Number of the interpreters. Default value is 5.
+
+    Returns
+    -------
+    Report <dict>: median \'time\' in seconds, and whether \'pyplot\' 
+    and \'matplotlib\' were imported.
+
+    """
+    
+    reports = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _MEASURE.format(statement=statement)], 
+                                check=True, capture_output=True, text=True).stdout
+        reports.append( json.loads(output.strip().splitlines()[-1]) )
+    
+    return {'time': statistics.median([report['time'] for report in reports]), 
+            'pyplot': any([report['pyplot'] for report in reports]), 
+            'matplotlib': any([report['matplotlib'] for report in reports])}
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% import suite
+class ImportSuite():
+    """
+    Import time of the package, and of the first access to a helper.
+    """
+    
+    params = ['import journal_figure', 
+              'import journal_figure; journal_figure.set_figure_size', 
+              'import journal_figure; journal_figure.StaticLayer']
+    param_names = ['statement']
+    timeout = 120
+    
+    def track_import_time(self, statement):
+        return measure_import(statement)['time']
+    track_import_time.unit = 'seconds'
+    
+    def track_pyplot_imported(self, statement):
+        return int( measure_import(statement, repeat=1)['pyplot'] )
+    track_pyplot_imported.unit = 'bool'
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------TESTING----------------------------------
+#   ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    
+    for statement in ImportSuite.params:
+        report = measure_import(statement)
+        print('{0:60s} {1:8.4f} s   pyplot: {2}   matplotlib: {3}'.format(statement, report['time'], report['pyplot'], report['matplotlib']))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of pretty_legend(), scaling with the number of legend entries.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import numpy as np
+import os
+
+import journal_figure as jf
+
+from .common import new_figure
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% legend
+class LegendSuite():
+    params = ([10, 100, 500], [1, 5])
+    param_names = ['number_of_entries', 'number_of_columns']
+
+    def setup(self, number_of_entries, number_of_columns):
+        self.figure = new_figure()
+        self.axes = self.figure.add_axes([0.10, 0.10, 0.60, 0.80])
+        for idx in range(number_of_entries):
+            self.axes.plot([0, 1], [idx, idx], label='Line {0:d}'.format(idx + 1))
+        # every column filled, the remaining entries are empty
+        rows = int(np.ceil(number_of_entries/number_of_columns))
+        order = list(range(number_of_entries)) + ['e']*(rows*number_of_columns - number_of_entries)
+        self.label_order = [order[row*number_of_columns:(row + 1)*number_of_columns] for row in range(rows)]
+
+    def time_pretty_legend(self, number_of_entries, number_of_columns):
+        jf.pretty_legend(self.axes, position=[0.85, 0.5], label_order=self.label_order)
+
+    def time_pretty_legend_savefig(self, number_of_entries, number_of_columns):
+        jf.pretty_legend(self.axes, position=[0.85, 0.5], label_order=self.label_order)
+        self.figure.savefig(os.devnull, format='pdf')
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of complete figures: build and savefig (Agg/PDF) scaling with 
+the number of axes and data points, including the size of the output.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import os
+import tempfile
+
+import journal_figure as jf
+
+from .common import grid_figure, series, STYLE_LABELS_X, STYLE_LABELS_Y
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% figure
+def _build(number_of_axes, number_of_points, decimated):
+    """
+    Figure with "number_of_axes" axes, each with a series of "number_of_points"
+    samples and journal_figure ticks.
+    """
+
+    figure, axes_list = grid_figure(number_of_axes)
+    x, y = series(number_of_points)
+    for axes in axes_list:
+        if( decimated ):
+            jf.plot_decimated(axes, x, y, linewidth=0.5)
+        else:
+            axes.plot(x, y, linewidth=0.5)
+        jf.set_major_ticks(axes, 20, along_axis='x', style_labels=STYLE_LABELS_X,
+                           style_ticks={'which_axis':'NS'}, deferred=True)
+        jf.set_major_ticks(axes, 0.5, along_axis='y', style_labels=STYLE_LABELS_Y,
+                           style_ticks={'which_axis':'WE'}, deferred=True)
+    return figure
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% savefig
+class SavefigSuite():
+    params = ([1, 4, 16, 64], [10**3, 10**5, 10**7], ['pdf', 'png'], [False, True])
+    param_names = ['number_of_axes', 'number_of_points', 'file_format', 'decimated']
+    timeout = 600
+
+    def setup(self, number_of_axes, number_of_points, file_format, decimated):
+        # the largest figures are not worth the time
+        if( number_of_axes*number_of_points > 10**7 ):
+            raise NotImplementedError
+        self.figure = _build(number_of_axes, number_of_points, decimated)
+        self.directory = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.directory.name, 'figure.'+file_format)
+
+    def teardown(self, number_of_axes, number_of_points, file_format, decimated):
+        self.directory.cleanup()
+
+    def time_savefig(self, number_of_axes, number_of_points, file_format, decimated):
+        self.figure.savefig(self.fname, dpi=300)
+
+    def time_savefig_tight(self, number_of_axes, number_of_points, file_format, decimated):
+        self.figure.savefig(self.fname, dpi=300, bbox_inches=jf.tight_bbox(self.figure))
+
+    def peakmem_savefig(self, number_of_axes, number_of_points, file_format, decimated):
+        self.figure.savefig(self.fname, dpi=300)
+
+    def track_file_size(self, number_of_axes, number_of_points, file_format, decimated):
+        self.figure.savefig(self.fname, dpi=300)
+        return os.path.getsize(self.fname)
+    track_file_size.unit = 'bytes'
+
+#%% build and savefig
+class BuildSuite():
+    params = ([1, 4, 16, 64], [10**3, 10**5])
+    param_names = ['number_of_axes', 'number_of_points']
+
+    def setup(self, number_of_axes, number_of_points):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.directory.name, 'figure.pdf')
+
+    def teardown(self, number_of_axes, number_of_points):
+        self.directory.cleanup()
+
+    def time_build_and_savefig(self, number_of_axes, number_of_points):
+        _build(number_of_axes, number_of_points, False).savefig(self.fname)
+
+    def peakmem_build_and_savefig(self, number_of_axes, number_of_points):
+        _build(number_of_axes, number_of_points, False).savefig(self.fname)
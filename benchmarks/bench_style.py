@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of set_style() and style_context().
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+
+import journal_figure as jf
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% style
+class StyleSuite():
+    # elements separated by commas (a list would read as several parameters)
+    params = ['fonts', 'figure,fonts,grid,ticks,legend']
+    param_names = ['apply_to']
+
+    def setup(self, apply_to):
+        self.rc_params = mpl.rcParams.copy()
+
+    def teardown(self, apply_to):
+        mpl.rcParams.update(self.rc_params)
+
+    def time_set_style(self, apply_to):
+        jf.set_style('pretty_style_v1', apply_to=apply_to.split(','))
+
+    def time_style_context(self, apply_to):
+        with jf.style_context('pretty_style_v1', apply_to=apply_to.split(',')):
+            pass
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of set_major_ticks() and set_minor_ticks(), scaling with the 
+number of axes and the number of ticks per axis.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import journal_figure as jf
+
+from .common import grid_figure, STYLE_LABELS_X, STYLE_LABELS_Y
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% major ticks
+class MajorTicksSuite():
+    params = ([1, 4, 16, 64], [10, 100, 1000], [False, True])
+    param_names = ['number_of_axes', 'number_of_ticks', 'deferred']
+    timeout = 600
+
+    def setup(self, number_of_axes, number_of_ticks, deferred):
+        # matplotlib creates an object per tick, 64 000 ticks are not worth the time
+        if( number_of_axes*number_of_ticks > 16*1000 ):
+            raise NotImplementedError
+        self.figure, self.axes = grid_figure(number_of_axes)
+
+    def time_set_major_ticks(self, number_of_axes, number_of_ticks, deferred):
+        for axes in self.axes:
+            jf.set_major_ticks(axes, 100.0/number_of_ticks, along_axis='x', style_labels=STYLE_LABELS_X,
+                               style_ticks={'which_axis':'NS'}, deferred=deferred)
+            jf.set_major_ticks(axes, 2.2/number_of_ticks, along_axis='y', style_labels=STYLE_LABELS_Y,
+                               style_ticks={'which_axis':'WE'}, deferred=deferred)
+        jf.apply_deferred_ticks(self.figure)
+
+    def time_set_major_ticks_grid(self, number_of_axes, number_of_ticks, deferred):
+        # all the axes in a single call, the ticks are computed once
+        jf.set_major_ticks(self.axes, 100.0/number_of_ticks, along_axis='x', style_labels=STYLE_LABELS_X,
+                           style_ticks={'which_axis':'NS'}, deferred=deferred)
+        jf.set_major_ticks(self.axes, 2.2/number_of_ticks, along_axis='y', style_labels=STYLE_LABELS_Y,
+                           style_ticks={'which_axis':'WE'}, deferred=deferred)
+        jf.apply_deferred_ticks(self.figure)
+
+#%% minor ticks
+class MinorTicksSuite():
+    params = ([1, 4, 16, 64], [False, True])
+    param_names = ['number_of_axes', 'deferred']
+
+    def setup(self, number_of_axes, deferred):
+        self.figure, self.axes = grid_figure(number_of_axes)
+
+    def time_set_minor_ticks(self, number_of_axes, deferred):
+        for axes in self.axes:
+            jf.set_minor_ticks(axes, 1.0, along_axis='x', style_ticks={'which_axis':'NS'}, deferred=deferred)
+            jf.set_minor_ticks(axes, 0.05, along_axis='y', style_ticks={'which_axis':'WE'}, deferred=deferred)
+        jf.apply_deferred_ticks(self.figure)
+
+    def time_set_minor_ticks_grid(self, number_of_axes, deferred):
+        # all the axes in a single call, the ticks are computed once
+        jf.set_minor_ticks(self.axes, 1.0, along_axis='x', style_ticks={'which_axis':'NS'}, deferred=deferred)
+        jf.set_minor_ticks(self.axes, 0.05, along_axis='y', style_ticks={'which_axis':'WE'}, deferred=deferred)
+        jf.apply_deferred_ticks(self.figure)
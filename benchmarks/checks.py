@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Behavioural checks of the shortcuts measured by the benchmarks: a fast
+path is only worth its time if it gives the same result as the path it
+replaces (e.g. the analytic tight bounding box against the drawn one).
+From the root of the repository:
+
+    python -m benchmarks.checks              # run all the checks
+    python -m benchmarks.checks tight_bbox   # checks matching a regex
+
+Every function prefixed by "check_" is a check, it raises AssertionError
+when the result is wrong. Several checks cover code written for older
+matplotlib versions, thus run them with the latest matplotlib and with the
+oldest one supported (install_requires of setup.py), e.g.
+
+    python -m pip install "matplotlib==3.8.*" && python -m benchmarks.checks
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import traceback
+
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+import journal_figure as jf
+from journal_figure.batch import render_batch
+from journal_figure.spec import figure_key
+from journal_figure.text_metrics import text_bbox
+
+from .common import new_figure, grid_figure, series, STYLE_LABELS_X, STYLE_LABELS_Y
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% helpers
+def _assert_bbox_close(bbox, expected, tolerance, message, unit='in'):
+    """
+    Compare the edges of two bounding boxes (in the same units).
+    """
+
+    error = np.abs(np.asarray(bbox.extents) - np.asarray(expected.extents))
+    assert np.all(error < tolerance), '{0:s}: {1} against {2} (max error {3:.4f} {4:s})'.format(
+        message, np.round(bbox.extents, 4), np.round(expected.extents, 4), error.max(), unit)
+
+def _write_spec(directory, scale=1.0):
+    """
+    Spec file of a single figure plotting a data file, both in "directory"
+    (the data are written again with a new "scale"). Returns the path.
+    """
+
+    np.save(os.path.join(directory, 'y.npy'), scale*np.sin(np.linspace(0.0, 6.0, 50)))
+    fname = os.path.join(directory, 'figures.json')
+    if( not os.path.isfile(fname) ):
+        with open(fname, 'w', encoding='utf-8') as file:
+            json.dump({'style': 'pretty_style_v1', 'figures': [_figure_spec()]}, file)
+    return fname
+
+def _figure_spec(rect=[0.1, 0.1, 0.8, 0.8]):
+    return {'output': 'graphics/figure.png', 'data': {'y': 'y.npy'}, 'savefig': {'dpi': 50},
+            'axes': {'main': {'rect': rect}}, 'plots': [{'axes': 'main', 'y': 'y'}]}
+
+def _build_line(figure, color):
+    axes = figure.add_axes([0.1, 0.1, 0.8, 0.8])
+    axes.plot([0.0, 1.0], [0.0, 1.0], color=color)
+
+def _build_error(figure):
+    raise ValueError('broken build')
+
+#%% tight bounding box
+def check_tight_bbox():
+    """
+    tight_bbox() against the bounding box of the drawn figure.
+    """
+
+    # (name, setup of the axes) covering the placement of the title
+    cases = [
+        ('y tick label above the axes', lambda axes: jf.set_major_ticks(axes, 0.25, along_axis='y',
+            style_labels={'which_axis':'W', 'label_format':'{0:.2f}', 'label_align':'SE', 'rotation_angle':0.0,
+                          'rotation_origin':'anchor', 'padding_x':-0.01, 'padding_y':0.0})),
+        ('x tick labels on top', lambda axes: axes.xaxis.tick_top()),
+        ('x label on top', lambda axes: axes.xaxis.set_label_position('top')),
+        ('x tick labels on both sides', lambda axes: axes.tick_params(labeltop=True, top=True)),
+    ]
+    for name, setup in cases:
+        figure = new_figure(10, 8)
+        axes = figure.add_axes([0.15, 0.15, 0.7, 0.7])
+        axes.set_xlim(0.0, 1.0)
+        axes.set_ylim(0.0, 1.0)
+        axes.set_title('Title')
+        axes.set_xlabel('x label')
+        axes.set_ylabel('y label')
+        setup(axes)
+
+        bbox = jf.tight_bbox(figure, pad_inches=0.0)
+        expected = figure.get_tightbbox(figure.canvas.get_renderer())
+        _assert_bbox_close(bbox, expected, 0.02, name)
+
+#%% layout
+def check_layout_figure():
+    """
+    layout_figure() leaves room for the decorations given by "labels": they
+    stay inside the figure and off the neighbouring axes.
+    """
+
+    figure, axes_grid, _ = jf.layout_figure('IEEE single', rows=2, columns=2,
+                                            labels={'x':'0.5', 'y':'-0.5', 'xlabel':'x label', 'ylabel':'y label', 'title':'Title'})
+    for axes in axes_grid.ravel():
+        axes.set_xlim(0.0, 0.5)
+        axes.set_ylim(-0.5, 0.5)
+        axes.set_xticks([0.0, 0.25, 0.5])
+        axes.set_yticks([-0.5, 0.0, 0.5])
+        axes.xaxis.set_major_formatter(mpl.ticker.StrMethodFormatter('{x:.1f}'))
+        axes.yaxis.set_major_formatter(mpl.ticker.StrMethodFormatter('{x:.1f}'))
+        axes.set_title('Title')
+        axes.set_xlabel('x label')
+        axes.set_ylabel('y label')
+
+    renderer = figure.canvas.get_renderer()
+    bbox = figure.get_tightbbox(renderer)
+    assert bbox.x0 >= 0.0 and bbox.y0 >= 0.0 and bbox.x1 <= figure.bbox_inches.x1 and bbox.y1 <= figure.bbox_inches.y1, \
+        'the decorations {0} leave the figure {1}'.format(np.round(bbox.extents, 3), np.round(figure.bbox_inches.extents, 3))
+    for index, axes in enumerate(axes_grid.ravel()):
+        decorations = axes.get_tightbbox(renderer)
+        for other in np.delete(axes_grid.ravel(), index):
+            assert not decorations.overlaps(other.bbox), 'the decorations of axes {0:d} cover a neighbour'.format(index)
+
+#%% automatic detail axes
+def check_propose_detail_specs():
+    """
+    propose_detail_specs(criterion='peak') centres every detail on its
+    peak and never places a detail over the data.
+    """
+
+    figure = new_figure()
+    axes = figure.add_axes([0.1, 0.1, 0.8, 0.8])
+    x = np.linspace(0.0, 100.0, 100001)
+    peaks = [20.0, 50.3]
+    y = 0.01*np.sin(x) + 0.6*np.exp(-((x - peaks[0])/0.2)**2) + np.exp(-((x - peaks[1])/0.3)**2)
+    axes.set_xlim(0.0, 100.0)
+
+    # room above the data: a detail per peak, the peak in the middle third
+    axes.set_ylim(-0.5, 3.0)
+    specs = jf.propose_detail_specs(axes, x, y, number_of_details=2, criterion='peak')
+    assert len(specs) == 2, 'expected 2 details, got {0:d}'.format(len(specs))
+    for spec, peak in zip(specs, peaks):
+        (x_min, x_max), _ = spec['detail_limits']
+        third = (x_max - x_min) / 3
+        assert x_min + third <= peak <= x_max - third, 'peak {0} not centred in [{1:.2f}, {2:.2f}]'.format(peak, x_min, x_max)
+
+    # no room above or below the data: the details do not cover it
+    axes.set_ylim(-0.2, 1.1)
+    for spec in jf.propose_detail_specs(axes, x, y, number_of_details=2, criterion='peak'):
+        (x_left, x_right), (y_bottom, y_top) = spec['detail_pos']
+        covered = (x >= x_left) & (x <= x_right)
+        assert np.all((y[covered] < y_bottom) | (y[covered] > y_top)), 'detail at {0} covers the data'.format(spec['detail_pos'])
+
+#%% text metrics
+def check_text_bbox():
+    """
+    text_bbox() (cached font metrics) against the drawn extent of the text.
+    """
+
+    figure = new_figure()
+    renderer = figure.canvas.get_renderer()
+    cases = [('Label 123', {}), ('\u22120.25', {'rotation':45.0, 'ha':'right', 'va':'top'}),
+             (r'$\frac{a}{b}$ x', {'rotation':-30.0}), ('two\nlines', {'ha':'center', 'va':'center'}),
+             ('\u03a9\u03bc', {'rotation':90.0, 'rotation_mode':'anchor'})]
+    for string, properties in cases:
+        text = figure.text(0.5, 0.5, string, **properties)
+        # 2 pixels at 100 dpi, as the tight bounding box
+        _assert_bbox_close(text_bbox(text), text.get_window_extent(renderer), 0.02*figure.dpi, repr(string), 'px')
+
+#%% detail axes and decimation
+def _detail_figure(multiple):
+    """
+    Main axes with two detail axes, placed by pretty_detail_axes() (if
+    "multiple") or by a pretty_detail_axis() per detail.
+    """
+
+    figure = new_figure()
+    axes = figure.add_axes([0.1, 0.1, 0.8, 0.8])
+    x = np.linspace(0.0, 10.0, 500)
+    axes.plot(x, np.sin(x))
+    specs = [{'detail_limits': [[1.0, 2.0], [0.5, 1.0]], 'detail_pos': [[1.0, 4.0], [-0.9, -0.2]]},
+             {'detail_limits': [[6.0, 7.0], [-1.0, -0.5]], 'detail_pos': [[6.0, 9.0], [0.3, 0.9]]}]
+    if( multiple ):
+        detail_axes, _ = jf.pretty_detail_axes(axes, specs, main_limits=[[0.0, 10.0], [-1.0, 1.0]])
+    else:
+        detail_axes = []
+        for spec in specs:
+            detail_axes.append( figure.add_axes([0.0, 0.0, 0.1, 0.1]) )
+            jf.pretty_detail_axis(axes, detail_axes[-1], [[0.0, 10.0], [-1.0, 1.0]], spec['detail_limits'], spec['detail_pos'])
+    for detail in detail_axes:
+        detail.plot(x, np.sin(x))
+    return figure
+
+def check_pretty_detail_axes():
+    """
+    pretty_detail_axes() draws the same figure as pretty_detail_axis()
+    called for every detail.
+    """
+
+    _assert_same_pixels(_drawn(_detail_figure(True)), _drawn(_detail_figure(False)), 'pretty_detail_axes')
+
+def check_plot_decimated():
+    """
+    The line of plot_decimated() keeps the minimum and the maximum of the
+    series in every pixel column, for the limits of every draw.
+    """
+
+    figure = new_figure(10, 8)
+    axes = figure.add_axes([0.1, 0.1, 0.8, 0.8])
+    x, y = series(10**6)
+    line = jf.plot_decimated(axes, x, y)
+
+    for xlim in [(0.0, 100.0), (20.0, 30.0)]:
+        axes.set_xlim(xlim)
+        figure.canvas.draw()
+        columns = int(np.ceil(axes.bbox.width))
+
+        def extremes(x, y):
+            visible = (x >= xlim[0]) & (x <= xlim[1])
+            column = np.clip(((x[visible] - xlim[0])*(columns/(xlim[1] - xlim[0]))).astype(np.intp), 0, columns - 1)
+            low = np.full(columns, np.inf)
+            high = np.full(columns, -np.inf)
+            np.minimum.at(low, column, y[visible])
+            np.maximum.at(high, column, y[visible])
+            return low, high
+
+        assert line.get_xdata().size <= 4*columns + 2, 'xlim {0}: {1:d} samples for {2:d} columns'.format(xlim, line.get_xdata().size, columns)
+        for decimated, full, name in zip(extremes(line.get_xdata(), line.get_ydata()), extremes(x, y), ['minimum', 'maximum']):
+            assert np.array_equal(decimated, full), 'xlim {0}: the {1:s} differs in {2:d} columns'.format(
+                xlim, name, int(np.sum(decimated != full)))
+
+#%% style
+def check_style_context():
+    """
+    style_context() sets the same rcParams as set_style() and restores all
+    of them on exit, also when nested.
+    """
+
+    rc = mpl.rcParams.copy()
+    with mpl.rc_context():
+        jf.set_style('pretty_style_v1', ['figure', 'fonts', 'grid'])
+        expected = mpl.rcParams.copy()
+    with jf.style_context('pretty_style_v1', ['figure', 'fonts']):
+        with jf.style_context('pretty_style_v1', ['grid']):
+            changed = [name for name in rc if mpl.rcParams[name] != expected[name]]
+            assert not changed, 'rcParams differ from set_style(): {0}'.format(changed)
+        changed = [name for name in rc if name.startswith('grid.') and mpl.rcParams[name] != rc[name]]
+        assert not changed, 'rcParams of the inner context kept: {0}'.format(changed)
+    changed = [name for name in rc if mpl.rcParams[name] != rc[name]]
+    assert not changed, 'rcParams changed: {0}'.format(changed)
+
+#%% ticks
+def check_deferred_ticks():
+    """
+    Deferred ticks (applied by the pre-draw hook) draw the same figure as
+    the eager ones.
+    """
+
+    frames = []
+    labels = []
+    for deferred in [False, True]:
+        figure, axes_list = grid_figure(4)
+        jf.set_major_ticks(axes_list, 20.0, along_axis='x', style_labels=STYLE_LABELS_X,
+                           style_ticks={'which_axis':'NS'}, deferred=deferred)
+        jf.set_major_ticks(axes_list[:2], 0.5, along_axis='y', style_labels=STYLE_LABELS_Y,
+                           style_ticks={'which_axis':'WE'}, deferred=deferred)
+        jf.set_minor_ticks(axes_list, 5.0, along_axis='x', style_ticks={'which_axis':'NS'}, deferred=deferred)
+        figure.canvas.draw()
+        frames.append( np.array(figure.canvas.buffer_rgba()) )
+        labels.append( [[label.get_text() for label in axes.get_xticklabels() + axes.get_yticklabels()] for axes in axes_list] )
+
+    assert labels[0] == labels[1], 'the labels differ: {0} against {1}'.format(labels[0], labels[1])
+    assert np.array_equal(frames[0], frames[1]), 'the deferred ticks draw {0:d} different pixels'.format(
+        int(np.any(frames[0] != frames[1], axis=-1).sum()))
+
+def check_deferred_ticks_layout():
+    """
+    Deferred ticks are applied before the constrained layout, thus the
+    first draw places the axes as the eager ticks do.
+    """
+
+    style_labels = {'which_axis':'W', 'label_format':'{0:.6f} units', 'label_align':'', 'rotation_angle':0.0,
+                    'rotation_origin':'anchor', 'padding_x':0.0, 'padding_y':0.0}
+    positions = []
+    for deferred in [False, True]:
+        figure = Figure(layout='constrained')
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.set_ylim(0.0, 5.0)
+        jf.set_major_ticks(axes, 1.0, along_axis='y', style_labels=style_labels, deferred=deferred)
+        figure.canvas.draw()
+        positions.append( axes.get_position().bounds )
+
+    assert np.allclose(positions[0], positions[1]), 'the deferred ticks place the axes at {0} instead of {1}'.format(
+        np.round(positions[1], 4), np.round(positions[0], 4))
+
+def check_label_formatter():
+    """
+    LabelFormatter uses the minus sign of rcParams['axes.unicode_minus'].
+    """
+
+    formatter = jf.LabelFormatter('{0:.1f}')
+    for unicode_minus, minus in [(True, '\u2212'), (False, '-')]:
+        with mpl.rc_context({'axes.unicode_minus': unicode_minus}):
+            labels = formatter.format_ticks([-0.5, 0.0, 0.5])
+        assert labels == [minus+'0.5', '0.0', '0.5'], 'unicode_minus {0}: {1}'.format(unicode_minus, labels)
+
+#%% legend
+def check_legend_best_grid():
+    """
+    pretty_legend(position='best-grid') places the legend off the data,
+    also after the limits change.
+    """
+
+    figure = new_figure(10, 8)
+    axes = figure.add_axes([0.15, 0.15, 0.7, 0.7])
+    x = np.linspace(0.0, 1.0, 400)
+    # data along the top and in the lower right, the lower left is free
+    axes.plot(x, 0.85 + 0.05*np.sin(20.0*x), label='top')
+    axes.plot(x[x > 0.5], 0.25 + 0.2*np.sin(40.0*x[x > 0.5]), label='lower right')
+    axes.set_xlim(0.0, 1.0)
+    axes.set_ylim(0.0, 1.0)
+    jf.pretty_legend(axes, position='best-grid')
+
+    for ylim in [(0.0, 1.0), (-0.5, 1.0)]:
+        axes.set_ylim(ylim)
+        figure.canvas.draw()
+        bbox = axes.get_legend().get_window_extent()
+        for line in axes.get_lines():
+            points = line.get_transform().transform(line.get_xydata())
+            inside = (points[:, 0] > bbox.x0) & (points[:, 0] < bbox.x1) & (points[:, 1] > bbox.y0) & (points[:, 1] < bbox.y1)
+            assert not np.any(inside), 'ylim {0}: the legend covers {1:d} points of "{2:s}"'.format(ylim, int(inside.sum()), line.get_label())
+
+def check_legend_pages():
+    """
+    pretty_legend(pages=3) splits the entries over 3 legends of the axes,
+    every entry once and in order.
+    """
+
+    figure = new_figure()
+    axes = figure.add_axes([0.1, 0.1, 0.8, 0.8])
+    labels = ['line {0:d}'.format(idx) for idx in range(7)]
+    for label in labels:
+        axes.plot([0.0, 1.0], [0.0, 1.0], label=label)
+    legends = jf.pretty_legend(axes, position=['upper left', 'center', 'lower right'], pages=3)
+
+    assert len(legends) == 3, 'expected 3 legends, got {0:d}'.format(len(legends))
+    page_labels = [text.get_text() for legend in legends for text in legend.get_texts() if text.get_text()]
+    assert page_labels == labels, 'the pages hold {0}'.format(page_labels)
+    figure.canvas.draw()
+    drawn = [legend for legend in legends if legend is axes.get_legend() or legend in axes.artists]
+    assert len(drawn) == 3, '{0:d} of the legends are drawn with the axes'.format(len(drawn))
+
+#%% static layer
+def _build_frame(case, phase=0.0):
+    """
+    Figure of the static layer checks: lines under a legend ("legend"),
+    two legend pages ("pages"), a figure legend ("figure legend") or
+    a detail axes ("detail").
+    """
+
+    figure = new_figure(10, 8)
+    axes = figure.add_axes([0.15, 0.15, 0.7, 0.7])
+    x = np.linspace(0.0, 1.0, 200)
+    for idx in range(4):
+        axes.plot(x, 0.5 + 0.4*np.sin(6.0*x + idx + phase), label='line {0:d}'.format(idx))
+    axes.set_xlim(0.0, 1.0)
+    axes.set_ylim(0.0, 1.0)
+    if( case == 'legend' ):
+        jf.pretty_legend(axes, position='upper right')
+    elif( case == 'pages' ):
+        jf.pretty_legend(axes, position=['upper left', 'lower right'], pages=2)
+    elif( case == 'figure legend' ):
+        figure.legend(loc='center')
+    elif( case == 'detail' ):
+        detail = figure.add_axes([0.5, 0.5, 0.3, 0.3])
+        detail.plot(x, np.sin(x + phase))
+        jf.pretty_detail_axis(axes, detail, [[0.0, 1.0], [0.0, 1.0]], [[0.2, 0.4], [0.3, 0.9]], [[0.55, 0.95], [0.55, 0.95]])
+    return figure
+
+def _drawn(figure):
+    figure.canvas.draw()
+    return np.array(figure.canvas.buffer_rgba())
+
+def _assert_same_pixels(frame, expected, message):
+    assert np.array_equal(frame, expected), '{0:s}: {1:d} different pixels'.format(
+        message, int(np.any(frame != expected, axis=-1).sum()))
+
+def check_static_layer():
+    """
+    A frame of StaticLayer (cached static layer and blitted data) is the
+    same image as a full draw, also after the data change.
+    """
+
+    for case in ['lines', 'legend', 'pages', 'figure legend', 'detail']:
+        figure = _build_frame(case)
+        layer = jf.StaticLayer(figure)
+        _assert_same_pixels(layer.render(), _drawn(_build_frame(case)), case)
+
+        # new data of every line of the next frame
+        for axes, new_axes in zip(figure.get_axes(), _build_frame(case, phase=1.0).get_axes()):
+            for line, new_line in zip(axes.get_lines(), new_axes.get_lines()):
+                line.set_ydata(new_line.get_ydata())
+        _assert_same_pixels(layer.render(), _drawn(_build_frame(case, phase=1.0)), case+' (next frame)')
+
+#%% figure template
+def _template_layout(figure):
+    figure.set_size_inches(4.0, 3.0)
+    axes = figure.add_axes([0.15, 0.15, 0.7, 0.7])
+    axes.set_xlim(0.0, 1.0)
+    axes.set_ylim(-1.0, 1.0)
+    jf.set_major_ticks(axes, 0.25, along_axis='x', deferred=True)
+    return axes
+
+def _template_fill(axes, phase):
+    x = np.linspace(0.0, 1.0, 100)
+    for idx in range(3):
+        axes.plot(x, np.sin(6.0*x + idx + phase), label='line {0:d}'.format(idx))
+    axes.scatter(x[::10], np.cos(6.0*x[::10] + phase))
+    jf.pretty_legend(axes, position=['upper left', 'lower right'], pages=2)
+    axes.get_figure().legend(loc='center')
+
+def check_figure_template():
+    """
+    Every fill of a FigureTemplate plots on the axes of the template and
+    draws the same figure as a new figure built with the same layout and
+    data (colors of the property cycle, legends of the previous fill).
+    """
+
+    template = jf.FigureTemplate(_template_layout)
+    for phase in [0.0, 1.0, 1.0]:
+        figure = template.fill(_template_fill, phase)
+        lines = [line for line in template.axes.get_lines() if line.axes is template.axes and line.figure is template.figure]
+        assert len(lines) == 3, 'phase {0}: {1:d} of the 3 lines are on the axes of the template'.format(phase, len(lines))
+        expected = new_figure()
+        _template_fill(_template_layout(expected), phase)
+        _assert_same_pixels(_drawn(figure), _drawn(expected), 'phase {0}'.format(phase))
+
+#%% batch rendering and the cache
+def check_render_batch():
+    """
+    render_batch(processes=0) returns the rendered bytes, reports a failed
+    job without stopping the batch, and leaves the rcParams alone.
+    """
+
+    rc = mpl.rcParams.copy()
+    results = render_batch([{'build': _build_line, 'fname': None, 'args': ('C1',), 'savefig': {'format': 'png'}},
+                            {'build': _build_error, 'fname': None}], processes=0, apply_to=['figure', 'fonts', 'grid'])
+    assert results[0]['error'] is None and results[0]['data'].startswith(b'\x89PNG'), results[0]['error']
+    assert results[1]['error'] is not None and 'broken build' in results[1]['error'], results[1]['error']
+    changed = [name for name in rc if rc[name] != mpl.rcParams[name]]
+    assert not changed, 'rcParams changed: {0}'.format(changed)
+
+def check_figure_key():
+    """
+    figure_key() changes with the figure spec, the style and the content of
+    the data files, and only with those.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        _write_spec(directory)
+        data = os.path.join(directory, 'y.npy')
+
+        def key(figure_spec=_figure_spec(), style='pretty_style_v1', apply_to=['fonts']):
+            return figure_key(figure_spec, directory, style, apply_to)
+
+        reference = key()
+        assert key() == reference, 'the key is not stable'
+        changed = {'spec': key(figure_spec=_figure_spec(rect=[0.2, 0.1, 0.7, 0.8])),
+                   'style': key(style='pretty_style_v2'),
+                   'apply_to': key(apply_to=['fonts', 'grid'])}
+
+        # the content counts, not the modification time
+        stat = os.stat(data)
+        _write_spec(directory, scale=2.0)
+        os.utime(data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        changed['data'] = key()
+        _write_spec(directory)
+        os.utime(data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2*10**9))
+        assert key() == reference, 'the key changed with the modification time of the data only'
+
+        for name, value in changed.items():
+            assert value != reference, 'the key does not change with the {0:s}'.format(name)
+
+def check_render_spec_cache():
+    """
+    render_spec() skips the unchanged figures and renders again the figures
+    whose data changed or whose output is missing.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        fname = _write_spec(directory)
+        output = os.path.join(directory, 'graphics', 'figure.png')
+
+        def rendered():
+            results = jf.render_spec(fname)
+            assert all([result['error'] is None for result in results]), [result['error'] for result in results]
+            return not results[0]['skipped']
+
+        assert rendered(), 'the first render was skipped'
+        assert not rendered(), 'the unchanged figure was rendered again'
+        stat = os.stat(os.path.join(directory, 'y.npy'))
+        _write_spec(directory, scale=2.0)
+        os.utime(os.path.join(directory, 'y.npy'), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert rendered(), 'the figure was not rendered after its data changed'
+        os.remove(output)
+        assert rendered() and os.path.isfile(output), 'the missing output was not rendered'
+
+def check_render_spec_missing_data():
+    """
+    render_spec() reports a figure whose data file is missing as failed
+    and still renders the other figures.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        fname = _write_spec(directory)
+        missing = {**_figure_spec(), 'output': 'graphics/missing.png', 'data': {'y': 'missing.npy'}}
+        with open(fname, 'w', encoding='utf-8') as file:
+            json.dump({'style': 'pretty_style_v1', 'figures': [missing, _figure_spec()]}, file)
+
+        results = jf.render_spec(fname)
+        assert results[0]['error'] is not None and 'missing.npy' in results[0]['error'], results[0]['error']
+        assert results[1]['error'] is None and os.path.isfile(results[1]['fname']), results[1]['error']
+
+def check_watch_specs():
+    """
+    watch_specs() renders the spec and renders it again once its data change.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        fname = _write_spec(directory)
+        calls = []
+
+        def callback(fname, results):
+            calls.append(results)
+            # the data change once the watcher has recorded the files
+            if( len(calls) == 1 ):
+                threading.Timer(0.2, _write_spec, args=(directory, 2.0)).start()
+
+        jf.watch_specs([fname], processes=0, interval=0.05, callback=callback, polls=40)
+        assert len(calls) == 2, 'expected 2 renders, got {0:d}'.format(len(calls))
+        for results in calls:
+            assert not isinstance(results, Exception), results
+            assert not results[0]['skipped'] and results[0]['error'] is None, results[0]
+
+#%% render server
+async def _request(port, head, body=b''):
+    """
+    Status <int> and body <bytes> of a raw HTTP request.
+    """
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split()[1]), rest.partition(b'\r\n\r\n')[2]
+
+def _post(port, body, content_type='application/json', query=''):
+    head = 'POST /render{0:s} HTTP/1.1\r\nContent-Type: {1:s}\r\nContent-Length: {2:d}\r\n\r\n'.format(query, content_type, len(body))
+    return _request(port, head, body)
+
+async def _check_server():
+    server = jf.RenderServer(port=0, processes=1, max_body=2**20)
+    await server.start()
+    try:
+        spec = json.dumps({'axes': {'main': {'rect': [0.1, 0.1, 0.8, 0.8]}},
+                           'plots': [{'axes': 'main', 'y': [0.0, 1.0, 0.5]}]}).encode()
+        status, data = await _post(server.port, spec, query='?format=png&dpi=50')
+        assert status == 200 and data.startswith(b'\x89PNG'), (status, data[:200])
+
+        # malformed requests
+        for body, content_type in [(b'{not json', 'application/json'), (b'[1, 2]', 'application/json'), (spec, 'text/plain')]:
+            status, data = await _post(server.port, body, content_type)
+            assert status == 400, (body, status, data)
+        # styles outside the stylelib of the package
+        for style_spec in [{'style': '../../../../tmp/x'}, {'apply_to': ['../figure']}]:
+            status, data = await _post(server.port, json.dumps({**json.loads(spec), **style_spec}).encode())
+            assert status == 400, (style_spec, status, data)
+        for length in ['abc', '-5']:
+            status, data = await _request(server.port, 'POST /render HTTP/1.1\r\nContent-Length: {0:s}\r\n\r\n'.format(length))
+            assert status == 400, (length, status, data)
+        status, data = await _request(server.port, 'POST /render HTTP/1.1\r\nContent-Length: {0:d}\r\n\r\n'.format(2**21))
+        assert status == 413, (status, data)
+
+        # full queue
+        server.max_queue = 0
+        status, data = await _post(server.port, spec)
+        server.max_queue = 64
+        assert status == 503, (status, data)
+
+        # a render over the timeout, its worker finishes before the next render
+        server.timeout = 1e-3
+        status, data = await _post(server.port, spec, query='?format=png&dpi=300')
+        server.timeout = 60.0
+        assert status == 504, (status, data)
+        status, data = await _post(server.port, spec, query='?format=png&dpi=50')
+        assert status == 200, (status, data[:200])
+
+        status, data = await _request(server.port, 'GET /metrics HTTP/1.1\r\n\r\n')
+        metrics = json.loads(data)
+        expected = {'requests': 9, 'rendered': 2, 'failed': 5, 'rejected': 1, 'timeouts': 1, 'running': 0, 'queued': 0}
+        assert {name: metrics[name] for name in expected} == expected, metrics
+    finally:
+        await server.close()
+
+def check_server():
+    """
+    The render server answers 200, 400 (also for a style outside the
+    stylelib), 413, 503 and 504 and counts every render request once in
+    its metrics.
+    """
+
+    asyncio.run(_check_server())
+
+#%% runner
+def discover(pattern=''):
+    """
+    Checks of this module matching the regex "pattern", return
+    <list(<tuple>)> of (name, <callable>).
+    """
+
+    return [(name, function) for name, function in sorted(globals().items())
+            if name.startswith('check_') and callable(function) and re.search(pattern, name)]
+
+def run(pattern=''):
+    """
+    Run the checks matching the regex "pattern", print their results
+    and return the number of failed checks.
+    """
+
+    print('matplotlib {0:s}, numpy {1:s}'.format(mpl.__version__, np.__version__), flush=True)
+    failed = 0
+    for name, function in discover(pattern):
+        try:
+            function()
+        except Exception:
+            failed += 1
+            print('{0:40s} FAILED\n{1:s}'.format(name, traceback.format_exc()), flush=True)
+        else:
+            print('{0:40s} ok'.format(name), flush=True)
+    return failed
+
+#%% command line
+if __name__ == "__main__":
+
+    failed = run(sys.argv[1] if len(sys.argv) > 1 else '')
+    if( failed ):
+        print('\n{0:d} check(s) failed.'.format(failed))
+        sys.exit(1)
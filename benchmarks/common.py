@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared setup of the benchmarks: headless figures, axes grids and data.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+mpl.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% styles of the labels used across the benchmarks
+STYLE_LABELS_X = {'which_axis':'S', 'label_format':'{0:.0f}', 'label_align':'NW', 'rotation_angle':-45.0,
+                  'rotation_origin':'anchor', 'padding_x':0.0, 'padding_y':-0.01}
+STYLE_LABELS_Y = {'which_axis':'W', 'label_format':'{0:.1f}', 'label_align':'NE', 'rotation_angle':-45.0,
+                  'rotation_origin':'anchor', 'padding_x':-0.01, 'padding_y':0.01}
+
+#%% figures
+def new_figure(width=20, height=12):
+    """
+    Plain figure (not registered by pyplot) with an Agg canvas,
+    "width" and "height" in centimeters.
+    """
+
+    figure = Figure(figsize=(width/2.54, height/2.54))
+    FigureCanvasAgg(figure)
+    return figure
+
+def grid_figure(number_of_axes, limits=[[0.0, 100.0], [-1.1, 1.1]]):
+    """
+    Figure with "number_of_axes" axes placed on a square-ish grid,
+    every axes with the same "limits". Returns (figure, <list(<axes handle>)>).
+    """
+
+    columns = int(np.ceil(np.sqrt(number_of_axes)))
+    rows = int(np.ceil(number_of_axes/columns))
+    figure = new_figure(8*columns, 6*rows)
+    axes_list = []
+    for idx in range(number_of_axes):
+        row, column = divmod(idx, columns)
+        axes = figure.add_axes([(column + 0.15)/columns, 1.0 - (row + 0.85)/rows, 0.7/columns, 0.7/rows])
+        axes.set_xlim(limits[0])
+        axes.set_ylim(limits[1])
+        axes_list.append(axes)
+    return figure, axes_list
+
+#%% data
+def series(number_of_points, seed=0):
+    """
+    Noisy sine wave with "number_of_points" samples over x in [0, 100].
+    """
+
+    generator = np.random.default_rng(seed)
+    x = np.linspace(0.0, 100.0, int(number_of_points))
+    y = np.sin(x/5.0) + 0.05*generator.standard_normal(x.size)
+    return x, y
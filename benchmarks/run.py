@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless runner of the asv-style benchmark suites in this directory, with
+stored baselines. Every benchmark runs in a fresh interpreter, so the peak
+RSS belongs to that benchmark only. From the root of the repository:
+
+    python -m benchmarks.run                 # run all, compare to the baselines
+    python -m benchmarks.run --quick         # first value of every parameter only
+    python -m benchmarks.run --filter legend # benchmarks matching a regex
+    python -m benchmarks.run --save          # store the results as the baselines
+
+The results of the benchmarked helpers are verified by benchmarks.checks
+(python -m benchmarks.checks), a fast benchmark is only worth its time
+if its check passes.
+
+The suites follow the asv conventions (the directory can be run by asv as
+well): classes with "params", "param_names", "setup", "teardown" and
+methods prefixed by "time_" (wall time in seconds), "peakmem_" (peak RSS
+in bytes) and "track_" (the returned value, e.g. size of the output file).
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import argparse
+import importlib
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% paths
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(BENCHMARKS_DIRECTORY, 'baselines.json')
+
+#%% discovery
+def discover(pattern='', quick=False):
+    """
+    Find all the benchmarks, return <list(<tuple>)> of
+    (name, \'module.Class.method\', <list(parameter values)>).
+    """
+
+    benchmarks = []
+    for fname in sorted(os.listdir(BENCHMARKS_DIRECTORY)):
+        if( not (fname.startswith('bench_') and fname.endswith('.py')) ):
+            continue
+        module = importlib.import_module('benchmarks.'+fname[:-3])
+        for suite in vars(module).values():
+            if( not isinstance(suite, type) or suite.__module__ != module.__name__ ):
+                continue
+            params = getattr(suite, 'params', [])
+            # a single parameter can be given as a plain list
+            if( params and not isinstance(params[0], (list, tuple)) ):
+                params = [params]
+            if( quick ):
+                params = [values[:1] for values in params]
+            for method in sorted(vars(suite)):
+                if( not method.startswith(('time_', 'peakmem_', 'track_')) ):
+                    continue
+                target = '{0:s}.{1:s}.{2:s}'.format(fname[:-3], suite.__name__, method)
+                for combination in itertools.product(*params):
+                    name = target + '(' + ', '.join([repr(value) for value in combination]) + ')'
+                    if( re.search(pattern, name) ):
+                        benchmarks.append( (name, target, list(combination)) )
+    return benchmarks
+
+def _load(target):
+    """
+    Return (suite class, method name) of the \'module.Class.method\' target.
+    """
+
+    module_name, suite_name, method = target.split('.')
+    module = importlib.import_module('benchmarks.'+module_name)
+    return getattr(module, suite_name), method
+
+#%% single benchmark (in the child process)
+def run_benchmark(target, combination, repeat=3):
+    """
+    Run a single benchmark in the current process.
+
+    Returns
+    -------
+    result : <dict>
+        'value' and 'unit' of the measurement, or 'skipped': True when
+        the setup raises NotImplementedError (the asv convention).
+
+    """
+
+    suite, method = _load(target)
+
+    # the "time_" benchmarks are warmed up first (imports, caches), as in asv
+    samples = []
+    for _ in range(repeat + 1 if method.startswith('time_') else 1):
+        instance = suite()
+        try:
+            if( hasattr(instance, 'setup') ):
+                instance.setup(*combination)
+        except NotImplementedError:
+            return {'skipped': True}
+        try:
+            start = time.perf_counter()
+            value = getattr(instance, method)(*combination)
+            samples.append(time.perf_counter() - start)
+        finally:
+            if( hasattr(instance, 'teardown') ):
+                instance.teardown(*combination)
+
+    if( method.startswith('time_') ):
+        return {'value': min(samples[1:]), 'unit': 'seconds'}
+    elif( method.startswith('peakmem_') ):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return {'value': peak if sys.platform == 'darwin' else peak*1024, 'unit': 'bytes'}
+    else:
+        return {'value': value, 'unit': getattr(getattr(suite, method), 'unit', '')}
+
+def run_isolated(target, combination, repeat=3):
+    """
+    Run a single benchmark in a fresh interpreter, return its result
+    (see run_benchmark()), or \'error\' with the message.
+    """
+
+    suite, _ = _load(target)
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', target, json.dumps(combination),
+               '--repeat', str(repeat)]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True,
+                                 timeout=getattr(suite, 'timeout', 60),
+                                 cwd=os.path.dirname(BENCHMARKS_DIRECTORY))
+    except subprocess.TimeoutExpired:
+        return {'error': 'timeout'}
+    if( process.returncode != 0 ):
+        return {'error': process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'failed'}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+#%% baselines
+def load_baselines(fname=BASELINES):
+    """
+    Stored baselines <dict>, empty if there are none.
+    """
+
+    if( not os.path.isfile(fname) ):
+        return {'machine': {}, 'results': {}}
+    with open(fname, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def save_baselines(results, fname=BASELINES):
+    """
+    Merge the "results" into the stored baselines.
+    """
+
+    import matplotlib
+    baselines = load_baselines(fname)
+    baselines['machine'] = {'node': platform.node(), 'processor': platform.machine(),
+                            'python': platform.python_version(), 'matplotlib': matplotlib.__version__}
+    baselines['results'].update( {name: result for name, result in results.items() if 'value' in result} )
+    baselines['results'] = dict(sorted(baselines['results'].items()))
+    with open(fname, 'w', encoding='utf-8') as file:
+        json.dump(baselines, file, indent=1)
+        file.write('\n')
+
+def compare(name, result, baselines, factor):
+    """
+    Ratio of the result to its baseline (None without a baseline) and
+    whether it is a regression (larger by more than "factor").
+    """
+
+    baseline = baselines['results'].get(name, None)
+    if( baseline is None or 'value' not in result or baseline['unit'] != result['unit'] ):
+        return None, False
+    if( baseline['value'] == 0 ):
+        return (1.0 if result['value'] == 0 else float('inf')), result['value'] != 0
+    ratio = result['value'] / baseline['value']
+    return ratio, ratio > factor
+
+def _format(result):
+    """
+    Human readable value of a result.
+    """
+
+    if( 'skipped' in result ):
+        return 'skipped'
+    elif( 'error' in result ):
+        return 'error: '+result['error']
+    elif( result['unit'] == 'seconds' ):
+        return '{0:10.4f} s'.format(result['value'])
+    elif( result['unit'] == 'bytes' ):
+        return '{0:10.2f} MB'.format(result['value']/2**20)
+    return '{0:>10} {1:s}'.format(result['value'], result['unit'])
+
+#%% command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Run the journal_figure benchmarks.')
+    parser.add_argument('--filter', default='', help='regular expression selecting the benchmarks')
+    parser.add_argument('--quick', action='store_true', help='only the first value of every parameter')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions of the "time_" benchmarks (minimum is kept)')
+    parser.add_argument('--factor', type=float, default=1.25, help='ratio to the baseline reported as a regression')
+    parser.add_argument('--save', action='store_true', help='store the results as the baselines')
+    parser.add_argument('--baselines', default=BASELINES, help='path of the baselines')
+    parser.add_argument('--output', default=None, help='path of a JSON file with the results')
+    parser.add_argument('--child', nargs=2, default=None, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if( arguments.child is not None ):
+        print( json.dumps(run_benchmark(arguments.child[0], json.loads(arguments.child[1]), arguments.repeat)) )
+        sys.exit(0)
+
+    baselines = load_baselines(arguments.baselines)
+    if( baselines['machine'] and baselines['machine'].get('node') != platform.node() ):
+        print('The baselines were recorded on another machine ({0}), the ratios are indicative only.\n'.format(baselines['machine']))
+    results = {}
+    regressions = []
+    errors = []
+    for name, target, combination in discover(arguments.filter, arguments.quick):
+        result = run_isolated(target, combination, arguments.repeat)
+        results[name] = result
+        ratio, regression = compare(name, result, baselines, arguments.factor)
+        print('{0:100s} {1:>14s} {2:s}'.format(name, _format(result),
+              '' if ratio is None else '{0:6.2f}x{1:s}'.format(ratio, '  REGRESSION' if regression else '')), flush=True)
+        if( regression ):
+            regressions.append(name)
+        if( 'error' in result ):
+            errors.append(name)
+
+    if( arguments.output is not None ):
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=1)
+    if( arguments.save ):
+        save_baselines(results, arguments.baselines)
+
+    # a benchmark that fails is a broken helper, not a slow one
+    if( errors ):
+        print('\n{0:d} benchmark(s) failed: {1:s}'.format(len(errors), ', '.join(errors)))
+    if( regressions ):
+        print('\n{0:d} regression(s) larger than {1:.2f}x the baselines.'.format(len(regressions), arguments.factor))
+    if( errors or regressions ):
+        sys.exit(1)
@@ -1,18 +1,74 @@
 # -*- coding: utf-8 -*-
+"""
+The public functions and classes are imported on the first access 
+(module __getattr__), thus "import journal_figure" is cheap and 
+matplotlib.pyplot is never imported by journal_figure itself.
+"""
 
-from journal_figure.library_package import *
+import importlib
 
 
 #%% ---------------------------------------------------------------------------
 #   ---------------------------------FUNCTIONS---------------------------------
 #   ---------------------------------------------------------------------------
 
-from journal_figure.library_package import pretty_detail_axis
-from journal_figure.library_package import set_style
-from journal_figure.library_package import set_ticks
-from journal_figure.library_package import prettify_minor_ticks
-from journal_figure.library_package import prettify_major_ticks
-from journal_figure.library_package import set_figure_size
-from journal_figure.library_package import _latexify
-from journal_figure.library_package import pretty_legend
+_FUNCTIONS = {
+    'package_path'             : 'journal_figure.library_package',
+    'pretty_detail_axis'       : 'journal_figure.library_package',
+    'pretty_detail_axes'       : 'journal_figure.library_package',
+    'propose_detail_specs'     : 'journal_figure.library_package',
+    'plot_decimated'           : 'journal_figure.library_package',
+    'set_style'                : 'journal_figure.library_package',
+    'style_context'            : 'journal_figure.library_package',
+    'set_major_ticks'          : 'journal_figure.library_package',
+    'set_minor_ticks'          : 'journal_figure.library_package',
+    'apply_deferred_ticks'     : 'journal_figure.library_package',
+    'set_figure_size'          : 'journal_figure.library_package',
+    'tight_bbox'               : 'journal_figure.library_package',
+    'text_extent_cache_info'   : 'journal_figure.text_metrics',
+    'text_extent_cache_clear'  : 'journal_figure.text_metrics',
+    'pretty_legend'            : 'journal_figure.library_package',
+    'add_colorbar'             : 'journal_figure.library_package',
+    'profile'                  : 'journal_figure.profiling',
+    'get_colormap'             : 'journal_figure.color_schemes',
+    'series_colors'            : 'journal_figure.color_schemes',
+    'value_colors'             : 'journal_figure.color_schemes',
+    'nearest_color_index'      : 'journal_figure.color_schemes',
+    'decoration_sizes'         : 'journal_figure.layout',
+    'solve_layout'             : 'journal_figure.layout',
+    'layout_figure'            : 'journal_figure.layout',
+    'load_spec'                : 'journal_figure.spec',
+    'build_figure'             : 'journal_figure.spec',
+    'render_spec'              : 'journal_figure.spec',
+    'watch_specs'              : 'journal_figure.watch',
+    'serve'                    : 'journal_figure.server',
+    }
 
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+_CLASSES = {
+    'LabelFormatter'           : 'journal_figure.library_package',
+    'StaticLayer'              : 'journal_figure.static_layer',
+    'FigureTemplate'           : 'journal_figure.template',
+    'RenderServer'             : 'journal_figure.server',
+    }
+
+#%% ---------------------------------------------------------------------------
+#   -------------------------------LAZY IMPORTS--------------------------------
+#   ---------------------------------------------------------------------------
+
+__all__ = list(_FUNCTIONS) + list(_CLASSES)
+
+def __getattr__(name):
+    module_name = _FUNCTIONS.get(name, _CLASSES.get(name, None))
+    if( module_name is None ):
+        raise AttributeError('module \'journal_figure\' has no attribute \'{0:s}\''.format(name))
+    value = getattr(importlib.import_module(module_name), name)
+    # the next access does not go through __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted( set(globals()) | set(__all__) )
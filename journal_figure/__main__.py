@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+python -m journal_figure, see journal_figure.cli.
+"""
+
+import sys
+
+from journal_figure.cli import main
+
+sys.exit(main())
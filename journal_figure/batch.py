@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel batch export of figures built with journal_figure.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import concurrent.futures
+import importlib
+import traceback
+import io
+import os.path
+import time
+
+from journal_figure.library_package import _load_style, style_context
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% batch
+def render_batch(jobs, processes=None, style='pretty_style_v1',
+                 apply_to=['figure', 'fonts', 'grid', 'ticks', 'legend'], executor=None):
+    """
+    Render figures in parallel across a pool of processes. Every worker
+    applies the style once and builds the figures on plain Figure objects
+    (Agg canvas, PDF/PNG/... chosen by the file extension), thus the global
+    state of pyplot is never used.
+
+    Parameters
+    ----------
+    jobs : <list(<dict>)>
+        Figures to be rendered, every <dict> contains:
+            'build' : <callable> called as build(figure, *args, **kwargs)
+                to populate the (empty) "figure". It has to be picklable,
+                i.e. defined at the top level of a module. A returned <dict>
+                is added to "savefig", e.g. {'bbox_inches': bbox} of
+                set_figure_size(..., tight=True).
+            'fname' : <string> path of the output file, or None to return
+                the rendered bytes as 'data' of the report (the format is
+                given by 'format' of "savefig", PNG by default).
+            'args' : <tuple>, optional positional arguments of "build".
+            'kwargs' : <dict>, optional keyword arguments of "build".
+            'savefig' : <dict>, optional keyword arguments of
+                figure.savefig(), e.g. {'dpi':600, 'bbox_inches':'tight'}.
+    processes : <int>, optional
+        Number of worker processes. Default value is None, which uses all
+        the available cores. Value 0 renders the jobs in the calling process,
+        whose backend and rcParams are left unchanged.
+    style : <string>, optional
+        Name of the style applied in every worker, see set_style().
+    apply_to: <list<string>>, optional
+        List of objects to apply the style to, see set_style().
+    executor : <concurrent.futures.ProcessPoolExecutor>, optional
+        Warm pool of workers made by worker_pool(), reused across the
+        batches instead of a new pool ("processes" is ignored). The style
+        is applied per job by style_context(), only the rcParams that differ
+        are changed and restored. Default value is None.
+
+    Returns
+    -------
+    results : <list(<dict>)>
+        Report of every job (in the order of "jobs"):
+            'fname' : path of the output file.
+            'build_time' : time spent by "build" in seconds.
+            'save_time' : time spent by savefig in seconds.
+            'total_time' : total time in seconds.
+            'bytes' : size of the output file.
+            'data' : rendered <bytes>, only for 'fname' None.
+            'pid' : process id of the worker.
+            'error' : None, or the traceback <string> if the job failed
+                (a failed job does not stop the batch).
+
+    """
+
+    if( executor is not None ):
+        jobs = [{**job, 'style':style, 'apply_to':apply_to} for job in jobs]
+        return list( executor.map(_render_styled_job, jobs) )
+
+    # in the calling process the backend is kept and the style is restored
+    if( processes == 0 ):
+        with style_context(style, apply_to):
+            return [_render_job(job) for job in jobs]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes,
+                                                initializer=_init_worker,
+                                                initargs=(style, apply_to)) as executor:
+        return list( executor.map(_render_job, jobs) )
+
+def _init_worker(style, apply_to):
+    """
+    Prepare the worker process: non-interactive backend and the style
+    applied once (single rcParams update).
+    """
+
+    mpl.use('Agg')
+    mpl.rcParams.update( _load_style(style, apply_to, 'render_batch') )
+
+def worker_pool(processes=None):
+    """
+    Pool of warm workers for repeated render_batch() calls (e.g. watch_specs()),
+    every worker imports matplotlib and the journal_figure helpers once.
+    Close the pool by executor.shutdown(), or use it in a "with" block.
+
+    Parameters
+    ----------
+    processes : <int>, optional
+        Number of worker processes. Default value is None, which uses all
+        the available cores.
+
+    Returns
+    -------
+    executor : <concurrent.futures.ProcessPoolExecutor>
+
+    """
+
+    return concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init_warm_worker)
+
+def _init_warm_worker():
+    """
+    Prepare a worker of worker_pool(): non-interactive backend and all the
+    helpers imported, the style is applied per job.
+    """
+
+    mpl.use('Agg')
+    importlib.import_module('journal_figure.spec')
+
+def _render_styled_job(job):
+    """
+    Render the job within its style (see style_context()).
+    """
+
+    with style_context(job['style'], job['apply_to']):
+        return _render_job(job)
+
+def _render_job(job):
+    """
+    Build and save a single figure, return the report of the job.
+    """
+
+    result = {'fname':job['fname'], 'build_time':None, 'save_time':None,
+              'total_time':None, 'bytes':None, 'pid':os.getpid(), 'error':None}
+    start = time.perf_counter()
+    try:
+        # plain figure, not registered by pyplot
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        savefig = job['build'](figure, *job.get('args', ()), **job.get('kwargs', {}))
+        savefig = {**job.get('savefig', {}), **(savefig if isinstance(savefig, dict) else {})}
+        result['build_time'] = time.perf_counter() - start
+
+        start_save = time.perf_counter()
+        if( job['fname'] is None ):
+            output = io.BytesIO()
+            figure.savefig(output, **savefig)
+            result['data'] = output.getvalue()
+            result['bytes'] = len(result['data'])
+        else:
+            figure.savefig(job['fname'], **savefig)
+            result['bytes'] = os.path.getsize(job['fname'])
+        result['save_time'] = time.perf_counter() - start_save
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['total_time'] = time.perf_counter() - start
+
+    return result
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line interface of journal_figure:
+
+    journal-figure render figures.yaml            # render the changed figures
+    journal-figure render a.json b.json --jobs 4  # in parallel
+    journal-figure render figures.yaml --force    # ignore the cache
+    journal-figure watch figures.yaml --jobs 4    # re-render on every change
+    journal-figure serve --port 8765 --jobs 4     # local render server
+
+The same is available as "python -m journal_figure".
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import argparse
+import sys
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+def _parser():
+    parser = argparse.ArgumentParser(prog='journal-figure', description='Render journal figures from declarative specs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    render = commands.add_parser('render', help='render the figures of spec files (.json, .yaml), skipping the unchanged ones')
+    render.add_argument('specs', nargs='+', help='paths of the spec files')
+    render.add_argument('--jobs', type=int, default=0, help='number of worker processes (default 0 renders in this process)')
+    render.add_argument('--force', action='store_true', help='render all the figures regardless of the cache')
+
+    watch = commands.add_parser('watch', help='render the spec files and re-render the figures whose inputs change')
+    watch.add_argument('specs', nargs='+', help='paths of the spec files')
+    watch.add_argument('--jobs', type=int, default=None, help='number of warm worker processes (default all the cores, 0 renders in this process)')
+    watch.add_argument('--interval', type=float, default=0.5, help='seconds between the polls of the files')
+    watch.add_argument('--force', action='store_true', help='render all the figures on start regardless of the cache')
+
+    serve = commands.add_parser('serve', help='serve renders of figure specs over HTTP on localhost')
+    serve.add_argument('--host', default='127.0.0.1', help='loopback address to listen on')
+    serve.add_argument('--port', type=int, default=8765, help='TCP port')
+    serve.add_argument('--socket', default=None, help='path of a Unix socket listened on instead of TCP')
+    serve.add_argument('--jobs', type=int, default=2, help='number of warm worker processes (concurrent renders)')
+    serve.add_argument('--max-queue', type=int, default=64, help='requests waiting for a worker before new ones are rejected')
+    serve.add_argument('--timeout', type=float, default=60.0, help='seconds a render may take')
+    serve.add_argument('--style', default='pretty_style_v1', help='default style of the figures')
+    return parser
+
+def _report(results, verbose=True):
+    """
+    Print the results of render_spec(), return the number of failed figures.
+    """
+
+    failed = 0
+    for result in results:
+        if( result['skipped'] ):
+            if( verbose ):
+                print('unchanged {0:s}'.format(result['fname']), flush=True)
+        elif( result['error'] is None ):
+            print('rendered  {0:s} ({1:.2f} s, {2:d} bytes)'.format(result['fname'], result['total_time'], result['bytes']), flush=True)
+        else:
+            failed += 1
+            print('failed    {0:s}\n{1:s}'.format(result['fname'], result['error']), file=sys.stderr, flush=True)
+    return failed
+
+def _render(arguments):
+    """
+    Render the spec files, return the exit status (1 if any figure failed).
+    """
+
+    # the spec module imports matplotlib, thus "--help" stays fast
+    from journal_figure.spec import render_spec
+
+    failed = 0
+    for fname in arguments.specs:
+        failed += _report( render_spec(fname, force=arguments.force, processes=arguments.jobs) )
+    return 1 if failed else 0
+
+def _watch(arguments):
+    """
+    Watch the spec files until interrupted.
+    """
+
+    from journal_figure.watch import watch_specs
+
+    # the unchanged figures are listed on start only
+    started = set()
+
+    def callback(fname, results):
+        if( isinstance(results, Exception) ):
+            print('failed    {0:s}: {1}'.format(fname, results), file=sys.stderr, flush=True)
+        else:
+            _report(results, verbose=fname not in started)
+        started.add(fname)
+
+    print('watching {0:s} (Ctrl+C to stop)'.format(', '.join(arguments.specs)), flush=True)
+    try:
+        watch_specs(arguments.specs, processes=arguments.jobs, interval=arguments.interval,
+                    force=arguments.force, callback=callback)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _serve(arguments):
+    """
+    Run the render server until interrupted.
+    """
+
+    from journal_figure.server import serve
+
+    serve(host=arguments.host, port=arguments.port, path=arguments.socket, processes=arguments.jobs,
+          max_queue=arguments.max_queue, timeout=arguments.timeout, style=arguments.style)
+    return 0
+
+def main(argv=None):
+    """
+    Entry point of the "journal-figure" command.
+    """
+
+    arguments = _parser().parse_args(argv)
+    try:
+        if( arguments.command == 'render' ):
+            return _render(arguments)
+        elif( arguments.command == 'watch' ):
+            return _watch(arguments)
+        elif( arguments.command == 'serve' ):
+            return _serve(arguments)
+    except (OSError, ValueError, RuntimeError) as error:
+        print('journal-figure: {0}'.format(error), file=sys.stderr)
+        return 2
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------TESTING----------------------------------
+#   ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,180 @@
+#!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+Color palettes stored as contiguous (N, 3) RGB arrays, registered once as
+matplotlib colormaps, and vectorised assignment of colors to many series.
 
-IEEE_bright = {}
-IEEE_bright[ 0: (186 / 255,  12 / 255,  47 / 255)] # red
-IEEE_bright[ 1: (255 / 255, 163 / 255,   0 / 255)] # orange
-IEEE_bright[ 2: (255 / 255, 209 / 255,   0 / 255)] # yellow
-IEEE_bright[ 3: (120 / 255, 190 / 255,  32 / 255)] # light green
-IEEE_bright[ 4: (  0 / 255, 132 / 255,  61 / 255)] # dark green
-IEEE_bright[ 5: (152 / 255,  29 / 255, 151 / 255)] # purple
-IEEE_bright[ 6: (  0 / 255, 156 / 255, 166 / 255)] # cyan
-IEEE_bright[ 7: (  0 / 255,  98 / 255, 155 / 255)] # dark blue
-IEEE_bright[ 8: (  0 / 255, 181 / 255, 226 / 255)] # light blue
-IEEE_bright[ 9: (255 / 255, 255 / 255, 255 / 255)] # white
-
-IEEE_dark = {}
-IEEE_dark[ 0: (134 / 255,  31 / 255,  65 / 255)] # red
-IEEE_dark[ 1: (232 / 255, 119 / 255,  34 / 255)] # orange
-IEEE_dark[ 2: (255 / 255, 199 / 255,  44 / 255)] # yellow
-IEEE_dark[ 3: (101 / 255, 141 / 255,  27 / 255)] # light green
-IEEE_dark[ 4: (  0 / 255,  99 / 255,  65 / 255)] # dark green
-IEEE_dark[ 5: (119 / 255,  37 / 255, 131 / 255)] # purple
-IEEE_dark[ 6: (  0 / 255, 115 / 255, 119 / 255)] # cyan
-IEEE_dark[ 7: (  0 / 255,  40 / 255,  85 / 255)] # dark blue
-IEEE_dark[ 8: (117 / 255, 120 / 255, 123 / 255)] # grey
-IEEE_dark[ 9: (  0 / 255,   0 / 255,   0 / 255)] # black
\ No newline at end of file
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import matplotlib.colors
+import numpy as np
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------PALETTES----------------------------------
+#   ---------------------------------------------------------------------------
+IEEE_bright = np.array([[186,  12,  47],  # red
+                        [255, 163,   0],  # orange
+                        [255, 209,   0],  # yellow
+                        [120, 190,  32],  # light green
+                        [  0, 132,  61],  # dark green
+                        [152,  29, 151],  # purple
+                        [  0, 156, 166],  # cyan
+                        [  0,  98, 155],  # dark blue
+                        [  0, 181, 226],  # light blue
+                        [255, 255, 255]], # white
+                       dtype=float) / 255
+
+IEEE_dark = np.array([[134,  31,  65],  # red
+                      [232, 119,  34],  # orange
+                      [255, 199,  44],  # yellow
+                      [101, 141,  27],  # light green
+                      [  0,  99,  65],  # dark green
+                      [119,  37, 131],  # purple
+                      [  0, 115, 119],  # cyan
+                      [  0,  40,  85],  # dark blue
+                      [117, 120, 123],  # grey
+                      [  0,   0,   0]], # black
+                     dtype=float) / 255
+
+# palettes by the name of their colormap
+PALETTES = {'IEEE_bright': IEEE_bright, 'IEEE_dark': IEEE_dark}
+
+# the palettes are read-only and registered once as matplotlib colormaps
+for _name, _palette in PALETTES.items():
+    _palette.flags.writeable = False
+    if( _name not in mpl.colormaps ):
+        mpl.colormaps.register(mpl.colors.ListedColormap(_palette, name=_name))
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% colormaps
+# colormaps by name (matplotlib copies the colormap on every lookup)
+_colormap_cache = {}
+
+def get_colormap(colormap):
+    """
+    Colormap of a palette or of matplotlib, cached (the palettes are
+    registered with matplotlib as <ListedColormap> on import, thus
+    matplotlib.colormaps[\'IEEE_bright\'] works as well).
+
+    Parameters
+    ----------
+    colormap : <string> / <matplotlib.colors.Colormap>
+        Name of a palette (\'IEEE_bright\', \'IEEE_dark\') or of a matplotlib
+        colormap (e.g. \'viridis\'), or the colormap itself.
+
+    Raises
+    ------
+    ValueError
+        Unknown name of the colormap.
+
+    Returns
+    -------
+    Colormap <matplotlib.colors.Colormap>.
+
+    """
+
+    if( isinstance(colormap, mpl.colors.Colormap) ):
+        return colormap
+    if( colormap not in mpl.colormaps ):
+        raise ValueError('Unknown colormap "{0}", available are the palettes {1} and the matplotlib colormaps.'.format(colormap, list(PALETTES)))
+    # matplotlib.colormaps returns a copy, the copy is kept
+    if( colormap not in _colormap_cache ):
+        _colormap_cache[colormap] = mpl.colormaps[colormap]
+    return _colormap_cache[colormap]
+
+#%% vectorised colors
+def series_colors(number_of_series, colormap='viridis', mode='sample'):
+    """
+    Colors of many series in a single call, e.g. for
+    LineCollection(segments, colors=series_colors(1000)).
+
+    Parameters
+    ----------
+    number_of_series : <int>
+        Number of colors.
+    colormap : <string> / <matplotlib.colors.Colormap>, optional
+        Colormap or palette, see get_colormap(). Default value is \'viridis\'.
+    mode : <string>, optional
+        \'sample\' takes the colors evenly from the whole colormap (the first
+        and the last color included), \'cycle\' repeats the colors of a
+        palette (<ListedColormap>) in order. Default value is \'sample\'.
+
+    Raises
+    ------
+    ValueError
+        Wrong "mode".
+
+    Returns
+    -------
+    RGBA colors <numpy.ndarray> of shape (number_of_series, 4).
+
+    """
+
+    colormap = get_colormap(colormap)
+    if( mode == 'sample' ):
+        positions = np.linspace(0.0, 1.0, number_of_series) if number_of_series > 1 else np.zeros(number_of_series)
+        return colormap(positions)
+    elif( mode == 'cycle' ):
+        return colormap(np.arange(number_of_series) % colormap.N)
+    raise ValueError('The "mode" parameter has to be \'sample\' or \'cycle\'.')
+
+def value_colors(values, colormap='viridis', min_value=None, max_value=None):
+    """
+    Colors of the "values" mapped linearly onto the colormap.
+
+    Parameters
+    ----------
+    values : <numpy.ndarray>
+        Values, e.g. a parameter of every series of a sweep.
+    colormap : <string> / <matplotlib.colors.Colormap>, optional
+        Colormap or palette, see get_colormap(). Default value is \'viridis\'.
+    min_value : <float>, optional
+        Value of the first color. Default value is None (minimum of "values").
+    max_value : <float>, optional
+        Value of the last color. Default value is None (maximum of "values").
+
+    Returns
+    -------
+    RGBA colors <numpy.ndarray> of shape values.shape + (4,).
+
+    """
+
+    norm = mpl.colors.Normalize(vmin=min_value, vmax=max_value)
+    return get_colormap(colormap)(norm(np.asarray(values, dtype=float)))
+
+def nearest_color_index(colors, palette='IEEE_bright'):
+    """
+    Index of the palette color nearest (in RGB) to every color, to snap
+    arbitrary colors onto a palette.
+
+    Parameters
+    ----------
+    colors : <color> / <list(<color>)> / <numpy.ndarray>
+        Any matplotlib color(s), e.g. \'C0\', \'#1f77b4\' or an (N, 3)/(N, 4) array.
+    palette : <string> / <numpy.ndarray>, optional
+        Name of the palette or the (N, 3) array itself.
+        Default value is \'IEEE_bright\'.
+
+    Returns
+    -------
+    Indices <numpy.ndarray> of shape (number of colors,).
+
+    """
+
+    if( isinstance(palette, str) ):
+        if( palette not in PALETTES ):
+            raise ValueError('Unknown palette "{0}", available are {1}.'.format(palette, list(PALETTES)))
+        palette = PALETTES[palette]
+    rgb = mpl.colors.to_rgba_array(colors)[:, :3]
+    palette = np.asarray(palette, dtype=float)[:, :3]
+    # squared distances of every color to every palette color
+    distances = np.sum((rgb[:, None, :] - palette[None, :, :])**2, axis=2)
+    return np.argmin(distances, axis=1)
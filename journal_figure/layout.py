@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grid layout engine: every axes rectangle of a figure solved in physical
+units (journal column widths, margins, spacings, colorbar and insets)
+before the figure is created at its final size.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import matplotlib.text
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+from journal_figure.text_metrics import text_bbox
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% journal column widths
+# widths of the figures in centimeters
+COLUMN_WIDTHS = {'IEEE single'     :  8.89,   # 3.5 in
+                 'IEEE double'     : 18.19,   # 7.16 in
+                 'Elsevier single' :  9.00,
+                 'Elsevier 1.5'    : 14.00,
+                 'Elsevier double' : 19.00,
+                 'Nature single'   :  8.90,
+                 'Nature double'   : 18.30}
+
+# centimeters in a unit
+_UNITS = {'cm': 1.0, 'inch': 2.54}
+
+#%% decorations
+def _text_size(text, size):
+    """
+    Width and height of a single line of text in centimeters, laid out 
+    as matplotlib does, from the cached text extents (no renderer).
+    """
+
+    bbox = text_bbox(mpl.text.Text(0.0, 0.0, text, fontsize=size), position=(0.0, 0.0), dpi=72)
+    return (0.0, 0.0) if bbox is None else (bbox.width * 2.54/72, bbox.height * 2.54/72)
+
+def decoration_sizes(labels={'x':'0.0', 'y':'-0.0', 'xlabel':'X', 'ylabel':'Y', 'title':'', 'colorbar':'0.0'}):
+    """
+    Space (in centimeters) taken by the decorations of an axes with the
+    current style (font sizes, tick lengths and paddings of rcParams),
+    estimated from the cached text extents.
+
+    Parameters
+    ----------
+    labels : <dict>, optional
+        Representative (the longest) texts of the axes:
+            'x' : tick label along the x-axis (\'\' for none).
+            'y' : tick label along the y-axis (\'\' for none).
+            'xlabel' : label of the x-axis (\'\' for none).
+            'ylabel' : label of the y-axis (\'\' for none).
+            'title' : title of the axes (\'\' for none).
+            'colorbar' : tick label of the colorbar (\'\' for none).
+        Missing keys take the default values.
+
+    Returns
+    -------
+    sizes : <dict>
+        'left', 'bottom', 'top' : space taken next to the axes.
+        'right' : space taken by the last x tick label right of the axes.
+        'colorbar' : space taken right of the colorbar.
+
+    """
+
+    labels = {**{'x':'0.0', 'y':'-0.0', 'xlabel':'X', 'ylabel':'Y', 'title':'', 'colorbar':'0.0'}, **labels}
+    # the x tick labels are centered on the ticks at the ends of the axes
+    overhang = _text_size(_minus(labels['x']), mpl.rcParams['xtick.labelsize'])[0] / 2 if labels['x'] else 0.0
+    left = max(_tick_decoration('y', labels['y'])[0] + _axis_label_decoration(labels['ylabel']), overhang)
+    bottom = _tick_decoration('x', labels['x'])[1] + _axis_label_decoration(labels['xlabel'])
+    top = 0.0
+    if( labels['title'] ):
+        top = mpl.rcParams['axes.titlepad']*2.54/72 + _text_size(labels['title'], mpl.rcParams['axes.titlesize'])[1]
+    colorbar = _tick_decoration('y', labels['colorbar'])[0]
+
+    return {'left':left, 'bottom':bottom, 'top':top, 'right':overhang, 'colorbar':colorbar}
+
+def _tick_decoration(axis, label):
+    """
+    Width and height (centimeters) of a tick outside the axes, 
+    its padding and its "label" along the \'x\' or \'y\' axis.
+    """
+
+    if( not label ):
+        return 0.0, 0.0
+    rc = mpl.rcParams
+    width, height = _text_size(_minus(label), rc[axis+'tick.labelsize'])
+    outside = {'out':1.0, 'inout':0.5}.get(rc[axis+'tick.direction'], 0.0) * rc[axis+'tick.major.size']
+    return (outside + rc[axis+'tick.major.pad'])*2.54/72 + width, (outside + rc[axis+'tick.major.pad'])*2.54/72 + height
+
+def _axis_label_decoration(label):
+    """
+    Height (centimeters) of the axis "label" and its padding.
+    """
+
+    if( not label ):
+        return 0.0
+    return mpl.rcParams['axes.labelpad']*2.54/72 + _text_size(label, mpl.rcParams['axes.labelsize'])[1]
+
+def _minus(label):
+    """
+    Tick label with the minus sign as rendered by matplotlib.
+    """
+
+    return label.replace('-', '\u2212') if mpl.rcParams['axes.unicode_minus'] else label
+
+#%% layout
+def solve_layout(width, rows=1, columns=1, height=None, aspect=0.75,
+                 width_ratios=None, height_ratios=None, margins={}, spacing={},
+                 labels={}, colorbar=None, insets=[], units='cm'):
+    """
+    Solve the rectangles of a grid of axes (plus a colorbar and insets)
+    in physical units, in a single vectorised pass. The margins and
+    spacings not given are estimated from the extents of the tick labels,
+    axis labels and titles (see decoration_sizes()), thus the labels fit
+    without trial renders.
+
+    Parameters
+    ----------
+    width : <float> / <string>
+        Width of the figure in "units", or the name of a journal column
+        (see COLUMN_WIDTHS), e.g. \'IEEE single\'.
+    rows : <int>, optional
+        Number of rows of the grid. Default value is 1.
+    columns : <int>, optional
+        Number of columns of the grid. Default value is 1.
+    height : <float>, optional
+        Height of the figure in "units". Default value is None, which
+        derives the height from the "aspect" of the axes.
+    aspect : <float>, optional
+        Height over width of an axes (of the average one for unequal
+        ratios), used if "height" is None. Default value is 0.75.
+    width_ratios : <list(<float>)>, optional
+        Relative widths of the columns. Default value is None (equal widths).
+    height_ratios : <list(<float>)>, optional
+        Relative heights of the rows, from the top. Default value is None.
+    margins : <dict>, optional
+        \'left\', \'right\', \'bottom\' and \'top\' margins of the grid in "units",
+        the missing ones are estimated from "labels" (plus \'pad\' = 0.1 cm).
+    spacing : <dict>, optional
+        \'horizontal\' and \'vertical\' space between the axes in "units",
+        the missing ones are estimated from "labels" (plus \'pad\').
+    labels : <dict>, optional
+        Representative texts of the axes, see decoration_sizes().
+    colorbar : <dict>, optional
+        Colorbar right of the grid spanning all the rows, with \'width\'
+        and \'pad\' (space from the grid) in "units". Default value is None
+        (no colorbar).
+    insets : <list(<dict>)>, optional
+        Inset axes, every <dict> with \'parent\': (row, column) of the grid
+        and \'rect\': [x0, y0, width, height] in "units" relative to the lower
+        left corner of the parent axes. Default value is [].
+    units : <string>, optional
+        \'cm\' or \'inch\'. Default value is \'cm\'.
+
+    Raises
+    ------
+    ValueError
+        The axes do not fit in the figure, or a wrong value is provided.
+
+    Returns
+    -------
+    layout : <dict>
+        'size' : width and height of the figure in inches <numpy.ndarray>.
+        'axes' : rectangles [x0, y0, width, height] in figure fractions
+            <numpy.ndarray> of shape (rows, columns, 4), row 0 at the top.
+        'colorbar' : rectangle of the colorbar, or None.
+        'insets' : rectangles of the insets <numpy.ndarray> of shape (N, 4).
+
+    """
+
+    if( units not in _UNITS ):
+        raise ValueError('The "units" parameter accepts only \'cm\' and \'inch\' values.')
+    scale = _UNITS[units]
+    if( isinstance(width, str) ):
+        if( width not in COLUMN_WIDTHS ):
+            raise ValueError('Unknown column "{0}", available are {1}.'.format(width, list(COLUMN_WIDTHS)))
+        width = COLUMN_WIDTHS[width]
+    else:
+        width = float(width) * scale
+
+    # margins and spacings in centimeters, estimated where missing
+    decorations = decoration_sizes(labels)
+    pad = margins.get('pad', 0.1 / scale) * scale
+    left = margins['left'] * scale if 'left' in margins else decorations['left'] + pad
+    bottom = margins['bottom'] * scale if 'bottom' in margins else decorations['bottom'] + pad
+    top = margins['top'] * scale if 'top' in margins else decorations['top'] + pad
+    right = margins['right'] * scale if 'right' in margins else decorations['right'] + pad
+    horizontal = spacing['horizontal'] * scale if 'horizontal' in spacing else decorations['left'] + decorations['right'] + pad
+    vertical = spacing['vertical'] * scale if 'vertical' in spacing else decorations['bottom'] + decorations['top'] + pad
+    if( colorbar is not None ):
+        right += colorbar.get('pad', 0.2 / scale) * scale + colorbar.get('width', 0.3 / scale) * scale + decorations['colorbar']
+
+    # sizes of the columns and rows
+    width_ratios = np.ones(columns) if width_ratios is None else np.asarray(width_ratios, dtype=float)
+    height_ratios = np.ones(rows) if height_ratios is None else np.asarray(height_ratios, dtype=float)
+    if( width_ratios.size != columns or height_ratios.size != rows ):
+        raise ValueError('The "width_ratios"/"height_ratios" have to have one value per column/row.')
+    grid_width = width - left - right - (columns - 1) * horizontal
+    if( grid_width <= 0.0 ):
+        raise ValueError('The axes do not fit in the {0:.2f} cm wide figure, reduce the margins or spacings.'.format(width))
+    column_widths = grid_width * width_ratios / width_ratios.sum()
+    if( height is None ):
+        row_heights = aspect * grid_width / columns * height_ratios * rows / height_ratios.sum()
+        height = bottom + top + (rows - 1) * vertical + row_heights.sum()
+    else:
+        height = float(height) * scale
+        row_heights = (height - bottom - top - (rows - 1) * vertical) * height_ratios / height_ratios.sum()
+    if( np.any(row_heights <= 0.0) ):
+        raise ValueError('The axes do not fit in the {0:.2f} x {1:.2f} cm figure, reduce the margins or spacings.'.format(width, height))
+
+    # lower left corners, the rows from the top
+    x0 = left + np.concatenate([[0.0], np.cumsum(column_widths[:-1] + horizontal)])
+    y0 = height - top - np.cumsum(row_heights) - np.arange(rows) * vertical
+    rectangles = np.stack(np.broadcast_arrays(x0[None, :], y0[:, None], column_widths[None, :], row_heights[:, None]), axis=-1)
+
+    size = np.array([width, height])
+    layout = {'size': size / 2.54, 'axes': rectangles / np.tile(size, 2), 'colorbar': None, 'insets': np.zeros((0, 4))}
+
+    if( colorbar is not None ):
+        x_colorbar = x0[-1] + column_widths[-1] + colorbar.get('pad', 0.2 / scale) * scale
+        rectangle = [x_colorbar, y0[-1], colorbar.get('width', 0.3 / scale) * scale, y0[0] + row_heights[0] - y0[-1]]
+        layout['colorbar'] = np.array(rectangle) / np.tile(size, 2)
+
+    if( insets ):
+        parents = np.array([rectangles[inset['parent']] for inset in insets])
+        relative = np.array([inset['rect'] for inset in insets], dtype=float) * scale
+        layout['insets'] = np.column_stack([parents[:, :2] + relative[:, :2], relative[:, 2:]]) / np.tile(size, 2)
+
+    return layout
+
+def layout_figure(width, rows=1, columns=1, **kwargs):
+    """
+    Create a figure at its final size with the axes of a solved layout,
+    see solve_layout() for the parameters. The figure is a plain Figure
+    with an Agg canvas (not registered by pyplot), thus set_figure_size()
+    is not needed afterwards.
+
+        figure, axes, extra = layout_figure('IEEE double', rows=2, columns=3,
+                                            labels={'y':'-0.00', 'xlabel':'Time'},
+                                            colorbar={'width':0.3})
+        axes[0, 0].plot(x, y)
+
+    Returns
+    -------
+    figure : <figure handle>
+        Handle of the figure.
+    axes : <numpy.ndarray(<axes handle>)>
+        Axes of the grid, of shape (rows, columns), row 0 at the top.
+    extra : <dict>
+        'colorbar' : axes of the colorbar (or None).
+        'insets' : <list(<axes handle>)> of the insets.
+        'layout' : the solved layout, see solve_layout().
+
+    """
+
+    layout = solve_layout(width, rows, columns, **kwargs)
+    figure = Figure(figsize=layout['size'])
+    FigureCanvasAgg(figure)
+
+    axes = np.empty((rows, columns), dtype=object)
+    for row in range(rows):
+        for column in range(columns):
+            axes[row, column] = figure.add_axes(layout['axes'][row, column])
+    colorbar = None if layout['colorbar'] is None else figure.add_axes(layout['colorbar'])
+    # insets are drawn over their parent
+    insets = []
+    for inset, rectangle in zip(kwargs.get('insets', []), layout['insets']):
+        insets.append( figure.add_axes(rectangle) )
+        insets[-1].set_zorder(axes[inset['parent']].get_zorder() + 1)
+
+    return figure, axes, {'colorbar':colorbar, 'insets':insets, 'layout':layout}
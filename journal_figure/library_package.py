@@ -10,10 +10,34 @@ Created on Sat Oct  2 17:28:20 2021
 #   ----------------------------------IMPORTS----------------------------------
 #   ---------------------------------------------------------------------------
 import matplotlib as mpl
-import matplotlib.pyplot as plt
+import matplotlib.artist
+import matplotlib.axes
+import matplotlib.cm
+import matplotlib.collections
+import matplotlib.colors
+import matplotlib.legend
+import matplotlib.legend_handler
+import matplotlib.lines
+import matplotlib.style
+import matplotlib.ticker
 from matplotlib.ticker import (MultipleLocator, FixedLocator)
+from matplotlib.transforms import Bbox
 import numpy as np
 import os.path
+import string
+import re
+import contextlib
+import functools
+import copy
+
+# the demo at the end runs as a script (python library_package.py), the
+# directory above the package is then not on the path
+if( __name__ == "__main__" and not __package__ ):
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal_figure.text_metrics import text_bbox, _root_figure
+from journal_figure.profiling import profiled
 
 #%% ---------------------------------------------------------------------------
 #   ---------------------------------FUNCTIONS---------------------------------
@@ -25,10 +49,52 @@ def package_path(*paths, package_directory=os.path.dirname(os.path.abspath(__fil
     return os.path.join(package_directory, *paths)
 
 
+#%% style cache
+# parsed stylelib files {(style, element): (mtime, rcParams <dict>)}
+_style_cache = {}
+# merged elements {(style, (element, ...)): ((mtime, ...), rcParams <dict>)}
+_merged_style_cache = {}
+
+def _load_style(style, apply_to, _fuctionName='set_style'):
+    """
+    Return the rcParams of "style" for all the elements in "apply_to" merged 
+    into a single <dict>. Each stylelib file is parsed once per process and 
+    parsed again only when its modification time changes.
+    """
+    
+    # modification times of the stylelib files
+    paths = []
+    mtimes = []
+    for entry in apply_to:
+        path = package_path('stylelib/'+entry, style+'.mplstyle')
+        try:
+            mtimes.append( os.stat(path).st_mtime_ns )
+        except OSError:
+            raise RuntimeError(_fuctionName+': the file at the end of the path : '+path+', doesn''t exist.')
+        paths.append(path)
+    mtimes = tuple(mtimes)
+    
+    # merged entry is up to date
+    key = (style, tuple(apply_to))
+    if( key in _merged_style_cache and _merged_style_cache[key][0] == mtimes ):
+        return _merged_style_cache[key][1]
+    
+    # merge the elements, later elements take precedence (as in plt.style.use)
+    merged = {}
+    for entry, path, mtime in zip(apply_to, paths, mtimes):
+        if( (style, entry) not in _style_cache or _style_cache[(style, entry)][0] != mtime ):
+            _style_cache[(style, entry)] = (mtime, dict(mpl.rc_params_from_file(path, use_default_template=False)))
+        merged.update( _style_cache[(style, entry)][1] )
+    _merged_style_cache[key] = (mtimes, merged)
+    
+    return merged
+
 #%% general font settings
+@profiled
 def set_style(style='pretty_style_v1', apply_to='fonts'):
     """
-    Set pre-defined style to particular element.
+    Set pre-defined style to particular element. The style files are parsed 
+    once and kept in memory, so repeated calls only update the rcParams.
     
     Parameters
     ----------
@@ -46,20 +112,63 @@ def set_style(style='pretty_style_v1', apply_to='fonts'):
     _fuctionName = 'set_style'
     
     if(isinstance(apply_to,list)):
-        for entry in apply_to:
-            # path = './stylelib/'+entry+'/'+style+'.mplstyle'
-            path = package_path('stylelib/'+entry, style+'.mplstyle')
-            if( os.path.isfile(path) ):
-                plt.style.use(path)
-            else:
-                raise RuntimeError(_fuctionName+': the file at the end of the path : '+path+', doesn''t exist.')
+        # single update of rcParams with all the elements
+        mpl.style.use( _load_style(style, apply_to, _fuctionName) )
     else:
         raise ValueError(_fuctionName+': the "apply_to" parameter needs to be a <list> of <strings>.')
 
+#%% style context
+@contextlib.contextmanager
+def style_context(style='pretty_style_v1', apply_to=['fonts']):
+    """
+    Context manager setting pre-defined style to particular element only 
+    within the "with" block. Only the rcParams that differ from the current 
+    ones are changed, and only these are restored on exit, thus the contexts 
+    can be nested.
+    
+        with style_context('pretty_style_v1', ['figure', 'fonts']):
+            figure = plt.figure()
+            ...
+    
+    Parameters
+    ----------
+    style : <string>, optional
+        Name of the style to be set.
+    apply_to: <list<string>>, optional
+        List of objects to apply the style to. Currently defined styles for 
+        \'figure\', \'fonts\', \'grid\', \'ticks\', \'legend\'.
+        
+    Returns
+    -------
+    None.
+    """
+    
+    _fuctionName = 'style_context'
+    
+    if( not isinstance(apply_to,list) ):
+        raise ValueError(_fuctionName+': the "apply_to" parameter needs to be a <list> of <strings>.')
+    
+    # only the rcParams different from the current ones are applied
+    style_params = _load_style(style, apply_to, _fuctionName)
+    diff = {key: value for key, value in style_params.items() if mpl.rcParams[key] != value}
+    previous = {key: mpl.rcParams[key] for key in diff}
+    
+    mpl.rcParams.update(diff)
+    try:
+        yield
+    finally:
+        mpl.rcParams.update(previous)
+
 #%% detail_axes
+# default connectors of a detail axis (pretty_detail_axis() and pretty_detail_axes()),
+# a tuple so the shared default can not be modified
+_DETAIL_CONNECTIONS = ({'connector_detail':'NE', 'connector_detail_ax':'NE'}, {'connector_detail':'SW', 'connector_detail_ax':'SW'})
+
+@profiled
 def pretty_detail_axis(main_ax, detail_ax, main_limits, detail_limits, detail_pos, 
-                       connections=[{'connector_detail':'NE', 'connector_detail_ax':'NE'}, {'connector_detail':'SW', 'connector_detail_ax':'SW'}], 
-                       line_setting = {'linestyle':'-', 'color':'black', 'linewidth':0.5, 'alpha':1.0}):
+                       connections=_DETAIL_CONNECTIONS, 
+                       line_setting = {'linestyle':'-', 'color':'black', 'linewidth':0.5, 'alpha':1.0}, 
+                       batched=False):
     """Set the position of the detail axis "detail_ax" within 
     the main axis "main_ax", create the focussed area and draw 
     the connecting lines among edges.
@@ -90,11 +199,20 @@ def pretty_detail_axis(main_ax, detail_ax, main_limits, detail_limits, detail_po
         'linewidth' : line width of the connector lines and 
             the detail axes spine. Default value is 0.5.
         'alpha' : alpha channel of the 'color' property.
+    batched: <bool>, optional
+        If True, the rectangle and all the connectors are drawn as a single 
+        LineCollection (a single artist instead of one Line2D per line). 
+        Default value is False.
         
     Returns
     ----------
     lines: <dict(<str>:<line handles>)>
         A dictionary of line handles with appropriate names as keys (not including the detail axes spine).
+        If "batched" is True, the dictionary is 
+            {'collection': <LineCollection handle>, 
+             'segments': <dict(<str>:<int>)>}, 
+        where 'segments' maps the same names to the index of the line 
+        within the collection, e.g. lines['collection'].get_segments()[lines['segments']['rect_top']].
     """
     
     # output dictionary
@@ -104,54 +222,389 @@ def pretty_detail_axis(main_ax, detail_ax, main_limits, detail_limits, detail_po
     main_ax.set_xlim(main_limits[0])
     main_ax.set_ylim(main_limits[1])
     
-    # set position of detail_ax, calculate the relative position within main_ax
-    main_ax_width  = main_limits[0][1] - main_limits[0][0]
-    main_ax_height = main_limits[1][1] - main_limits[1][0]
+    # place the detail_ax within the main_ax
+    detail_ax.set_position(_detail_ax_positions(main_ax, main_limits, [detail_pos])[0], which='both')
+
+    # rectangle around the detail and the connectors
+    segments = _detail_segments(detail_limits, detail_pos, connections)
+    if( batched ):
+        lines['collection'] = _add_detail_collection(main_ax, list(segments.values()), line_setting)
+        lines['segments'] = {name: idx for idx, name in enumerate(segments)}
+    else:
+        lines = _plot_detail_segments(main_ax, segments, line_setting)
+
+    # set limits and spine of the detail axes
+    _set_detail_ax(detail_ax, detail_limits, line_setting)
+    
+    return lines
+
+#%% multiple detail_axes
+@profiled
+def pretty_detail_axes(main_ax, specs, main_limits=None, 
+                       line_setting = {'linestyle':'-', 'color':'black', 'linewidth':0.5, 'alpha':1.0}, 
+                       batched=False):
+    """Place multiple detail axes within the main axis "main_ax" at once, 
+    create the focussed areas and draw the connecting lines among edges. 
+    The positions of all detail axes are calculated in a single pass.
+
+    Parameters
+    ----------
+    main_ax: <axis handle>
+        Handle of the main axis.
+    specs: <list(<dict>)> / <structured numpy.ndarray>
+        Specification of the detail axes, every entry contains:
+            'detail_limits': [[x_min, x_max], [y_min, y_max]]
+                Limits of the detail axis, see pretty_detail_axis().
+            'detail_pos': [[x_left, x_right], [y_bottom, y_top]]
+                Position of the detail axis within the main_ax, 
+                see pretty_detail_axis().
+            'connections': <list(<dict>)>, optional
+                Connectors, see pretty_detail_axis(). Default value is 
+                the default of pretty_detail_axis().
+            'detail_ax': <axis handle>, optional
+                Handle of the detail axis. If missing (or None), a new axes 
+                is added to the figure above the main_ax.
+        A structured array uses the same names for its fields, e.g. 
+        dtype=[('detail_limits', float, (2,2)), ('detail_pos', float, (2,2)), ('connections', object)].
+    main_limits: [[x_min, x_max], [y_min, y_max]], optional
+        Limits of the main axis. Default value is None, which keeps 
+        the current limits of the main_ax.
+    line_setting: <dict>, optional
+        Styling of the lines, see pretty_detail_axis().
+    batched: <bool>, optional
+        If True, the rectangles and the connectors of all detail axes are 
+        drawn as a single LineCollection. Default value is False.
+
+    Raises
+    ------
+    ValueError
+        Throws "ValueError" when "specs" is neither a <list> 
+        nor a structured <numpy.ndarray>.
+
+    Returns
+    ----------
+    detail_axes: <list(<axis handle>)>
+        Handles of the detail axes, in the order of "specs".
+    lines: <list(<dict>)>
+        Line handles of every detail axis as returned by pretty_detail_axis(). 
+        If "batched" is True, all the dictionaries share the same 'collection'.
+    """
+    
+    _fuctionName = 'pretty_detail_axes'
+    
+    # default connectors of pretty_detail_axis
+    default_connections = [dict(connection) for connection in _DETAIL_CONNECTIONS]
+    
+    # unpack the specification
+    if( isinstance(specs, np.ndarray) and specs.dtype.names is not None ):
+        detail_limits = specs['detail_limits']
+        detail_pos = specs['detail_pos']
+        connections = specs['connections'] if 'connections' in specs.dtype.names else [default_connections]*specs.size
+        detail_axes = list(specs['detail_ax']) if 'detail_ax' in specs.dtype.names else [None]*specs.size
+    elif( isinstance(specs, list) ):
+        detail_limits = [spec['detail_limits'] for spec in specs]
+        detail_pos = [spec['detail_pos'] for spec in specs]
+        connections = [spec.get('connections', default_connections) for spec in specs]
+        detail_axes = [spec.get('detail_ax', None) for spec in specs]
+    else:
+        raise ValueError(_fuctionName+': the "specs" parameter needs to be a <list> of <dict> or a structured <numpy.ndarray>.')
+    detail_limits = np.asarray(detail_limits, dtype=float).reshape(-1, 2, 2)
+    
+    # set limits (once for all detail axes)
+    if( main_limits is None ):
+        main_limits = [main_ax.get_xlim(), main_ax.get_ylim()]
+    else:
+        main_ax.set_xlim(main_limits[0])
+        main_ax.set_ylim(main_limits[1])
+    
+    # positions of all detail axes within the figure
+    positions = _detail_ax_positions(main_ax, main_limits, detail_pos)
+    detail_pos = np.asarray(detail_pos, dtype=float).reshape(-1, 2, 2)
+    
+    figure = main_ax.get_figure()
+    lines = []
+    segments_batched = []
+    for idx in range(len(detail_axes)):
+        # place (or create) the detail_ax within the main_ax
+        if( detail_axes[idx] is None ):
+            detail_axes[idx] = figure.add_axes(positions[idx])
+            detail_axes[idx].set_zorder(main_ax.get_zorder()+1)
+        else:
+            detail_axes[idx].set_position(positions[idx], which='both')
+        
+        # rectangle around the detail and the connectors
+        segments = _detail_segments(detail_limits[idx], detail_pos[idx], connections[idx])
+        if( batched ):
+            lines.append({'segments': {name: len(segments_batched)+idx_segment for idx_segment, name in enumerate(segments)}})
+            segments_batched.extend(segments.values())
+        else:
+            lines.append(_plot_detail_segments(main_ax, segments, line_setting))
+        
+        # set limits and spine of the detail axes
+        _set_detail_ax(detail_axes[idx], detail_limits[idx], line_setting)
+    
+    # single collection for all detail axes
+    if( batched ):
+        collection = _add_detail_collection(main_ax, segments_batched, line_setting)
+        for entry in lines:
+            entry['collection'] = collection
+    
+    return detail_axes, lines
+
+#%% automatic detail_axes
+@profiled
+def propose_detail_specs(main_ax, x=None, y=None, number_of_details=1, criterion='variance', 
+                         x_ranges=[], detail_width=None, detail_height=0.35, 
+                         resolution=512, block_size=2**16):
+    """
+    Propose the "detail_limits", non-overlapping "detail_pos" and 
+    "connections" of the detail axes from the data, so the result can be 
+    passed directly to pretty_detail_axes(main_ax, specs). The data are 
+    scanned block by block (no copy of the full array is made) and reduced 
+    into "resolution" bins along the x-axis of the main_ax, thus the cost 
+    is linear in the number of samples.
+
+    Parameters
+    ----------
+    main_ax : <axis handle>
+        Handle of the main axis, its current limits define the scanned range.
+    x : <numpy.ndarray>, optional
+        X data. Default value is None, which scans the data of all 
+        the lines already plotted in the main_ax.
+    y : <numpy.ndarray>, optional
+        Y data, same size as "x". Default value is None.
+    number_of_details : <int>, optional
+        Number of proposed detail axes. Default value is 1.
+    criterion : <string>, optional
+        Region of interest, either \'variance\' (highest local variance) or 
+        \'peak\' (largest deviation from the mean, the detail is centred on 
+        the peak). Default value is \'variance\'.
+    x_ranges : <list([x_min, x_max])>, optional
+        User-specified x ranges of the details. If provided, "criterion" and 
+        "number_of_details" are ignored and only the y limits and 
+        the positions are proposed. Default value is [].
+    detail_width : <float>, optional
+        Width of a detail in x-data units. Default value is None, which is 
+        1/20 of the main_ax x-range.
+    detail_height : <float>, optional
+        Height of the detail axes as a fraction of the main_ax height. 
+        Default value is 0.35. A detail axes is shrunk to the free space 
+        above or below the data, a detail with less than 1/10 of the main_ax 
+        height of free space is left out.
+    resolution : <int>, optional
+        Number of bins along the x-axis. Default value is 512.
+    block_size : <int>, optional
+        Number of samples reduced at once. Default value is 2**16.
+
+    Raises
+    ------
+    ValueError
+        Throws "ValueError" when a wrong value is provided.
+
+    Returns
+    -------
+    specs : <list(<dict>)>
+        Specification of the detail axes ordered along the x-axis, 
+        every entry contains \'detail_limits\', \'detail_pos\' and 
+        \'connections\' as required by pretty_detail_axes(). Fewer than 
+        "number_of_details" entries are returned if the data do not offer 
+        enough regions or free space.
+
+    """
+    
+    _fuctionName = 'propose_detail_specs'
+    
+    if( criterion not in ['variance', 'peak'] ):
+        raise ValueError(_fuctionName+': the only allowed values for "criterion" are \'variance\' and \'peak\'.')
+    
+    # data to be scanned
+    if( x is None or y is None ):
+        series = [(line.get_xdata(), line.get_ydata()) for line in main_ax.get_lines()]
+    else:
+        series = [(x, y)]
+    
+    # main_ax limits and bins along x-axis
+    main_limits = np.array([main_ax.get_xlim(), main_ax.get_ylim()], dtype=float)
+    bin_width = (main_limits[0][1] - main_limits[0][0]) / resolution
+    count, sum_y, sum_y2, min_y, max_y = _binned_statistics(series, main_limits[0], resolution, block_size)
+    
+    # width of a detail in bins
+    if( detail_width is None ):
+        detail_width = (main_limits[0][1] - main_limits[0][0]) / 20
+    window = int(np.clip(np.round(detail_width / bin_width), 1, resolution))
+    
+    # x ranges of the details
+    if( x_ranges ):
+        bin_ranges = [( int(np.clip(np.floor((x_range[0] - main_limits[0][0]) / bin_width), 0, resolution-1)), 
+                        int(np.clip(np.ceil((x_range[1] - main_limits[0][0]) / bin_width), 1, resolution)) ) for x_range in x_ranges]
+        x_ranges = [[float(x_range[0]), float(x_range[1])] for x_range in x_ranges]
+    else:
+        # score of the bins
+        filled = count > 0
+        mean_y = np.sum(sum_y) / max(np.sum(count), 1)
+        score = np.zeros(resolution)
+        if( criterion == 'variance' ):
+            score[filled] = sum_y2[filled] / count[filled] - (sum_y[filled] / count[filled])**2
+        elif( criterion == 'peak' ):
+            score[filled] = np.maximum(max_y[filled] - mean_y, mean_y - min_y[filled])
+        
+        bin_ranges = []
+        if( criterion == 'variance' ):
+            # score of the windows (a window starts at every bin)
+            window_score = np.lib.stride_tricks.sliding_window_view(score, window).mean(axis=1)
+            window_score[ ~np.lib.stride_tricks.sliding_window_view(filled, window).any(axis=1) ] = -np.inf
+            
+            # pick the best non-overlapping windows
+            for _ in range(number_of_details):
+                start = int(np.argmax(window_score))
+                if( not np.isfinite(window_score[start]) ):
+                    break
+                bin_ranges.append( (start, start + window) )
+                window_score[max(start - window + 1, 0):start + window] = -np.inf
+        elif( criterion == 'peak' ):
+            # window centred on every bin (shifted inside the main_ax at the edges)
+            starts = np.clip(np.arange(resolution) - window // 2, 0, resolution - window)
+            peak_score = np.where(filled, score, -np.inf)
+            
+            # pick the highest peaks, every one within a single window
+            for _ in range(number_of_details):
+                peak = int(np.argmax(peak_score))
+                if( not np.isfinite(peak_score[peak]) ):
+                    break
+                start = int(starts[peak])
+                bin_ranges.append( (start, start + window) )
+                
+                # the neighbourhood of the peak (contiguous bins above half 
+                # of its score) is not picked again, nor is any bin whose 
+                # window would overlap this one
+                above = score > 0.5 * score[peak]
+                above[peak] = True
+                below_left = np.flatnonzero(~above[:peak])
+                below_right = np.flatnonzero(~above[peak:])
+                left = below_left[-1] + 1 if below_left.size else 0
+                right = peak + below_right[0] if below_right.size else resolution
+                peak_score[left:right] = -np.inf
+                peak_score[(starts < start + window) & (starts + window > start)] = -np.inf
+        bin_ranges.sort()
+        x_ranges = [[float(main_limits[0][0] + start * bin_width), float(main_limits[0][0] + stop * bin_width)] for start, stop in bin_ranges]
+    
+    # order the details along the x-axis, so the connectors do not cross
+    order = np.argsort([x_range[0] for x_range in x_ranges], kind='stable')
+    
+    # place the detail axes side by side in slots along the x-axis
+    specs = []
+    slot_width = (main_limits[0][1] - main_limits[0][0]) / max(len(x_ranges), 1)
+    main_height = main_limits[1][1] - main_limits[1][0]
+    height = detail_height * main_height
+    margin = 0.05 * main_height
+    for slot, idx in enumerate(order):
+        start, stop = bin_ranges[idx]
+        # y limits of the detail from the data within the x range
+        if( np.any(count[start:stop] > 0) ):
+            y_min = float(np.min(min_y[start:stop]))
+            y_max = float(np.max(max_y[start:stop]))
+            y_pad = 0.1 * (y_max - y_min) if y_max > y_min else 0.5 * max(abs(y_max), 1.0)
+            detail_limits = [x_ranges[idx], [y_min - y_pad, y_max + y_pad]]
+        else:
+            detail_limits = [x_ranges[idx], main_limits[1].tolist()]
+        
+        # free space above and below the data (and the detail itself) within the slot
+        slot_bins = slice( int(slot * slot_width / bin_width), max(int((slot + 1) * slot_width / bin_width), int(slot * slot_width / bin_width) + 1) )
+        slot_filled = count[slot_bins] > 0
+        occupied_top = max(np.max(max_y[slot_bins][slot_filled]) if np.any(slot_filled) else main_limits[1][0], detail_limits[1][1])
+        occupied_bottom = min(np.min(min_y[slot_bins][slot_filled]) if np.any(slot_filled) else main_limits[1][1], detail_limits[1][0])
+        space_above = main_limits[1][1] - occupied_top
+        space_below = occupied_bottom - main_limits[1][0]
+        # shrink the detail axes to fit the free space, a detail which would 
+        # not be readable (or would cover the data) is left out
+        height_fit = float(min(max(space_above, space_below) - 2 * margin, height))
+        if( height_fit < 0.1 * main_height ):
+            continue
+        x_left = main_limits[0][0] + (slot + 0.1) * slot_width
+        x_right = main_limits[0][0] + (slot + 0.9) * slot_width
+        if( space_above >= space_below ):
+            detail_pos = [[x_left, x_right], [main_limits[1][1] - margin - height_fit, main_limits[1][1] - margin]]
+            connections = [{'connector_detail':'NE', 'connector_detail_ax':'SE'}, {'connector_detail':'NW', 'connector_detail_ax':'SW'}]
+        else:
+            detail_pos = [[x_left, x_right], [main_limits[1][0] + margin, main_limits[1][0] + margin + height_fit]]
+            connections = [{'connector_detail':'SE', 'connector_detail_ax':'NE'}, {'connector_detail':'SW', 'connector_detail_ax':'NW'}]
+        
+        specs.append({'detail_limits':detail_limits, 'detail_pos':detail_pos, 'connections':connections})
+    
+    return specs
+
+def _binned_statistics(series, x_limits, resolution, block_size):
+    """
+    Reduce the (x, y) "series" into "resolution" bins within "x_limits", 
+    block by block. Returns count, sum, sum of squares, minimum and maximum 
+    of y in every bin.
+    """
+    
+    count = np.zeros(resolution)
+    sum_y = np.zeros(resolution)
+    sum_y2 = np.zeros(resolution)
+    min_y = np.full(resolution, np.inf)
+    max_y = np.full(resolution, -np.inf)
+    scale = resolution / (x_limits[1] - x_limits[0])
+    
+    for x, y in series:
+        x = np.asarray(x)
+        y = np.asarray(y)
+        for start in range(0, x.size, block_size):
+            # views of the data, only the block is processed at a time
+            x_block = x[start:start + block_size].astype(float, copy=False)
+            y_block = y[start:start + block_size].astype(float, copy=False)
+            valid = np.isfinite(x_block) & np.isfinite(y_block) & (x_block >= x_limits[0]) & (x_block <= x_limits[1])
+            if( not np.any(valid) ):
+                continue
+            y_block = y_block[valid]
+            bins = np.minimum( ((x_block[valid] - x_limits[0]) * scale).astype(np.intp), resolution - 1 )
+            count += np.bincount(bins, minlength=resolution)
+            sum_y += np.bincount(bins, weights=y_block, minlength=resolution)
+            sum_y2 += np.bincount(bins, weights=y_block*y_block, minlength=resolution)
+            np.minimum.at(min_y, bins, y_block)
+            np.maximum.at(max_y, bins, y_block)
+    
+    return count, sum_y, sum_y2, min_y, max_y
+
+#%% detail_axes helpers
+def _detail_ax_positions(main_ax, main_limits, detail_pos):
+    """
+    Relative positions [x0, y0, width, height] within the figure 
+    of the detail axes placed at "detail_pos" (N x [[x_left, x_right], [y_bottom, y_top]]) 
+    within the main_ax with "main_limits".
+    """
+    
+    main_limits = np.asarray(main_limits, dtype=float)
+    detail_pos = np.asarray(detail_pos, dtype=float).reshape(-1, 2, 2)
+    
     # position of detail_ax within main_ax
-    detail_ax_x0 = (detail_pos[0][0] - main_limits[0][0]) / main_ax_width
-    detail_ax_y0 = (detail_pos[1][0] - main_limits[1][0]) / main_ax_height
-    detail_ax_width  = (detail_pos[0][1] - detail_pos[0][0]) / main_ax_width
-    detail_ax_height = (detail_pos[1][1] - detail_pos[1][0]) / main_ax_height
+    detail_pos = (detail_pos - main_limits[np.newaxis, :, 0:1]) / (main_limits[np.newaxis, :, 1:2] - main_limits[np.newaxis, :, 0:1])
     # BUT since main_ax has RELATIVE position in regards to the figure, 
     # rescale the position of detail_ax accordingly
     main_ax_pos_rel = main_ax.get_position()
-    detail_ax_x0_rel = (detail_ax_x0 * main_ax_pos_rel.width) + main_ax_pos_rel.x0
-    detail_ax_y0_rel = (detail_ax_y0 * main_ax_pos_rel.height) + main_ax_pos_rel.y0
-    detail_ax_width_rel = detail_ax_width * main_ax_pos_rel.width
-    detail_ax_height_rel = detail_ax_height * main_ax_pos_rel.height
-    # place the detail_ax within the main_ax
-    detail_ax.set_position([detail_ax_x0_rel, detail_ax_y0_rel, detail_ax_width_rel, detail_ax_height_rel], which='both')
+    return np.column_stack(( detail_pos[:, 0, 0] * main_ax_pos_rel.width + main_ax_pos_rel.x0,
+                             detail_pos[:, 1, 0] * main_ax_pos_rel.height + main_ax_pos_rel.y0,
+                             (detail_pos[:, 0, 1] - detail_pos[:, 0, 0]) * main_ax_pos_rel.width,
+                             (detail_pos[:, 1, 1] - detail_pos[:, 1, 0]) * main_ax_pos_rel.height ))
 
+def _detail_segments(detail_limits, detail_pos, connections):
+    """
+    Line segments [[x0, y0], [x1, y1]] of the rectangle around the detail 
+    and of the connectors, named as the returned line handles.
+    """
+    
     # add rectangle detail
     detail_limit_x0 = detail_limits[0][0]
     detail_limit_y0 = detail_limits[1][0]
     detail_limit_x1 = detail_limits[0][1]
     detail_limit_y1 = detail_limits[1][1]
-
-    rect_bottom = main_ax.plot([detail_limit_x0, detail_limit_x1], [detail_limit_y0,detail_limit_y0], 
-                             color=line_setting['color'], 
-                             alpha=line_setting['alpha'], 
-                             linestyle=line_setting['linestyle'], 
-                             linewidth=line_setting['linewidth'])
-    lines['rect_bottom'] = rect_bottom
-    rect_right  = main_ax.plot([detail_limit_x1, detail_limit_x1], [detail_limit_y0,detail_limit_y1], 
-                             color=line_setting['color'], 
-                             alpha=line_setting['alpha'], 
-                             linestyle=line_setting['linestyle'], 
-                             linewidth=line_setting['linewidth'])
-    lines['rect_right'] = rect_right
-    rect_top    = main_ax.plot([detail_limit_x1, detail_limit_x0], [detail_limit_y1,detail_limit_y1], 
-                             color=line_setting['color'], 
-                             alpha=line_setting['alpha'], 
-                             linestyle=line_setting['linestyle'], 
-                             linewidth=line_setting['linewidth'])
-    lines['rect_top'] = rect_top
-    rect_left   = main_ax.plot([detail_limit_x0, detail_limit_x0], [detail_limit_y1,detail_limit_y0], 
-                             color=line_setting['color'], 
-                             alpha=line_setting['alpha'], 
-                             linestyle=line_setting['linestyle'], 
-                             linewidth=line_setting['linewidth'])
-    lines['rect_left'] = rect_left
+    
+    segments = {}
+    segments['rect_bottom'] = [[detail_limit_x0, detail_limit_y0], [detail_limit_x1, detail_limit_y0]]
+    segments['rect_right']  = [[detail_limit_x1, detail_limit_y0], [detail_limit_x1, detail_limit_y1]]
+    segments['rect_top']    = [[detail_limit_x1, detail_limit_y1], [detail_limit_x0, detail_limit_y1]]
+    segments['rect_left']   = [[detail_limit_x0, detail_limit_y1], [detail_limit_x0, detail_limit_y0]]
     
     # add connectors
     detail_pos_x0 = detail_pos[0][0]
@@ -178,15 +631,50 @@ def pretty_detail_axis(main_ax, detail_ax, main_limits, detail_limits, detail_po
             connction_y1 = detail_pos_y1
         else:
             connction_y1 = detail_pos_y0
-        # plot the connector
-        connector   = main_ax.plot([connction_x0, connction_x1], [connction_y0, connction_y1], 
-                                 clip_on=False,
-                                 color=line_setting['color'], 
-                                 alpha=line_setting['alpha'], 
-                                 linestyle=line_setting['linestyle'], 
-                                 linewidth=line_setting['linewidth'])
-        lines['connector_'+str(idxConnector)] = connector
+        segments['connector_'+str(idxConnector)] = [[connction_x0, connction_y0], [connction_x1, connction_y1]]
+    
+    return segments
+
+def _plot_detail_segments(main_ax, segments, line_setting):
+    """
+    Plot every segment as a separate Line2D, return <dict(<str>:<line handles>)>.
+    """
+    
+    lines = {}
+    for name, segment in segments.items():
+        # only the connectors reach outside the main_ax
+        lines[name] = main_ax.plot([segment[0][0], segment[1][0]], [segment[0][1], segment[1][1]], 
+                                   clip_on=name.startswith('rect'),
+                                   color=line_setting['color'], 
+                                   alpha=line_setting['alpha'], 
+                                   linestyle=line_setting['linestyle'], 
+                                   linewidth=line_setting['linewidth'])
+        # part of the static layout (not data), see StaticLayer
+        lines[name][0]._journal_figure_static = True
+    return lines
+
+def _add_detail_collection(main_ax, segments, line_setting):
+    """
+    Add all the segments to the main_ax as a single LineCollection.
+    """
+    
+    # connectors reach outside main_ax, thus the collection is not clipped
+    collection = mpl.collections.LineCollection(segments, 
+                                                clip_on=False,
+                                                colors=line_setting['color'], 
+                                                alpha=line_setting['alpha'], 
+                                                linestyles=line_setting['linestyle'], 
+                                                linewidths=line_setting['linewidth'])
+    main_ax.add_collection(collection, autolim=False)
+    # part of the static layout (not data), see StaticLayer
+    collection._journal_figure_static = True
+    return collection
 
+def _set_detail_ax(detail_ax, detail_limits, line_setting):
+    """
+    Set limits and the spine of the detail axes.
+    """
+    
     # detail_axset limits of detail axes
     detail_ax.set_xlim(detail_limits[0])
     detail_ax.set_ylim(detail_limits[1])
@@ -198,12 +686,159 @@ def pretty_detail_axis(main_ax, detail_ax, main_limits, detail_limits, detail_po
         detail_ax.spines[spine].set_linewidth(line_setting['linewidth'])
         detail_ax.spines[spine].set_alpha(line_setting['alpha']) 
     
-    return lines
+#%% decimated plot
+@profiled
+def plot_decimated(axes, x, y, method='minmax', **kwargs):
+    """
+    Plot a (huge) series downsampled to the pixel resolution of the axes. 
+    The decimation is done right before the figure is drawn, using the final 
+    axes extent (after set_figure_size()), the dpi of the output and the final 
+    x limits of the axes. Thus a detail axes set by pretty_detail_axis() is 
+    decimated against its own "detail_limits" instead of the range 
+    of the main axes. The full arrays are kept by reference (not copied).
+
+    Parameters
+    ----------
+    axes : <axes handle>
+        Handle of the axes.
+    x : <numpy.ndarray>
+        X data sorted in ascending order. If None, the samples are 
+        numbered 0, 1, 2, ... (as in plt.plot(y)).
+    y : <numpy.ndarray>
+        Y data, same size as "x".
+    method : <string>, optional
+        Method of decimation, either \'minmax\' (first, minimum, maximum and 
+        last sample of every pixel column, visually identical for lines, 
+        NaN samples are skipped) or \'lttb\' (Largest-Triangle-Three-Buckets, 
+        2 samples per pixel column). Default value is \'minmax\'.
+    **kwargs
+        Properties of the line, as accepted by axes.plot(), e.g. color, 
+        linestyle, label.
+
+    Raises
+    ------
+    ValueError
+        Throws "ValueError" when a wrong value is provided.
+
+    Returns
+    -------
+    Handle of the line <handle Line2D>.
+
+    """
+    
+    _fuctionName = 'plot_decimated'
+    
+    if( method not in ['minmax', 'lttb'] ):
+        raise ValueError(_fuctionName+': the only allowed values for "method" are \'minmax\' and \'lttb\'.')
+    
+    y = np.asarray(y)
+    x = np.arange(y.size) if x is None else np.asarray(x)
+    if( x.shape != y.shape or x.ndim != 1 ):
+        raise ValueError(_fuctionName+': the "x" and "y" parameters need to be 1D arrays of the same size.')
+    
+    # unsorted data can not be decimated by pixel columns, plot all of them
+    if( x.size > 1 and np.any(x[1:] < x[:-1]) ):
+        return axes.plot(x, y, **kwargs)[0]
+    
+    # coarse decimation over the full range (keeps the data limits for autoscaling)
+    limits = (x[0], x[-1]) if x.size > 0 else (0.0, 1.0)
+    x_decimated, y_decimated = _decimate(x, y, limits, 1024, method)
+    line = axes.plot(x_decimated, y_decimated, **kwargs)[0]
+    
+    # the final decimation is done right before drawing
+    line._journal_figure_decimation = {'x':x, 'y':y, 'method':method, 'key':None}
+    if( not hasattr(axes, '_journal_figure_decimated') ):
+        axes._journal_figure_decimated = []
+    axes._journal_figure_decimated.append(line)
+    _add_pre_draw_callback(axes.get_figure(), _decimate_lines)
+    
+    return line
+
+def _decimate_lines(figure):
+    """
+    Decimate the lines plotted by plot_decimated() to the current 
+    pixel width and x limits of their axes (if any of these changed).
+    """
+    
+    for axes in figure.get_axes():
+        for line in getattr(axes, '_journal_figure_decimated', []):
+            decimation = line._journal_figure_decimation
+            key = (axes.get_xlim(), int(np.ceil(axes.bbox.width)), decimation['method'])
+            if( decimation['key'] == key ):
+                continue
+            decimation['key'] = key
+            line.set_data( *_decimate(decimation['x'], decimation['y'], key[0], max(key[1], 1), decimation['method']) )
+
+def _decimate(x, y, limits, buckets, method):
+    """
+    Decimate the sorted series (x, y) within the x "limits" into "buckets" 
+    columns of equal width. Returns the decimated (x, y).
+    """
+    
+    x_min, x_max = min(limits), max(limits)
+    
+    # crop to the visible range (one more sample on each side, so the line reaches the edge)
+    start = max(int(np.searchsorted(x, x_min, side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, x_max, side='right')) + 1, x.size)
+    x = x[start:stop]
+    y = y[start:stop]
+    if( x.size <= 4*buckets or x_max <= x_min ):
+        return x, y
+    
+    # bucket of every sample (the samples are sorted, so the buckets are contiguous)
+    bucket = np.clip( ((x - x_min) * (buckets / (x_max - x_min))).astype(np.intp), 0, buckets - 1 )
+    starts = np.flatnonzero( np.concatenate(([True], bucket[1:] != bucket[:-1])) )
+    
+    if( method == 'minmax' ):
+        # first, minimum, maximum and last sample of every bucket
+        counts = np.diff( np.append(starts, y.size) )
+        segment = np.repeat( np.arange(starts.size), counts )
+        indices = [starts, np.append(starts[1:] - 1, y.size - 1)]
+        for extreme in [np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)]:
+            hits = np.flatnonzero( y == np.repeat(extreme, counts) )
+            indices.append( hits[ np.unique(segment[hits], return_index=True)[1] ] )
+        indices = np.unique( np.concatenate(indices) )
+    elif( method == 'lttb' ):
+        indices = _lttb(x, y, 2*buckets)
+    
+    return x[indices], y[indices]
+
+def _lttb(x, y, number_of_samples):
+    """
+    Indices of the samples selected by Largest-Triangle-Three-Buckets.
+    """
     
+    # the first and the last samples are kept, the rest is split into buckets
+    edges = np.linspace(1, x.size - 1, number_of_samples - 1).astype(np.intp)
+    # averages of the buckets (vectorised)
+    counts = np.maximum(np.diff(edges), 1)
+    x_mean = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    y_mean = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    x_mean = np.append(x_mean, x[-1])
+    y_mean = np.append(y_mean, y[-1])
+    
+    indices = np.empty(number_of_samples, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = x.size - 1
+    selected = 0
+    for idx in range(number_of_samples - 2):
+        bucket = slice(edges[idx], max(edges[idx + 1], edges[idx] + 1))
+        # area of the triangles (selected sample, candidate, average of the next bucket)
+        area = np.abs( (x[selected] - x_mean[idx + 1]) * (y[bucket] - y[selected]) - 
+                       (x[selected] - x[bucket]) * (y_mean[idx + 1] - y[selected]) )
+        selected = edges[idx] + int(np.argmax(area))
+        indices[idx + 1] = selected
+    
+    return np.unique(indices)
+
 #%% figure_size
-def set_figure_size(figure, wdth, height, units='cm'):
+@profiled
+def set_figure_size(figure, wdth, height, units='cm', tight=False):
     """
-    Set the figure size in centimeters or inches.
+    Set the figure size in centimeters or inches. The size of the axes 
+    follows from figure.subplotpars, for a new figure the layout engine 
+    (layout_figure()) creates the figure at its final size with the axes 
+    rectangles solved in centimeters.
 
     Parameters
     ----------
@@ -216,10 +851,24 @@ def set_figure_size(figure, wdth, height, units='cm'):
     units : <str>, optional
         Units of the figure size, either \'cm\' for centimeters 
         or \'inch\' for inches. Default value is \'cm\'.
+    tight : <bool>, optional
+        If True, "wdth" and "height" are the size of the saved figure 
+        cropped to its tight bounding box (see tight_bbox()). The figure is 
+        resized until the analytic tight bounding box has the requested size,
+        the bounding box is returned and has to be passed to savefig:
+            bbox = set_figure_size(figure, 8.5, 6, units='cm', tight=True)
+            figure.savefig('figure.pdf', bbox_inches=bbox)
+        thus the figure is rendered only once. Default value is False.
+        
+    Raises
+    ------
+    ValueError
+        Throws "ValueError" when a wrong value is provided.
         
     Returns
     -------
-    None.
+    None, or the bounding box in inches <matplotlib.transforms.Bbox> 
+    if "tight=True".
 
     """
     
@@ -235,9 +884,207 @@ def set_figure_size(figure, wdth, height, units='cm'):
         figure.set_size_inches(figw, figh)
     else:
         raise ValueError('The "units" parameter accepts only \'cm\' and \'inch\' values.')
+    
+    if( not tight ):
+        return
+    
+    # the tight bounding box grows (piecewise) linearly with the figure size,
+    # the size is found by the secant method (every step is analytic, no draw)
+    target = np.array([wdth, height], dtype=float) / (2.54 if units == 'cm' else 1.0)
+    size = np.array(figure.get_size_inches(), dtype=float)
+    slope = np.ones(2)
+    previous = None
+    for _ in range(20):
+        figure.set_size_inches(size)
+        bbox = tight_bbox(figure)
+        error = target - bbox.size
+        if( np.all(np.abs(error) < 1e-4) ):
+            break
+        if( previous is not None ):
+            step = size - previous[0]
+            change = bbox.size - previous[1]
+            slope = np.where(np.abs(step) > 1e-9, change/np.where(np.abs(step) > 1e-9, step, 1.0), slope)
+            slope = np.where(slope > 1e-3, slope, 1.0)
+        previous = (size, bbox.size)
+        size = size + error/slope
+        if( np.any(size <= 0.0) ):
+            raise ValueError('The requested size is smaller than the labels, legends and paddings of the figure.')
+    
+    return bbox
+
+#%% analytic tight bounding box
+@profiled
+def tight_bbox(figure, pad_inches=None):
+    """
+    Tight bounding box of the figure computed analytically from the axes 
+    positions, the label strings with their rotations, alignments and 
+    paddings, and a cached table of font metrics (see text_metrics). 
+    Unlike savefig(..., bbox_inches=\'tight\'), the figure is not drawn. 
+    Considered are the axes, tick labels, axis labels, titles, texts, 
+    legends (except loc=\'best\', which stays within the axes) and the 
+    artists which are not clipped (e.g. the connectors of the detail axes).
+
+    Parameters
+    ----------
+    figure : <figure handle>
+        Handle of the figure.
+    pad_inches : <float>, optional
+        Padding around the bounding box in inches. Default value is None,
+        which takes rcParams[\'savefig.pad_inches\'].
+
+    Returns
+    -------
+    Bounding box in inches <matplotlib.transforms.Bbox>, 
+    to be passed to savefig(..., bbox_inches=bbox).
+
+    """
+    
+    # the ticks recorded by set_major_ticks(..., deferred=True)
+    apply_deferred_ticks(figure)
+    
+    bboxes = []
+    for axes in figure.get_axes():
+        if( axes.get_visible() ):
+            bboxes.extend( _axes_bboxes(axes) )
+    bboxes.extend( [text_bbox(text) for text in figure.texts if text.get_visible()] )
+    bboxes.extend( [_legend_bbox(legend) for legend in figure.legends] )
+    
+    bboxes = [bbox for bbox in bboxes if bbox is not None and np.all(np.isfinite(bbox.get_points()))]
+    bbox = Bbox.union(bboxes).transformed(figure.dpi_scale_trans.inverted())
+    
+    if( pad_inches is None ):
+        pad_inches = mpl.rcParams['savefig.pad_inches']
+    return bbox.padded(pad_inches)
+
+def _axes_bboxes(axes):
+    """
+    Bounding boxes (display coordinates) of the axes and its decorations.
+    """
+    
+    dpi = axes.get_figure().dpi
+    axes.apply_aspect()
+    bboxes = [axes.bbox.frozen()]
+    # tick labels and label of the x axis, which the titles are moved above
+    x_decorations = []
+    
+    if( axes.axison ):
+        for axis in [axes.xaxis, axes.yaxis]:
+            # tick labels on either side of the axis
+            sides = ([], [])
+            for tick in axis._update_ticks():
+                for side, label_object in zip(sides, [tick.label1, tick.label2]):
+                    if( label_object.get_visible() ):
+                        bbox = text_bbox(label_object)
+                        if( bbox is not None ):
+                            side.append(bbox)
+            bboxes.extend(sides[0] + sides[1])
+            if( axis is axes.xaxis ):
+                x_decorations.extend(sides[0] + sides[1])
+            
+            # axis label, placed beyond the tick labels (see matplotlib.axis)
+            label = axis.label
+            if( not label.get_visible() or not label.get_text() ):
+                continue
+            second_side = axis.get_label_position() in ['top', 'right']
+            union = Bbox.union(sides[second_side] + [axes.bbox])
+            pad = axis.labelpad * dpi / 72
+            anchor = label.get_transform().transform(label.get_unitless_position())
+            if( axis is axes.xaxis ):
+                anchor[1] = union.y1 + pad if second_side else union.y0 - pad
+            else:
+                anchor[0] = union.x1 + pad if second_side else union.x0 - pad
+            bboxes.append( text_bbox(label, position=anchor) )
+            if( axis is axes.xaxis ):
+                x_decorations.append(bboxes[-1])
+    
+    # titles are moved above the x axis only if its tick labels or label 
+    # are on top (see matplotlib.axes.Axes._update_title_position)
+    top = axes.bbox.y1
+    if( axes.xaxis.get_ticks_position() in ['top', 'unknown'] or axes.xaxis.get_label_position() == 'top' ):
+        top = max([top] + [bbox.y1 for bbox in x_decorations if bbox is not None])
+    for title in [axes.title, axes._left_title, axes._right_title]:
+        if( title.get_visible() and title.get_text() ):
+            anchor = title.get_transform().transform(title.get_unitless_position())
+            if( mpl.rcParams['axes.titley'] is None ):
+                anchor[1] += max(top - axes.bbox.y1, 0.0)
+            bboxes.append( text_bbox(title, position=anchor) )
+    
+    bboxes.extend( [text_bbox(text) for text in axes.texts if text.get_visible()] )
+    bboxes.append( _legend_bbox(axes.get_legend()) )
+    # legend pages kept as artists, see pretty_legend()
+    bboxes.extend( [_legend_bbox(artist) for artist in axes.artists if isinstance(artist, mpl.legend.Legend)] )
+    
+    # artists reaching outside the axes
+    for line in axes.lines:
+        if( line.get_visible() and not line.get_clip_on() and len(line.get_xydata()) ):
+            points = line.get_transform().transform(line.get_xydata())
+            points = points[np.all(np.isfinite(points), axis=1)]
+            if( points.size ):
+                bboxes.append( Bbox([points.min(axis=0), points.max(axis=0)]) )
+    for artist in list(axes.collections) + list(axes.patches):
+        if( artist.get_visible() and not artist.get_clip_on() ):
+            bboxes.append( artist.get_window_extent() )
+    
+    return bboxes
+
+def _legend_bbox(legend, loc=None):
+    """
+    Bounding box (display coordinates) of a legend, computed with the same 
+    layout as matplotlib.legend (handles, texts, spacings and paddings). 
+    The location code "loc" overrides the location of the legend. 
+    Returns None for no legend and for the legend placed by loc=\'best\'.
+    """
+    
+    loc = legend._loc if( loc is None and legend is not None ) else loc
+    if( legend is None or not legend.get_visible() or loc == 0 ):
+        return None
+    
+    scale = _root_figure(legend).dpi / 72
+    fontsize = legend.prop.get_size_in_points()
+    
+    # extents of the entries in points: handle, separator and text
+    handle_descent = 0.35 * fontsize * (legend.handleheight - 0.7)
+    handle_ascent = fontsize * legend.handleheight - 2 * handle_descent
+    entries = []
+    for text in legend.texts:
+        bbox = text_bbox(text, position=(0.0, 0.0), dpi=72)
+        if( bbox is None ):
+            bbox = Bbox([[0.0, 0.0], [0.0, 0.0]])
+        entries.append( ((legend.handlelength + legend.handletextpad) * fontsize + bbox.width,
+                         max(bbox.y1, handle_ascent) + max(-bbox.y0, handle_descent)) )
+    
+    # entries fill the columns top to bottom (see matplotlib.legend)
+    width = 0.0
+    height = 0.0
+    columns = [column for column in np.array_split(np.arange(len(entries)), legend._ncols) if column.size]
+    for column in columns:
+        width += max([entries[idx][0] for idx in column])
+        height = max(height, sum([entries[idx][1] for idx in column]) + (column.size - 1) * legend.labelspacing * fontsize)
+    width += (len(columns) - 1) * legend.columnspacing * fontsize
+    
+    # title on top of the entries
+    title = legend.get_title()
+    if( title.get_visible() and title.get_text() ):
+        bbox = text_bbox(title, position=(0.0, 0.0), dpi=72)
+        width = max(width, bbox.width)
+        height += bbox.height + legend.labelspacing * fontsize
+    
+    width = (width + 2 * legend.borderpad * fontsize) * scale
+    height = (height + 2 * legend.borderpad * fontsize) * scale
+    
+    # placement relative to "bbox_to_anchor"
+    anchor = legend.get_bbox_to_anchor()
+    if( isinstance(loc, tuple) ):
+        x0 = anchor.x0 + loc[0] * anchor.width
+        y0 = anchor.y0 + loc[1] * anchor.height
+        return Bbox.from_bounds(x0, y0, width, height)
+    container = anchor.padded(-legend.borderaxespad * fontsize * scale)
+    corner = [None, 'NE', 'NW', 'SW', 'SE', 'E', 'W', 'E', 'S', 'N', 'C'][loc]
+    return Bbox.from_bounds(0.0, 0.0, width, height).anchored(corner, container=container)
 
 #%% legend
-def pretty_legend(axes, label_source=[], position='best', label_order='default', title=''):
+@profiled
+def pretty_legend(axes, label_source=[], position='best', label_order='default', title='', pages=1):
     """
     Control the legend content and position.
 
@@ -251,23 +1098,38 @@ def pretty_legend(axes, label_source=[], position='best', label_order='default',
         which means the entries from "axes" are included.
     position : <string> / <list>/<tuple>/<numpy.ndarray>, optional
         Location of the legend within the axes. \n
-        If <string> then following values are available: "best", "upper right", 
-        "upper left", "lower left", "lower right", "right", "center left", 
-        "center right", "lower center", "upper center", "center".\n
+        If <string> then following values are available: "best", "best-grid", 
+        "upper right", "upper left", "lower left", "lower right", "right", 
+        "center left", "center right", "lower center", "upper center", "center".\n
         If <list>/<tuple>/<numpy.ndarray> then relative position of 
         the legends origin in form of [x0, y0], where 0.0<x0,y0<1.0, 
-        but values <0.0 and >1.0 are allowed as well. The default is 'best'.
+        but values <0.0 and >1.0 are allowed as well. The default is 'best'.\n
+        The "best" location is chosen by matplotlib when the figure is drawn. 
+        The "best-grid" location is chosen by journal_figure from a coarse 
+        occupancy grid of the axes: the legend takes the least covered of 
+        the standard locations, at a cost independent of the number of data 
+        points (see LEGEND_GRID_RESOLUTION and LEGEND_GRID_SAMPLES), which 
+        suits lines with millions of points. It is placed on the call and 
+        placed again right before every draw, thus it follows later changes 
+        of the limits, the data or the figure size.\n
+        If "pages" > 1 then a list of positions (one per page) can be given, 
+        e.g. ['upper left', 'upper right'] or [[0.1, 0.9], [0.5, 0.9]], 
+        otherwise all the pages share the same position.
     label_order : <string> / <list<list>>/<2D numpy.ndarray>, optional
         Order of the labels within the legend. \n
         If <string> then these values are available: "default" and "reverse".
         If <list<list>>/<2D numpy.ndarray> then the labels are ordered as:
             label_order = [[ 1 , 2 , 3], \n
                            ['e', 0 , 4 ]] \n
-        where the <int> are indexed positions of the labels and \'e\' is an 
+        where the <int> are indexed positions of the labels, the <string> 
+        are the labels themselves (e.g. \'Signal\') and \'e\' is an 
         empty entry (e.g. when a gap is among labels is required).
         Default value is \'default\'.
     title : <string>, optional
-        The title of the legend.
+        The title of the legend (of every page).
+    pages : <int>, optional
+        Number of legend boxes the rows of "label_order" are split into, 
+        for legends too long to fit in a single box. Default value is 1.
     
     Raises
     ------
@@ -277,7 +1139,8 @@ def pretty_legend(axes, label_source=[], position='best', label_order='default',
 
     Returns
     -------
-    Handle of the legend <handle legend>.
+    Handle of the legend <handle legend>, or <list(<handle legend>)> 
+    of the pages if "pages" > 1.
 
     """
     
@@ -292,47 +1155,283 @@ def pretty_legend(axes, label_source=[], position='best', label_order='default',
             handles.extend(_handles)
             labels.extend(_labels)
     
-    if(label_order == 'reverse'):
-        handles_ordered = handles.copy()
-        labels_ordered  = labels.copy()
-        handles_ordered.reverse()
-        labels_ordered.reverse()
-    elif(label_order == 'default'):
-        handles_ordered = handles.copy()
-        labels_ordered  = labels.copy()
-    elif(type(label_order) == np.ndarray or type(label_order) == list):
-        # assure the array is np.array
-        label_order_np = np.array(label_order, dtype=object)
-        # allocate empty lists
-        handles_ordered = []
-        labels_ordered = []
-        # order the elements according to label_order_np
-        for x in np.transpose(label_order_np):
-            for y in x:
-                if(isinstance(y, int)):
-                    handles_ordered.append(handles[y])
-                    labels_ordered.append(labels[y])
-                else:
-                    empty_entry = mpl.lines.Line2D([1, 0], [0, 1], linewidth=None, linestyle=None, color=None, alpha=0.0, marker=None, markersize=None, markeredgewidth=None, markeredgecolor=None, markerfacecolor=None, markerfacecoloralt='none')
-                    handles_ordered.append(empty_entry)
-                    labels_ordered.append('')
+    # indices of the entries in a grid (rows x columns), the empty entry is the last one
+    empty = len(handles)
+    if( isinstance(label_order, str) and label_order == 'default' ):
+        grid = np.arange(empty).reshape(-1, 1)
+    elif( isinstance(label_order, str) and label_order == 'reverse' ):
+        grid = np.arange(empty)[::-1].reshape(-1, 1)
+    elif( isinstance(label_order, (list, np.ndarray)) ):
+        grid = _legend_grid(label_order, labels)
     else:
         raise ValueError('The "label_order" parameter is incorrect. Check help(pretty_legend)')
     
-    # show the legend
-    if(isinstance(position, str)):
-        legend = axes.legend(handles_ordered, labels_ordered, ncol=label_order_np.shape[1], loc=position, title=title)
-    elif(isinstance(position, list) or isinstance(position, np.ndarray) or isinstance(position, tuple)):
-        # assure the current figure is the figure containing axis
-        plt.figure( axes.get_figure().number )
-        # add legend
-        legend = plt.legend(handles_ordered, labels_ordered, ncol=label_order_np.shape[1], loc='center', bbox_to_anchor=(position[0], position[1]), title=title, bbox_transform=plt.gcf().transFigure)
+    if( not isinstance(pages, (int, np.integer)) or pages < 1 or pages > max(grid.shape[0], 1) ):
+        raise ValueError('The "pages" parameter has to be an <int> between 1 and the number of rows of the legend ({0:d}).'.format(grid.shape[0]))
+    positions = _legend_positions(position, pages)
+    
+    # a single spacer handle is shared by all the empty entries (no artist is drawn for it)
+    all_handles = np.empty(empty + 1, dtype=object)
+    all_handles[:empty] = handles
+    all_handles[empty] = _LEGEND_SPACER
+    all_labels = np.array(labels + [''], dtype=object)
+    handler_map = {_LegendSpacer: _HandlerLegendSpacer()}
+    
+    # the legend is filled column by column, every page holds a block of rows
+    legends = []
+    grid_legends = []
+    for page, page_position in zip(np.array_split(grid, pages, axis=0), positions):
+        indices = page.T.ravel()
+        if( isinstance(page_position, str) and page_position == 'best-grid' ):
+            # placed by the occupancy grid (below)
+            legend = axes.legend(list(all_handles[indices]), list(all_labels[indices]), ncol=grid.shape[1], 
+                                 loc='upper right', title=title, handler_map=handler_map)
+            grid_legends.append(legend)
+        elif(isinstance(page_position, str)):
+            legend = axes.legend(list(all_handles[indices]), list(all_labels[indices]), ncol=grid.shape[1], 
+                                 loc=page_position, title=title, handler_map=handler_map)
+        else:
+            # add legend, positioned relative to the figure containing axis
+            legend = axes.legend(list(all_handles[indices]), list(all_labels[indices]), ncol=grid.shape[1], 
+                                 loc='center', bbox_to_anchor=(page_position[0], page_position[1]), title=title, 
+                                 bbox_transform=axes.get_figure().transFigure, handler_map=handler_map)
+        legends.append(legend)
+    
+    # an axes holds a single legend, the other pages are kept as artists
+    for legend in legends[:-1]:
+        axes.add_artist(legend)
+    
+    # placed now (for tight_bbox()) and again right before every draw
+    axes._journal_figure_grid_legends = grid_legends
+    if( grid_legends ):
+        _place_grid_legends(axes.get_figure())
+        _add_pre_draw_callback(axes.get_figure(), _place_grid_legends)
+    
+    return legends[0] if pages == 1 else legends
+
+def _legend_grid(label_order, labels):
+    """
+    Indices of the legend entries <2D numpy.ndarray> given by "label_order" 
+    (see pretty_legend()), the empty entry \'e\' is len(labels).
+    """
+    
+    order = np.asarray(label_order)
+    if( order.ndim != 2 ):
+        raise ValueError('The "label_order" parameter has to be 2D <list<list>>/<numpy.ndarray>. Check help(pretty_legend)')
+    empty = len(labels)
+    
+    if( order.dtype.kind in 'iu' ):
+        if( np.any((order < -empty) | (order >= empty)) ):
+            raise ValueError('The "label_order" parameter has index(es) out of range of the {0:d} labels.'.format(empty))
+        # negative indices count from the end, as with lists
+        return np.where(order < 0, order + empty, order).astype(np.intp)
+    
+    # the first occurrence of a label counts
+    lookup = {label: idx for idx, label in reversed(list(enumerate(labels)))}
+    order = np.asarray(label_order, dtype=object)
+    return np.fromiter((_legend_index(value, lookup, empty) for value in order.ravel()), 
+                       dtype=np.intp, count=order.size).reshape(order.shape)
+
+def _legend_index(value, lookup, empty):
+    """
+    Index of a single entry of "label_order" (<int>, label or \'e\').
+    """
+    
+    if( isinstance(value, (int, np.integer)) ):
+        if( not -empty <= value < empty ):
+            raise ValueError('The "label_order" parameter has index {0:d} out of range of the {1:d} labels.'.format(value, empty))
+        return value % empty
+    elif( isinstance(value, str) and value == 'e' ):
+        return empty
+    elif( isinstance(value, str) and value in lookup ):
+        return lookup[value]
+    raise ValueError('The "label_order" parameter refers to an unknown label: {0!r}'.format(value))
+
+def _legend_positions(position, pages):
+    """
+    Position of every legend page, see pretty_legend().
+    """
+    
+    per_page = isinstance(position, (list, tuple, np.ndarray)) and len(position) > 0 and \
+               (isinstance(position[0], str) or np.ndim(position[0]) == 1)
+    if( per_page ):
+        if( len(position) != pages ):
+            raise ValueError('The "position" parameter has {0:d} positions for {1:d} pages.'.format(len(position), pages))
+        positions = list(position)
     else:
-        raise ValueError('The "position" parameter is incorrect. Only <string> with values: "best", "upper right", "upper left", "lower left", "lower right", "right", "center left", "center right", "lower center", "upper center", "center" \n or relative position <list>/<tuple>/<numpy.ndarray> with [x0, y0]')
+        positions = [position]*pages
+    
+    for page_position in positions:
+        if( not (isinstance(page_position, str) or (isinstance(page_position, (list, tuple, np.ndarray)) and len(page_position) == 2)) ):
+            raise ValueError('The "position" parameter is incorrect. Only <string> with values: "best", "best-grid", "upper right", "upper left", "lower left", "lower right", "right", "center left", "center right", "lower center", "upper center", "center" \n or relative position <list>/<tuple>/<numpy.ndarray> with [x0, y0]')
+    return positions
 
-    return legend
+class _LegendSpacer():
+    """
+    Handle of an empty legend entry.
+    """
+
+class _HandlerLegendSpacer(mpl.legend_handler.HandlerBase):
+    """
+    Legend handler of the empty entries, the space of the handle is kept 
+    but nothing is drawn.
+    """
+    
+    def legend_artist(self, legend, orig_handle, fontsize, handlebox):
+        return None
+
+# shared by all the legends
+_LEGEND_SPACER = _LegendSpacer()
+
+#%% legend placement
+# number of cells of the occupancy grid along each side of the axes
+LEGEND_GRID_RESOLUTION = 48
+# maximum number of points sampled from a single line or collection
+LEGEND_GRID_SAMPLES = 4096
+
+# standard locations in the order of preference (as matplotlib's loc=\'best\')
+_LEGEND_LOCATIONS = ['upper right', 'upper left', 'lower left', 'lower right', 'right', 
+                     'center left', 'center right', 'lower center', 'upper center', 'center']
+
+def _occupancy_grid(axes):
+    """
+    Occupancy grid of the axes <2D numpy.ndarray> (rows from the bottom), 
+    every cell holds the number of artists covering it. The lines and 
+    collections are sampled by at most LEGEND_GRID_SAMPLES points, 
+    patches and texts by their bounding boxes.
+    """
+    
+    resolution = LEGEND_GRID_RESOLUTION
+    grid = np.zeros((resolution, resolution))
+    
+    # polylines: the data lines (already decimated by plot_decimated()) and line collections
+    polylines = [line.get_transform().transform(_sample_points(line.get_xydata(), LEGEND_GRID_SAMPLES)) 
+                 for line in axes.lines if line.get_visible()]
+    for collection in axes.collections:
+        if( not collection.get_visible() ):
+            continue
+        if( isinstance(collection, mpl.collections.LineCollection) ):
+            segments = collection.get_segments()
+            step = int(np.ceil(len(segments) / 256)) if len(segments) else 1
+            samples = max(LEGEND_GRID_SAMPLES // 256, 2)
+            polylines.extend( [collection.get_transform().transform(_sample_points(segment, samples)) 
+                               for segment in segments[::step]] )
+        else:
+            # markers (e.g. scatter) are taken as the points at their offsets
+            offsets = _sample_points(collection.get_offsets(), LEGEND_GRID_SAMPLES)
+            if( len(offsets) ):
+                grid += _rasterize_points(axes.bbox, collection.get_offset_transform().transform(offsets), resolution)
+    for polyline in polylines:
+        grid += _rasterize_points(axes.bbox, _densify_polyline(polyline, axes.bbox, resolution), resolution)
+    
+    # bounding boxes of the patches and texts
+    bboxes = [patch.get_window_extent() for patch in axes.patches if patch.get_visible()]
+    bboxes.extend( [text_bbox(text) for text in axes.texts if text.get_visible()] )
+    for bbox in bboxes:
+        if( bbox is not None ):
+            _add_bbox(grid, axes.bbox, bbox, 1.0)
+    
+    return grid
+
+def _sample_points(points, samples):
+    """
+    At most "samples" points <numpy.ndarray> taken evenly from "points".
+    """
+    
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if( len(points) > samples ):
+        points = points[::int(np.ceil(len(points) / samples))]
+    return points
+
+def _densify_polyline(polyline, container, resolution):
+    """
+    Points along the segments of a polyline in display coordinates, 
+    at least one per cell of the grid crossed by every segment.
+    """
+    
+    if( len(polyline) < 2 ):
+        return polyline
+    cell = np.array([container.width, container.height]) / resolution
+    start = polyline[:-1]
+    delta = np.diff(polyline, axis=0)
+    # segments with non-finite ends are dropped (they are not drawn)
+    steps = np.max(np.abs(delta) / cell, axis=1)
+    steps = np.where(np.isfinite(steps), np.minimum(np.ceil(steps), 2*resolution), 0).astype(np.intp) + 1
+    segment = np.repeat(np.arange(len(delta)), steps)
+    fraction = (np.arange(segment.size) - np.repeat(np.cumsum(steps) - steps, steps)) / np.repeat(steps, steps)
+    return np.concatenate([start[segment] + fraction[:, None] * delta[segment], polyline[-1:]])
+
+def _rasterize_points(container, points, resolution):
+    """
+    Cells of the grid over "container" hit by any of the "points" (0 or 1).
+    """
+    
+    cell = np.array([container.width, container.height]) / resolution
+    indices = np.floor((points - [container.x0, container.y0]) / cell)
+    indices = indices[np.all(np.isfinite(indices), axis=1)]
+    indices = indices[np.all((indices >= 0) & (indices < resolution), axis=1)].astype(np.intp)
+    hits = np.bincount(indices[:, 1] * resolution + indices[:, 0], minlength=resolution**2)
+    return (hits > 0).reshape(resolution, resolution)
+
+def _cells(grid, container, bbox, centers=False):
+    """
+    Slices of the cells of the grid over "container" overlapped by "bbox", 
+    or only of the cells with their centers within "bbox".
+    """
+    
+    rows, columns = grid.shape
+    start, stop = (np.round, np.round) if centers else (np.floor, np.ceil)
+    column_0, column_1 = np.clip([start((bbox.x0 - container.x0) / container.width * columns),
+                                  stop((bbox.x1 - container.x0) / container.width * columns)], 0, columns).astype(int)
+    row_0, row_1 = np.clip([start((bbox.y0 - container.y0) / container.height * rows),
+                            stop((bbox.y1 - container.y0) / container.height * rows)], 0, rows).astype(int)
+    return slice(row_0, row_1), slice(column_0, column_1)
+
+def _add_bbox(grid, container, bbox, weight):
+    """
+    Add "weight" to the cells of the grid over "container" overlapped by "bbox".
+    """
+    
+    if( np.all(np.isfinite(bbox.get_points())) ):
+        grid[_cells(grid, container, bbox)] += weight
+
+def _place_grid_legends(figure):
+    """
+    Place the legends of position=\'best-grid\' of all the axes of the 
+    figure, the later pages of a legend avoid the previous ones.
+    """
+    
+    for axes in figure.get_axes():
+        legends = getattr(axes, '_journal_figure_grid_legends', [])
+        if( not legends ):
+            continue
+        occupancy = _occupancy_grid(axes)
+        for legend in legends:
+            _place_legend(legend, axes, occupancy)
+
+def _place_legend(legend, axes, occupancy):
+    """
+    Move the legend to the standard location covering the least of the 
+    occupancy grid, then mark it in the grid (for the next legend pages).
+    """
+    
+    # summed-area table, the cost of a location does not depend on its size
+    table = np.zeros((occupancy.shape[0] + 1, occupancy.shape[1] + 1))
+    table[1:, 1:] = occupancy.cumsum(axis=0).cumsum(axis=1)
+    
+    costs = []
+    for location in _LEGEND_LOCATIONS:
+        bbox = _legend_bbox(legend, loc=mpl.legend.Legend.codes[location])
+        rows, columns = _cells(occupancy, axes.bbox, bbox, centers=True)
+        costs.append( table[rows.stop, columns.stop] - table[rows.start, columns.stop] 
+                      - table[rows.stop, columns.start] + table[rows.start, columns.start] )
+    legend.set_loc(_LEGEND_LOCATIONS[int(np.argmin(costs))])
+    
+    # the other legends must not overlap this one
+    _add_bbox(occupancy, axes.bbox, _legend_bbox(legend), occupancy.size)
 
 #%% colorbar_axes
+@profiled
 def add_colorbar(axes_colorbar, colormap, min_value, max_value, labels=[],
                  style_labels={'which_axis':'NE', 'label_format':'{0:.3f}', 'label_align':'', 'rotation_angle':0.0, 'rotation_origin':'anchor', 'padding_x':0.0, 'padding_y':0.0},
                  style_ticks={'number_of_ticks':11, 'ticks_start': 0.0, 'ticks_end': 1.0}, 
@@ -420,16 +1519,16 @@ def add_colorbar(axes_colorbar, colormap, min_value, max_value, labels=[],
     
     # create normalized scallar mappable (instead of getting this information from axes, this provides more control)
     norm = mpl.colors.Normalize(vmin=min_value,vmax=max_value)
-    sm = plt.cm.ScalarMappable(cmap=colormap, norm=norm)
+    sm = mpl.cm.ScalarMappable(cmap=colormap, norm=norm)
     sm.set_array([])
     
-    # create colorbar
-    clb = plt.colorbar(sm,
-                        ticks = [] if style_ticks['number_of_ticks'] <= 0 else np.linspace( style_ticks['ticks_start'], 
-                                                                                              style_ticks['ticks_end'], 
-                                                                                              style_ticks['number_of_ticks']),
-                        boundaries = None if np.array(style_colorbar['boundaries']).size == 0 else style_colorbar['boundaries'], 
-                        ax=axes_colorbar, fraction=1.0, pad=0.0)
+    # create colorbar (within the figure containing the dedicated axes)
+    clb = axes_colorbar.get_figure().colorbar(sm,
+                                              ticks = [] if style_ticks['number_of_ticks'] <= 0 else np.linspace( style_ticks['ticks_start'], 
+                                                                                                                    style_ticks['ticks_end'], 
+                                                                                                                    style_ticks['number_of_ticks']),
+                                              boundaries = None if np.array(style_colorbar['boundaries']).size == 0 else style_colorbar['boundaries'], 
+                                              ax=axes_colorbar, fraction=1.0, pad=0.0)
     
     # set visibility
     if( style_colorbar['orientation'] == 'horizontal' ):
@@ -452,79 +1551,343 @@ def add_colorbar(axes_colorbar, colormap, min_value, max_value, labels=[],
     
     # colorbar orientation
     if( style_colorbar['orientation'] == 'vertical' ):
-        clb.ax.set_yticklabels(labels)
+        axis = clb.ax.yaxis
     elif( style_colorbar['orientation'] == 'horizontal' ):
-        clb.ax.set_xticklabels(labels)
+        axis = clb.ax.xaxis
     else:
         raise ValueError('The only allowed values for "style_colorbar[\'orientation\']" are \'horizontal\' and \'vertical\'.')
 
-    # force to draw
-    axes.get_figure().canvas.draw()
+    # labels are formatted directly from the tick values (no draw required)
+    clb.formatter = LabelFormatter(style_labels['label_format'], labels)
     
     # loop through labels
-    if( style_colorbar['orientation'] == 'horizontal' ):
-        label_list = clb.ax.get_xticklabels(minor=False)
-    elif( style_colorbar['orientation'] == 'vertical'):
-        label_list = clb.ax.get_yticklabels(minor=False)
+    for label_object in axis.get_majorticklabels():
+        _style_tick_label(label_object, style_labels)
+
+    return clb
+
+#%% tick helpers (no draw)
+def _set_major_ticks_visibility(axes, along_axis, labels, style_labels, style_ticks):
+    """
+    Set visibility of the major ticks and their labels.
+    See set_major_ticks() for the description of the parameters.
+    """
+    
+    if(along_axis=='x'):
+        axes.tick_params(labeltop   = True if ('N' in style_labels['which_axis'] and labels != None) else False,
+                         labelbottom= True if ('S' in style_labels['which_axis'] and labels != None) else False,
+                         top        = True if ('N' in style_ticks['which_axis']) else False,
+                         bottom     = True if ('S' in style_ticks['which_axis']) else False,
+                         which='major')
+    elif(along_axis=='y'):
+        axes.tick_params( labelleft  = True if ('W' in style_labels['which_axis'] and labels != None) else False,
+                          labelright = True if ('E' in style_labels['which_axis'] and labels != None) else False,
+                          left       = True if ('W' in style_ticks['which_axis']) else False,
+                          right      = True if ('E' in style_ticks['which_axis']) else False,
+                          which='major')
+
+def _style_tick_label(label_object, style_labels):
+    """
+    Apply alignment, rotation and padding from "style_labels" 
+    to a single tick label.
+    """
+    
+    # horizontal alignment
+    if('W' in style_labels['label_align'] or 'E' in style_labels['label_align']):
+        label_object.set_horizontalalignment( 'left' if 'W' in style_labels['label_align'] else 'right' )
+    else:
+        label_object.set_horizontalalignment( 'center' )
+    # vertical alignment
+    if('N' in style_labels['label_align'] or 'S' in style_labels['label_align']):
+        label_object.set_verticalalignment( 'top' if 'N' in style_labels['label_align'] else 'bottom' )
+    else:
+        label_object.set_verticalalignment( 'center' )
         
-    for label_idx, label_object in enumerate(label_list):
-        # horizontal alignment
-        if('W' in style_labels['label_align'] or 'E' in style_labels['label_align']):
-            label_object.set_horizontalalignment( 'left' if 'W' in style_labels['label_align'] else 'right' )
+    # set rotation origin
+    label_object.set_rotation_mode(style_labels['rotation_origin'])
+    
+    # rotate
+    label_object.set_rotation(style_labels['rotation_angle'])
+    
+    # adjust position of labels
+    label_object.set_position( (label_object.get_position()[0] + style_labels['padding_x'], label_object.get_position()[1] + style_labels['padding_y']) )
+
+#%% tick label formatter
+class LabelFormatter(mpl.ticker.Formatter):
+    """
+    Tick formatter building the labels directly from the tick values, 
+    so the labels are correct without drawing the figure first.
+    
+    Parameters
+    ----------
+    label_format : <string>, optional
+        Format of the labels. Default value is \'{0:.3f}\', for more 
+        information visit 
+        https://docs.python.org/3/library/stdtypes.html#str.format .
+    labels : <list(<str>)>, optional
+        List of labels printed along the axis, formatted by "label_format". 
+        Default value is [] (empty list), which formats the tick values. 
+        Value \'None\' suppreses labels.
+    """
+    
+    def __init__(self, label_format='{0:.3f}', labels=[]):
+        self.label_format = label_format
+        self.labels = labels
+        self._printf_format = _printf_format(label_format)
+        # the last formatted ticks, the formatter is shared by the axes with the same ticks
+        self._formatted = (None, [])
+    
+    def __call__(self, x, pos=None):
+        if( self.labels == None ):
+            return ''
+        elif( not self.labels ):
+            return self.format_ticks([x])[0]
+        elif( pos is not None and pos < len(self.labels) ):
+            return self.label_format.format( self.labels[pos] )
         else:
-            label_object.set_horizontalalignment( 'center' )
-        # vertical alignment
-        if('N' in style_labels['label_align'] or 'S' in style_labels['label_align']):
-            label_object.set_verticalalignment( 'top' if 'N' in style_labels['label_align'] else 'bottom' )
+            return ''
+    
+    def format_ticks(self, values):
+        values = np.asarray(values, dtype=float)
+        # the minus sign follows rcParams['axes.unicode_minus'] at the time of formatting
+        key = (values.tobytes(), mpl.rcParams['axes.unicode_minus'])
+        if( self._formatted[0] != key ):
+            self._formatted = (key, self._format_ticks(values))
+        return list(self._formatted[1])
+    
+    def _format_ticks(self, values):
+        if( self.labels == None ):
+            return ['']*values.size
+        elif( self.labels ):
+            return [self(value, pos) for pos, value in enumerate(values)]
+        
+        # snap round-off errors (e.g. 5.55e-17 instead of 0.0) to zero, 
+        # otherwise the labels read '-0.0'
+        if( values.size > 0 ):
+            values = np.where(np.abs(values) <= 1e-12*np.max(np.abs(values)), 0.0, values)
+        
+        if( self._printf_format is not None ):
+            # vectorised formatting
+            labels = np.char.mod(self._printf_format, values).tolist()
+        elif( any( x in self.label_format for x in ['f', 'F', 'e', 'E', 'g', 'G'] ) ):
+            labels = [self.label_format.format( float(value) ) for value in values]
         else:
-            label_object.set_verticalalignment( 'center' )
+            try:
+                labels = [self.label_format.format( value ) for value in values]
+            except ValueError:
+                # integer formats, e.g. '{0:d}'
+                labels = [self.label_format.format( int(round(value)) ) for value in values]
+        
+        # typographic minus, as the matplotlib formatters
+        return [self.fix_minus(label) for label in labels]
+
+def _printf_format(label_format):
+    """
+    Translate a simple float format, e.g. \'{0:.3f}\' or \'{:+.1e} s\', 
+    into the equivalent printf-style format used by np.char.mod. 
+    Returns None if there is no such translation.
+    """
+    
+    try:
+        fields = list(string.Formatter().parse(label_format))
+    except ValueError:
+        return None
+    
+    printf_format = ''
+    number_of_fields = 0
+    for literal, field_name, format_spec, conversion in fields:
+        printf_format += literal.replace('%', '%%')
+        if( field_name is None ):
+            continue
+        number_of_fields += 1
+        if( field_name not in ['', '0'] or conversion is not None or 
+            not re.fullmatch(r'[+\- ]?0?\d*(\.\d+)?[eEfFgG]', format_spec) ):
+            return None
+        printf_format += '%'+format_spec
+    
+    return printf_format if number_of_fields == 1 else None
+
+def _axes_list(axes):
+    """
+    List of axes handles from a single axes or a sequence of axes 
+    (e.g. the 2D array returned by plt.subplots()).
+    """
+    
+    if( isinstance(axes, mpl.axes.Axes) ):
+        return [axes]
+    return list(np.ravel(np.asarray(axes, dtype=object)))
+
+def _group_by_limits(axes_list, along_axis):
+    """
+    Axes grouped by their limits along the axis, <dict> limits: <list(<axes handle>)>.
+    """
+    
+    groups = {}
+    for axes in axes_list:
+        limits = axes.get_xlim() if along_axis == 'x' else axes.get_ylim()
+        groups.setdefault(tuple(limits), []).append(axes)
+    return groups
+
+def _apply_major_ticks(axes_list, periodicity, along_axis, labels, style_labels, style_ticks):
+    """
+    Set visibility, periodicity and labels of the major ticks of all 
+    the axes without drawing. See set_major_ticks() for the description 
+    of the parameters.
+    """
+    
+    # set visibility
+    for axes in axes_list:
+        _set_major_ticks_visibility(axes, along_axis, labels, style_labels, style_ticks)
+    
+    # the ticks and their labels are computed once per group of axes with the same limits
+    for limits, group in _group_by_limits(axes_list, along_axis).items():
+        # set periodicity of the ticks, the labels are formatted from the tick values
+        # EXPLANATION: the combination of "MultipleLocator" and "FixedLocator" is used 
+        # to keep the ticks fixed even if the axes limits change later on
+        # the tickers can not be shared among axes, their copies share the ticks and the formatted labels
+        ticks = MultipleLocator(periodicity).tick_values(limits[0], limits[1])
+        formatter = LabelFormatter(style_labels['label_format'], labels)
+        formatter.format_ticks(ticks)
+        for axes in group:
+            axis = axes.xaxis if along_axis == 'x' else axes.yaxis
+            axis.set_major_locator(FixedLocator(ticks))
+            axis.set_major_formatter(copy.copy(formatter))
             
-        # set rotation origin
-        label_object.set_rotation_mode(style_labels['rotation_origin'])
-        # rotate
-        label_object.set_rotation(style_labels['rotation_angle'])
+            # the labels are created from the locator, no draw is required
+            for label_object in axis.get_majorticklabels():
+                _style_tick_label(label_object, style_labels)
+
+#%% pre-draw hook
+class _PreDrawHook(mpl.artist.Artist):
+    """
+    Invisible figure artist calling its "callbacks" (with the figure as 
+    the only argument) right before the figure is drawn or its tight 
+    bounding box is measured. With a layout engine (e.g. constrained 
+    layout), the callbacks run before the engine lays out the axes.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.callbacks = []
+        # draw before any axes
+        self.set_zorder(-np.inf)
+    
+    def draw(self, renderer):
+        # a layout engine set after the hook runs the callbacks from the next draw on
+        _wrap_layout_engine(self.figure)
+        for callback in self.callbacks:
+            callback(self.figure)
+    
+    def get_tightbbox(self, renderer=None):
+        for callback in self.callbacks:
+            callback(self.figure)
+        return None
+
+def _execute_layout(execute, figure):
+    """
+    Run the pre-draw callbacks of the figure, then the layout engine 
+    (Figure.draw() runs the engine before drawing any artist, thus before 
+    the hook).
+    """
+    
+    # the hooks of the subfigures as well (they share the engine of the figure)
+    figures = [figure]
+    for subfigure in figures:
+        figures.extend(subfigure.subfigs)
+        hook = getattr(subfigure, '_journal_figure_hook', None)
+        for callback in ([] if hook is None else hook.callbacks):
+            callback(subfigure)
+    return execute(figure.get_layout_engine(), figure)
+
+def _wrap_layout_engine(figure):
+    """
+    Make the layout engine of the figure (if any) run the pre-draw 
+    callbacks first, the engine is wrapped once.
+    """
+    
+    engine = figure.get_layout_engine()
+    if( engine is not None and not isinstance(engine.__dict__.get('execute', None), functools.partial) ):
+        engine.execute = functools.partial(_execute_layout, type(engine).execute)
+
+def _add_pre_draw_callback(figure, callback):
+    """
+    Register "callback" to be called right before the figure is drawn, 
+    the hook is installed once per figure.
+    """
+    
+    if( getattr(figure, '_journal_figure_hook', None) is None ):
+        figure._journal_figure_hook = figure.add_artist(_PreDrawHook())
+    if( callback not in figure._journal_figure_hook.callbacks ):
+        figure._journal_figure_hook.callbacks.append(callback)
+    _wrap_layout_engine(figure)
+
+#%% deferred ticks
+def _defer_ticks(axes_list, key, settings):
+    """
+    Record the tick "settings" against every axes, a later call with 
+    the same "key" replaces the previous settings.
+    """
+    
+    for axes in axes_list:
+        if( not hasattr(axes, '_journal_figure_deferred') ):
+            axes._journal_figure_deferred = {}
+        axes._journal_figure_deferred[key] = settings
         
-        # adjust position of labels
-        label_object.set_position( (label_object.get_position()[0] + style_labels['padding_x'], label_object.get_position()[1] + style_labels['padding_y']) )
-
-        # set text
-        if( labels == None ):
-            # remove text
-            label_object.set_text( '' )
-        elif( not labels ):
-            # apply formatting to the text
-            if( any( x in style_labels['label_format'] for x in ['f', 'F', 'e', 'E', 'g', 'G'] ) ):
-                # convert text to float
-                label_object.set_text( style_labels['label_format'].format( float( label_object.get_text().replace('−','-') ) ) )
-            elif( any( x in style_labels['label_format'] for x in ['f'] ) ):
-                # convert text to integer
-                label_object.set_text( style_labels['label_format'].format( int( label_object.get_text()).replace('−','-') ) )
-            else:
-                # no conversion
-                label_object.set_text( style_labels['label_format'].format( label_object.get_text()) )
-        else:
-            label_object.set_text( style_labels['label_format'].format( labels[label_idx] ) )
+        # apply the settings right before the figure is drawn
+        _add_pre_draw_callback(axes.get_figure(), apply_deferred_ticks)
 
-    # force to draw
-    if( style_colorbar['orientation'] == 'horizontal' ):
-        clb.ax.set_xticklabels(label_list)
-    elif( style_colorbar['orientation'] == 'vertical' ):
-        clb.ax.set_yticklabels(label_list)
+@profiled
+def apply_deferred_ticks(figure):
+    """
+    Apply all tick settings recorded by set_major_ticks(..., deferred=True) 
+    and set_minor_ticks(..., deferred=True) in one pass, without drawing.
+    This is done automatically right before the figure is drawn, saved 
+    or shown, but it can be called explicitly as well.
 
-    return clb
+    Parameters
+    ----------
+    figure : <figure handle>
+        Handle of the figure.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    # the axes sharing the settings of a single call are applied together
+    groups = {}
+    for axes in figure.get_axes():
+        deferred = getattr(axes, '_journal_figure_deferred', None)
+        if( not deferred ):
+            continue
+        # every setting is applied only once
+        axes._journal_figure_deferred = {}
+        for (which, along_axis), settings in deferred.items():
+            groups.setdefault((which, along_axis, id(settings)), (settings, []))[1].append(axes)
+    
+    for (which, along_axis, _), (settings, axes_list) in groups.items():
+        if( which == 'major' ):
+            _apply_major_ticks(axes_list, along_axis=along_axis, **settings)
+        elif( which == 'minor' ):
+            _apply_minor_ticks(axes_list, along_axis=along_axis, **settings)
 
 #%% major_ticks
+@profiled
 def set_major_ticks(axes, periodicity, along_axis, labels=[], 
                     style_labels={'which_axis':'SW', 'label_format':'{0:.3f}', 'label_align':'', 'rotation_angle':0.0, 'rotation_origin':'anchor', 'padding_x':0.0, 'padding_y':0.0},
-                    style_ticks ={'which_axes':'NSWE'}):
+                    style_ticks ={'which_axis':'NSWE'}, deferred=False):
     """
     Function providing complete control over the positioning 
-    and labeling the major ticks of the axes.
+    and labeling the major ticks of the axes. A sequence of axes (e.g. 
+    a grid of small multiples) is set up in a single call, the ticks and 
+    their labels are computed once per group of axes with the same limits.
     
     Parameters
     ----------
-    axes : <axes handle>
-        Handle of the axes.
+    axes : <axes handle> / <list(<axes handle>)>
+        Handle of the axes, or a sequence (<list>, <tuple>, <numpy.ndarray>) 
+        of axes handles.
     periodicity : <float>
         Periodicity of the ticks. For instance \'periodicity = 10\' draws 
         a tick on ... -20, -10, 0, 10, 20, ... places along the axis.
@@ -559,6 +1922,11 @@ def set_major_ticks(axes, periodicity, along_axis, labels=[],
             directional system. Default value is \'NSWE\', 
             which make the ticks appear on every axis (\'top\',\'bottom\', 
                                                        \'left\' and \'right\').
+    deferred : <bool>, optional
+        If True, the settings are only recorded against the axes and applied
+        in one pass right before the figure is drawn, saved or shown 
+        (thus using the final axes limits), see apply_deferred_ticks(). 
+        Default value is False.
 
     Raises
     ------
@@ -574,100 +1942,65 @@ def set_major_ticks(axes, periodicity, along_axis, labels=[],
     # sanity check
     if( not any( x in along_axis for x in ['x', 'y'] ) ):
         raise ValueError('The only allowed values for "along_axis" are \'x\' and \'y\'.')
+
+    # record the settings, these are applied in one pass before drawing
+    if( deferred ):
+        _defer_ticks(_axes_list(axes), ('major', along_axis),
+                     {'periodicity':periodicity, 'labels':labels,
+                      'style_labels':style_labels, 'style_ticks':style_ticks})
+        return
+
+    # set visibility, periodicity and labels of the ticks
+    # (the labels are formatted from the tick values, no draw is required)
+    _apply_major_ticks(_axes_list(axes), periodicity, along_axis, labels, style_labels, style_ticks)
+
+
+#%% minor_ticks (no draw)
+def _apply_minor_ticks(axes_list, periodicity, along_axis, style_ticks):
+    """
+    Set visibility and periodicity of the minor ticks of all the axes 
+    without drawing. See set_minor_ticks() for the description of 
+    the parameters.
+    """
     
     # set visibility
-    if(along_axis=='x'):
-        axes.tick_params(labeltop   = True if ('N' in style_labels['which_axis'] and labels != None) else False,
-                         labelbottom= True if ('S' in style_labels['which_axis'] and labels != None) else False,
-                         top        = True if ('N' in style_ticks['which_axis']) else False,
-                         bottom     = True if ('S' in style_ticks['which_axis']) else False,
-                         which='major')
-    elif(along_axis=='y'):
-        axes.tick_params( labelleft  = True if ('W' in style_labels['which_axis'] and labels != None) else False,
-                          labelright = True if ('E' in style_labels['which_axis'] and labels != None) else False,
-                          left       = True if ('W' in style_ticks['which_axis']) else False,
-                          right      = True if ('E' in style_ticks['which_axis']) else False,
-                          which='major')
-    
-    # force to draw
-    axes.get_figure().canvas.draw()
+    for axes in axes_list:
+        if(along_axis=='x'):
+            axes.tick_params(labeltop   = False,
+                             labelbottom= False,
+                             top        = True if ('N' in style_ticks['which_axis']) else False,
+                             bottom     = True if ('S' in style_ticks['which_axis']) else False,
+                             which='minor')
+        elif(along_axis=='y'):
+            axes.tick_params( labelleft  = False,
+                              labelright = False,
+                              left       = True if ('W' in style_ticks['which_axis']) else False,
+                              right      = True if ('E' in style_ticks['which_axis']) else False,
+                              which='minor')
     
-    # get axes limits
-    if(along_axis=='x'):
-        limits = axes.get_xlim()
-    elif(along_axis=='y'):
-        limits = axes.get_ylim()
-       
-    # set periodicity of the ticks
+    # set periodicity of the ticks, once per group of axes with the same limits
     # EXPLANATION: the combination of "MultipleLocator" and "FixedLocator" is used 
     # to prevent an error "FixedFormatter should only be used together with FixedLocator"
-    if(along_axis=='x'):
-        ticks = MultipleLocator(periodicity)
-        axes.xaxis.set_major_locator(FixedLocator( ticks.tick_values(limits[0], limits[1]) ))
-    elif(along_axis=='y'):
-        ticks = MultipleLocator(periodicity)
-        axes.yaxis.set_major_locator(FixedLocator( ticks.tick_values(limits[0], limits[1]) ))
-    
-    # force to draw
-    axes.get_figure().canvas.draw()
-
-    # loop through labels
-    if(along_axis=='x'):
-        label_list = axes.get_xticklabels(minor=False)
-    elif(along_axis=='y'):
-        label_list = axes.get_yticklabels(minor=False)
-        
-    for label_idx, label_object in enumerate(label_list):
-        # horizontal alignment
-        if('W' in style_labels['label_align'] or 'E' in style_labels['label_align']):
-            label_object.set_horizontalalignment( 'left' if 'W' in style_labels['label_align'] else 'right' )
-        else:
-            label_object.set_horizontalalignment( 'center' )
-        # vertical alignment
-        if('N' in style_labels['label_align'] or 'S' in style_labels['label_align']):
-            label_object.set_verticalalignment( 'top' if 'N' in style_labels['label_align'] else 'bottom' )
-        else:
-            label_object.set_verticalalignment( 'center' )
-            
-        # set rotation origin
-        label_object.set_rotation_mode(style_labels['rotation_origin'])
-        
-        # rotate
-        label_object.set_rotation(style_labels['rotation_angle'])
-        
-        # adjust position of labels
-        label_object.set_position( (label_object.get_position()[0] + style_labels['padding_x'], label_object.get_position()[1] + style_labels['padding_y']) )
-        
-        # set text
-        if( labels == None ):
-            # remove text
-            label_object.set_text( '' )
-        elif( not labels ):
-            # apply formatting to the text
-            if( any( x in style_labels['label_format'] for x in ['f', 'F', 'e', 'E', 'g', 'G'] ) ):
-                # convert text to float
-                label_object.set_text( style_labels['label_format'].format( float( label_object.get_text().replace('−','-') ) ) )
-            elif( any( x in style_labels['label_format'] for x in ['f'] ) ):
-                # convert text to integer
-                label_object.set_text( style_labels['label_format'].format( int( label_object.get_text()).replace('−','-') ) )
-            else:
-                # no conversion
-                label_object.set_text( style_labels['label_format'].format( label_object.get_text()) )
-        else:
-            label_object.set_text( style_labels['label_format'].format( labels[label_idx] ) )
-
+    # (the tick values are shared, every axis has a locator of its own)
+    for limits, group in _group_by_limits(axes_list, along_axis).items():
+        ticks = MultipleLocator(periodicity).tick_values(limits[0], limits[1])
+        for axes in group:
+            (axes.xaxis if along_axis == 'x' else axes.yaxis).set_minor_locator(FixedLocator(ticks))
 
 #%% major_ticks
+@profiled
 def set_minor_ticks(axes, periodicity, along_axis,
-                    style_ticks ={'which_axis':'NSWE'}):
+                    style_ticks ={'which_axis':'NSWE'}, deferred=False):
     """
     Function providing complete control over the positioning of \n
-    the minor ticks of the axes.
+    the minor ticks of the axes. A sequence of axes is set up in a single 
+    call, the figure is not drawn.
     
     Parameters
     ----------
-    axes : <axes handle>
-        Handle of the axes.
+    axes : <axes handle> / <list(<axes handle>)>
+        Handle of the axes, or a sequence (<list>, <tuple>, <numpy.ndarray>) 
+        of axes handles.
     periodicity : <float>
         Periodicity of the ticks. For instance \'periodicity = 10\'
         draws a tick on ... -20, -10, 0, 10, 20, ... places along the axis.
@@ -680,6 +2013,10 @@ def set_minor_ticks(axes, periodicity, along_axis,
                 directional system. Default value is \'NSWE\', 
                 which make the ticks appear on every axis (\'top\',\'bottom\',
                                                        \'left\' and \'right\').
+    deferred : <bool>, optional
+        If True, the settings are only recorded against the axes and applied
+        right before the figure is drawn, saved or shown,
+        see apply_deferred_ticks(). Default value is False.
 
     Raises
     ------
@@ -696,40 +2033,15 @@ def set_minor_ticks(axes, periodicity, along_axis,
     if( not any( x in along_axis for x in ['x', 'y'] ) ):
         raise ValueError('The only allowed values for "along_axis" are \'x\' and \'y\'.')
     
-    # set visibility
-    # get axes limits
-    if(along_axis=='x'):
-        axes.tick_params(labeltop   = False,
-                         labelbottom= False,
-                         top        = True if ('N' in style_ticks['which_axis']) else False,
-                         bottom     = True if ('S' in style_ticks['which_axis']) else False,
-                         which='minor')
-    elif(along_axis=='y'):
-        axes.tick_params( labelleft  = False,
-                          labelright = False,
-                          left       = True if ('W' in style_ticks['which_axis']) else False,
-                          right      = True if ('E' in style_ticks['which_axis']) else False,
-                          which='minor')
+    # record the settings, these are applied in one pass before drawing
+    if( deferred ):
+        _defer_ticks(_axes_list(axes), ('minor', along_axis),
+                     {'periodicity':periodicity, 'style_ticks':style_ticks})
+        return
 
-    # get axes limits
-    if(along_axis=='x'):
-        limits = axes.get_xlim()
-    elif(along_axis=='y'):
-        limits = axes.get_ylim()
+    # set visibility and periodicity of the ticks (no draw is required)
+    _apply_minor_ticks(_axes_list(axes), periodicity, along_axis, style_ticks)
     
-    # set periodicity of the ticks
-    # EXPLANATION: the combination of "MultipleLocator" and "FixedLocator" is used 
-    # to prevent an error "FixedFormatter should only be used together with FixedLocator"
-    if(along_axis=='x'):
-        ticks = MultipleLocator(periodicity)
-        axes.xaxis.set_minor_locator(FixedLocator( ticks.tick_values(limits[0], limits[1]) ))
-    elif(along_axis=='y'):
-        ticks = MultipleLocator(periodicity)
-        axes.yaxis.set_minor_locator(FixedLocator( ticks.tick_values(limits[0], limits[1]) ))
-    
-    # force to draw
-    axes.get_figure().canvas.draw()
-        
 #%%
 
 # #%% latexify
@@ -762,6 +2074,9 @@ def set_minor_ticks(axes, periodicity, along_axis,
 #   ---------------------------------------------------------------------------
 if __name__ == "__main__":
     
+    import matplotlib.pyplot as plt
+    from journal_figure.color_schemes import get_colormap, series_colors
+    
     # number of data plotted
     data_resolution = 6    
     
@@ -799,14 +2114,15 @@ if __name__ == "__main__":
     detail_ax.set_zorder(2)
     detail_ax.grid('on', which='both')
     
-    # get colormap function
-    cmap = plt.get_cmap(colormap)
+    # get colormap function and the colors of all the lines at once
+    cmap = get_colormap(colormap)
+    colors = series_colors(data_resolution, cmap)
     
     # plot data
     for idx in range(0, data_resolution):
-        axes.plot( ((idx+0.3)/data_resolution)*np.sin(np.linspace(0, 2 * np.pi)), color=cmap(idx/(data_resolution-1) ), label = 'Line '+str(idx+1))
-        detail_ax.plot( ((idx+0.3)/data_resolution)*np.sin(np.linspace(0, 2 * np.pi)), color=cmap(idx/(data_resolution-1) ) )
-        axes2.plot( ((idx+0.3)/data_resolution)*np.cos(np.linspace(0, 2 * np.pi)), color=cmap(idx/(data_resolution-1)), label = 'Line '+str(idx+1+data_resolution), linestyle=':')     
+        axes.plot( ((idx+0.3)/data_resolution)*np.sin(np.linspace(0, 2 * np.pi)), color=colors[idx], label = 'Line '+str(idx+1))
+        detail_ax.plot( ((idx+0.3)/data_resolution)*np.sin(np.linspace(0, 2 * np.pi)), color=colors[idx] )
+        axes2.plot( ((idx+0.3)/data_resolution)*np.cos(np.linspace(0, 2 * np.pi)), color=colors[idx], label = 'Line '+str(idx+1+data_resolution), linestyle=':')     
     
     # colorbar
     add_colorbar(axes_colorbar, # Handle of the axes dedicated to colorbar.
@@ -853,7 +2169,7 @@ if __name__ == "__main__":
                     style_ticks ={'which_axis':'NS'} # Styling of the ticks.
                     )
     
-    set_major_ticks(axes,     
+    set_major_ticks([axes, axes2], # Both main axes share the limits, the ticks are computed once.
                     0.4, 
                     along_axis='y', 
                     labels=[],
@@ -867,12 +2183,6 @@ if __name__ == "__main__":
                     style_labels={'which_axis':'W', 'label_format':'{0:.1f}', 'label_align':'NE', 'rotation_angle':-45.0, 'rotation_origin':'anchor', 'padding_x':-0.01, 'padding_y':0.01},
                     style_ticks ={'which_axis':'WE'}
                     )  
-    set_major_ticks(axes2,    
-                    0.4, 
-                    along_axis='y', 
-                    labels=[],
-                    style_labels={'which_axis':'W', 'label_format':'{0:.1f}', 'label_align':'NE', 'rotation_angle':-45.0, 'rotation_origin':'anchor', 'padding_x':-0.01, 'padding_y':0.01},
-                    style_ticks ={'which_axis':'WE'})
     
     # set minor ticks
     set_minor_ticks(detail_ax, 
@@ -895,6 +2205,9 @@ if __name__ == "__main__":
     # set the size of the figure
     set_figure_size(figure, 20, 12, units='cm')
 
+    # tight bounding box computed analytically (no extra render pass)
+    bbox = tight_bbox(figure)
+
     # save the figure
-    plt.savefig('../graphics/example_figure.pdf', bbox_inches='tight', dpi=600)
-    plt.savefig('../graphics/example_figure.png', bbox_inches='tight', dpi=600)
\ No newline at end of file
+    plt.savefig('../graphics/example_figure.pdf', bbox_inches=bbox, dpi=600)
+    plt.savefig('../graphics/example_figure.png', bbox_inches=bbox, dpi=600)
\ No newline at end of file
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in profiling of the journal_figure helpers: wall time, draws, artists
+created and bytes written by savefig, reported per figure.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import matplotlib.artist
+import matplotlib.figure
+import contextlib
+import functools
+import atexit
+import json
+import os
+import sys
+import time
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% state
+# report being filled, None when the profiling is off
+_report = None
+# calls in progress (the outermost profiled call and savefig)
+_stack = []
+# keys of the figures in the report, by id of the figure
+_figure_keys = {}
+# original methods replaced while profiling
+_originals = {}
+
+#%% profiled helpers
+def profiled(function):
+    """
+    Decorator of the public helpers. While the profiling is off, the only
+    cost is a single check of a module variable.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # helpers called by other helpers are accounted to the outer call
+        if( _report is None or _stack ):
+            return function(*args, **kwargs)
+        call = {'function':function.__name__, 'time':0.0, 'draws':0, 'artists':{}}
+        _stack.append(call)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            call['time'] = time.perf_counter() - start
+            _stack.pop()
+            _record(_figure_of(args), call)
+
+    return wrapper
+
+def _figure_of(args):
+    """
+    Figure the call works on: the first figure, or the figure of the first
+    artist (e.g. axes, also within a sequence), among the positional arguments.
+    """
+
+    for arg in args:
+        # a sequence of axes counts as its first axes
+        if( isinstance(arg, (list, tuple)) and arg ):
+            arg = arg[0]
+        elif( hasattr(arg, 'dtype') and arg.dtype == object and arg.size ):
+            arg = arg.flat[0]
+        if( isinstance(arg, mpl.figure.FigureBase) ):
+            return arg
+        elif( isinstance(arg, mpl.artist.Artist) ):
+            return arg.get_figure()
+    return None
+
+def _figure_entry(figure):
+    """
+    Entry of the "figure" within the report (\'global\' for no figure).
+    """
+
+    if( figure is None ):
+        key = 'global'
+    elif( id(figure) in _figure_keys ):
+        key = _figure_keys[id(figure)]
+    else:
+        key = figure.get_label() or 'Figure {0}'.format(getattr(figure, 'number', len(_figure_keys) + 1))
+        # labels are not unique
+        if( key in _report['figures'] ):
+            key = '{0:s} ({1:d})'.format(key, len(_figure_keys) + 1)
+        _figure_keys[id(figure)] = key
+    return _report['figures'].setdefault(key, {'calls':[], 'draws':0})
+
+def _record(figure, call):
+    """
+    Add a finished call to the report.
+    """
+
+    _figure_entry(figure)['calls'].append(call)
+
+#%% instrumented matplotlib methods
+def _artist_init(self, *args, **kwargs):
+    if( _stack ):
+        artists = _stack[-1]['artists']
+        name = type(self).__name__
+        artists[name] = artists.get(name, 0) + 1
+    _originals['Artist.__init__'](self, *args, **kwargs)
+
+def _figure_draw(self, renderer, *args, **kwargs):
+    if( _stack ):
+        _stack[-1]['draws'] += 1
+    _figure_entry(self)['draws'] += 1
+    return _originals['Figure.draw'](self, renderer, *args, **kwargs)
+
+def _figure_savefig(self, fname, *args, **kwargs):
+    call = {'function':'savefig', 'time':0.0, 'draws':0, 'artists':{},
+            'fname':fname if isinstance(fname, (str, os.PathLike)) else repr(fname), 'bytes':None}
+    position = fname.tell() if hasattr(fname, 'tell') else None
+    _stack.append(call)
+    start = time.perf_counter()
+    try:
+        return _originals['Figure.savefig'](self, fname, *args, **kwargs)
+    finally:
+        call['time'] = time.perf_counter() - start
+        _stack.pop()
+        if( isinstance(fname, (str, os.PathLike)) and os.path.isfile(fname) ):
+            call['bytes'] = os.path.getsize(fname)
+            call['fname'] = os.fspath(fname)
+        elif( position is not None ):
+            call['bytes'] = fname.tell() - position
+        _record(self, call)
+
+#%% start and stop
+def _start():
+    """
+    Reset the report and instrument matplotlib.
+    """
+
+    global _report
+
+    if( _report is not None ):
+        raise RuntimeError('profile: the profiling is already running.')
+    _report = {'figures':{}}
+    _figure_keys.clear()
+    _originals['Artist.__init__'] = mpl.artist.Artist.__init__
+    _originals['Figure.draw'] = mpl.figure.Figure.draw
+    _originals['Figure.savefig'] = mpl.figure.Figure.savefig
+    mpl.artist.Artist.__init__ = _artist_init
+    mpl.figure.Figure.draw = _figure_draw
+    mpl.figure.Figure.savefig = _figure_savefig
+
+def _stop():
+    """
+    Restore matplotlib, return the finished report.
+    """
+
+    global _report
+
+    mpl.artist.Artist.__init__ = _originals['Artist.__init__']
+    mpl.figure.Figure.draw = _originals['Figure.draw']
+    mpl.figure.Figure.savefig = _originals['Figure.savefig']
+    report, _report = _report, None
+    _stack.clear()
+
+    # totals per helper and per figure
+    for entry in report['figures'].values():
+        summary = {}
+        for call in entry['calls']:
+            total = summary.setdefault(call['function'], {'calls':0, 'time':0.0, 'draws':0, 'artists':0})
+            total['calls'] += 1
+            total['time'] += call['time']
+            total['draws'] += call['draws']
+            total['artists'] += sum(call['artists'].values())
+        entry['summary'] = summary
+        entry['time'] = sum([call['time'] for call in entry['calls']])
+        entry['bytes'] = sum([call['bytes'] or 0 for call in entry['calls'] if call['function'] == 'savefig'])
+    return report
+
+@contextlib.contextmanager
+def profile(fname=None):
+    """
+    Profile the journal_figure helpers called within the "with" block.
+    Recorded are the wall time, the number of figure draws and the artists
+    created by every call (the helpers called by other helpers count
+    towards the outer call), and the time, draws and bytes of every savefig.
+    The profiling is opt-in, the helpers are not slowed down otherwise.
+
+        with profile() as report:
+            ...
+            figure.savefig('figure.pdf')
+        report['figures']['Figure 1']['summary']
+
+    The profiling can be enabled for a whole run (e.g. a batch) by the
+    environment variable JOURNAL_FIGURE_PROFILE set to the path of the JSON
+    report (written at exit, \'{pid}\' is replaced by the process id),
+    or to \'-\' for the standard error.
+
+    Parameters
+    ----------
+    fname : <string>, optional
+        Path of the JSON file the report is written to on exit.
+        Default value is None.
+
+    Yields
+    ------
+    report : <dict>
+        Filled on exit of the "with" block, \'figures\' maps the label of
+        every figure (\'global\' for calls without a figure, e.g. set_style) to:
+            'calls' : <list(<dict>)> of the calls in order, each with
+                \'function\', \'time\' in seconds, \'draws\' and \'artists\'
+                (<dict> of the number of artists created by type),
+                savefig additionally with \'fname\' and \'bytes\'.
+            'draws' : number of all draws of the figure.
+            'summary' : totals per function (\'calls\', \'time\',
+                \'draws\', \'artists\').
+            'time' : total time of the calls in seconds.
+            'bytes' : total bytes written by savefig.
+
+    """
+
+    _start()
+    report = {}
+    try:
+        yield report
+    finally:
+        report.update( _stop() )
+        if( fname is not None ):
+            _write(report, fname)
+
+def _write(report, fname):
+    """
+    Write the report as JSON, \'-\' stands for the standard error.
+    """
+
+    if( fname == '-' ):
+        json.dump(report, sys.stderr, indent=1)
+        sys.stderr.write('\n')
+    else:
+        with open(fname.replace('{pid}', str(os.getpid())), 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=1)
+
+#%% environment variable
+def _profile_environment():
+    """
+    Profile the whole process if JOURNAL_FIGURE_PROFILE is set.
+    """
+
+    fname = os.environ.get('JOURNAL_FIGURE_PROFILE', '')
+    if( not fname or _report is not None ):
+        return
+    _start()
+    atexit.register( lambda: _write(_stop(), fname) )
+
+# enabled by the environment variable on the first import
+_profile_environment()
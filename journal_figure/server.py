@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local render server: an asyncio HTTP front end (TCP on localhost, or a Unix
+socket) dispatching figure specs to a pool of warm workers, thus a figure
+costs its render only, not the start of Python and matplotlib.
+
+    journal-figure serve --port 8765 --jobs 4
+
+    curl -F spec=@figure.json -F t=@t.npy -F signal=@signal.npy \
+         http://127.0.0.1:8765/render?format=pdf -o figure.pdf
+    curl http://127.0.0.1:8765/metrics
+
+POST /render takes multipart/form-data with the part "spec" (a figure spec,
+see journal_figure.spec, whose plots refer to the other parts by name) and
+one .npy part per array, or application/json with the figure spec alone
+(data given inline). The spec may hold "style" and "apply_to" of its own,
+naming the stylelib files of the package.
+GET /metrics returns the counters and latency percentiles as JSON, GET
+/health returns "ok".
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import numpy as np
+import email.parser
+import email.policy
+import urllib.parse
+import collections
+import ipaddress
+import asyncio
+import json
+import time
+import io
+import os
+
+from journal_figure.batch import worker_pool, _render_styled_job
+from journal_figure.spec import build_figure
+from journal_figure.library_package import package_path
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% worker side
+def _build_request(figure, figure_spec, payloads):
+    """
+    Build of a request in the worker, the .npy payloads are decoded here
+    (not in the event loop of the front end).
+    """
+
+    arrays = {name: np.load(io.BytesIO(payload), allow_pickle=False) for name, payload in payloads.items()}
+    return build_figure(figure, figure_spec, arrays=arrays)
+
+def _warm_up(style, apply_to):
+    """
+    Render a small figure, so the first request of a worker finds the style,
+    the fonts and the Agg canvas ready.
+    """
+
+    job = {'build': build_figure, 'fname': None, 'args': ({'axes': {'warm up': {'rect': [0.1, 0.1, 0.8, 0.8], 'title': 'Warm up'}},
+                                                           'plots': [{'axes': 'warm up', 'y': [0.0, 1.0]}]},),
+           'savefig': {'format': 'png', 'dpi': 10}, 'style': style, 'apply_to': apply_to}
+    _render_styled_job(job)
+    # a worker busy for a moment, thus every worker of the pool gets one
+    time.sleep(0.05)
+
+#%% server
+def _is_loopback(host):
+    """
+    Whether the "host" is a loopback address (or \'localhost\').
+    """
+
+    if( host == 'localhost' ):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def serve(**kwargs):
+    """
+    Run a RenderServer until interrupted, see RenderServer for the keyword
+    arguments. The address is printed once the workers are warm.
+    """
+
+    server = RenderServer(**kwargs)
+
+    async def run():
+        await server.start()
+        print('serving on {0:s} (Ctrl+C to stop)'.format(server.path if server.path is not None else
+              'http://{0:s}:{1:d}'.format(server.host, server.port)), flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+#%% HTTP
+# reasons of the used status codes
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+# content types of the output formats
+_CONTENT_TYPES = {'pdf': 'application/pdf', 'png': 'image/png', 'svg': 'image/svg+xml',
+                  'eps': 'application/postscript', 'ps': 'application/postscript'}
+
+class _HTTPError(Exception):
+    """
+    Error answered by the status code and the message.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _parse_render_request(content_type, body, query):
+    """
+    Figure spec, .npy payloads <dict> and savefig keyword arguments of
+    a POST /render.
+    """
+
+    payloads = {}
+    if( content_type.startswith('multipart/form-data') ):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+        figure_spec = None
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if( name == 'spec' ):
+                figure_spec = json.loads(part.get_payload(decode=True))
+            elif( name is not None ):
+                payloads[name] = part.get_payload(decode=True)
+        if( figure_spec is None ):
+            raise _HTTPError(400, 'The multipart request has no "spec" part.')
+    elif( content_type.startswith('application/json') ):
+        figure_spec = json.loads(body)
+    else:
+        raise _HTTPError(400, 'POST /render takes multipart/form-data or application/json, not "{0}".'.format(content_type))
+
+    if( not isinstance(figure_spec, dict) ):
+        raise _HTTPError(400, 'The spec has to be a JSON object.')
+    # the server never reads files on behalf of its clients
+    if( figure_spec.get('data', None) ):
+        raise _HTTPError(400, 'The "data" files are not available through the server, send the arrays as .npy parts.')
+
+    savefig = dict(figure_spec.get('savefig', {}))
+    savefig['format'] = query.get('format', [savefig.get('format', 'pdf')])[0]
+    if( 'dpi' in query ):
+        savefig['dpi'] = float(query['dpi'][0])
+    return figure_spec, payloads, savefig
+
+def _check_style(style, apply_to):
+    """
+    Reject (400) a "style" or "apply_to" of a client that does not name
+    a stylelib file of the package, the names are matched against the
+    listed files (never joined into a path).
+    """
+
+    elements = sorted(entry for entry in os.listdir(package_path('stylelib')) 
+                      if os.path.isdir(package_path('stylelib', entry)))
+    if( not isinstance(apply_to, list) or not all(isinstance(entry, str) and entry in elements for entry in apply_to) ):
+        raise _HTTPError(400, 'The "apply_to" has to be a list of the elements {0}.'.format(elements))
+    for entry in apply_to:
+        if( not isinstance(style, str) or style+'.mplstyle' not in os.listdir(package_path('stylelib', entry)) ):
+            raise _HTTPError(400, 'Unknown style "{0}" of the element "{1:s}".'.format(style, entry))
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% server
+class RenderServer():
+    """
+    Asyncio HTTP front end of a pool of warm render workers, listening on
+    localhost (or a Unix socket) only.
+
+        server = RenderServer(port=8765, processes=4)
+        asyncio.run(server.serve_forever())
+
+    At most "processes" figures are rendered at once, further requests wait
+    in a queue of at most "max_queue" requests, beyond that the requests are
+    rejected (503) right away, thus the latency stays bounded under load.
+
+    Parameters
+    ----------
+    host : <string>, optional
+        Loopback address to listen on. Default value is \'127.0.0.1\'.
+    port : <int>, optional
+        TCP port. Default value is 8765.
+    path : <string>, optional
+        Path of a Unix socket listened on instead of TCP. Default value is None.
+    processes : <int>, optional
+        Number of worker processes (and of concurrent renders).
+        Default value is 2.
+    max_queue : <int>, optional
+        Number of requests waiting for a worker before new requests are
+        rejected. Default value is 64.
+    timeout : <float>, optional
+        Seconds a render may take (queueing excluded) before it is answered
+        by 504. The worker can not be interrupted, it keeps its slot until
+        the render finishes, thus the renders never exceed "processes".
+        Default value is 60.
+    max_body : <int>, optional
+        Largest request body in bytes (413 beyond). Default value is 2**28.
+    style : <string>, optional
+        Default style of the figures, see set_style(). Default value is
+        \'pretty_style_v1\'.
+    apply_to: <list<string>>, optional
+        Default elements of the style, see set_style().
+
+    Raises
+    ------
+    ValueError
+        "host" is not a loopback address.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, path=None, processes=2, max_queue=64, timeout=60.0,
+                 max_body=2**28, style='pretty_style_v1', apply_to=['figure', 'fonts', 'grid', 'ticks', 'legend']):
+        if( path is None and not _is_loopback(host) ):
+            raise ValueError('RenderServer: the server listens on localhost only, not on "{0}".'.format(host))
+        self.host = host
+        self.port = port
+        self.path = path
+        self.processes = processes
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_body = max_body
+        self.style = style
+        self.apply_to = apply_to
+
+        self._executor = None
+        self._server = None
+        self._slots = None
+        self._queued = 0
+        self._running = 0
+        self._counters = {'requests': 0, 'rendered': 0, 'failed': 0, 'rejected': 0, 'timeouts': 0, 'bytes': 0}
+        # latencies of the recent renders in seconds
+        self._latencies = {name: collections.deque(maxlen=1024) for name in ['queue', 'render', 'total']}
+        self._started = None
+
+    #%% life cycle
+    async def start(self):
+        """
+        Fork the warm workers, then start listening.
+        """
+
+        loop = asyncio.get_running_loop()
+        self._executor = worker_pool(self.processes)
+        self._slots = asyncio.Semaphore(self.processes)
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _warm_up, self.style, self.apply_to)
+                               for _ in range(self.processes)])
+
+        if( self.path is not None ):
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+            # the actual port, e.g. for port 0
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.time()
+
+    async def serve_forever(self):
+        """
+        Start (if not started yet) and serve until cancelled.
+        """
+
+        if( self._server is None ):
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stop listening and shut the workers down.
+        """
+
+        if( self._server is not None ):
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if( self._executor is not None ):
+            self._executor.shutdown()
+            self._executor = None
+
+    #%% metrics
+    def metrics(self):
+        """
+        Counters, state of the queue and the latency percentiles (p50, p90,
+        p99 and max in seconds) of the recent renders:
+        \'queue\' waiting for a worker, \'render\' in the worker and \'total\'.
+        Every render request ends as one of \'rendered\', \'failed\',
+        \'rejected\' (503) or \'timeouts\' (504), the timed out ones count
+        towards the \'queue\' and \'total\' latencies (\'total\' being the
+        timeout), \'running\' includes their workers until they finish.
+        """
+
+        latencies = {}
+        for name, values in self._latencies.items():
+            if( values ):
+                p50, p90, p99 = np.percentile(np.fromiter(values, dtype=float), [50, 90, 99])
+                latencies[name] = {'p50': p50, 'p90': p90, 'p99': p99, 'max': max(values), 'count': len(values)}
+            else:
+                latencies[name] = {'p50': None, 'p90': None, 'p99': None, 'max': None, 'count': 0}
+        return {**self._counters, 'queued': self._queued, 'running': self._running, 'processes': self.processes,
+                'max_queue': self.max_queue, 'uptime': None if self._started is None else time.time() - self._started,
+                'latency': latencies}
+
+    def _release(self):
+        """
+        Free the slot of a finished render.
+        """
+
+        self._running -= 1
+        self._slots.release()
+
+    #%% requests
+    async def _handle(self, reader, writer):
+        """
+        Serve a single HTTP request (the connection is closed afterwards).
+        """
+
+        try:
+            try:
+                method, target, headers, body = await self._read_request(reader)
+                url = urllib.parse.urlsplit(target)
+                if( url.path == '/render' ):
+                    if( method != 'POST' ):
+                        raise _HTTPError(405, 'Use POST /render.')
+                    status, content_type, data = await self._render(headers.get('content-type', ''), body,
+                                                                    urllib.parse.parse_qs(url.query))
+                elif( url.path == '/metrics' ):
+                    status, content_type, data = 200, 'application/json', json.dumps(self.metrics(), indent=1).encode()
+                elif( url.path == '/health' ):
+                    status, content_type, data = 200, 'text/plain', b'ok\n'
+                else:
+                    raise _HTTPError(404, 'Unknown path "{0}", available are /render, /metrics and /health.'.format(url.path))
+            except _HTTPError as error:
+                status, content_type, data = error.status, 'text/plain', (str(error) + '\n').encode()
+            except Exception as error:
+                status, content_type, data = 500, 'text/plain', '{0}: {1}\n'.format(type(error).__name__, error).encode()
+            await self._write_response(writer, status, content_type, data)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        Method, target, headers (lower case names) and body of a request.
+        """
+
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(400, 'The request headers are too large.')
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise _HTTPError(400, 'Malformed request line.')
+        headers = {}
+        for line in lines[1:]:
+            if( ':' in line ):
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        # digits only (RFC 9110), thus no sign, spaces or a list of values
+        length = headers.get('content-length', '0')
+        if( not (length.isascii() and length.isdigit()) ):
+            raise _HTTPError(400, 'Malformed Content-Length "{0}".'.format(length))
+        length = int(length)
+        # rejected before any of the body is read
+        if( length > self.max_body ):
+            raise _HTTPError(413, 'The request body is larger than {0:d} bytes.'.format(self.max_body))
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def _write_response(self, writer, status, content_type, data, chunk=2**16):
+        """
+        Write the status, the headers and stream the data in chunks.
+        """
+
+        writer.write( 'HTTP/1.1 {0:d} {1:s}\r\nContent-Type: {2:s}\r\nContent-Length: {3:d}\r\nConnection: close\r\n\r\n'.format(
+            status, _REASONS[status], content_type, len(data)).encode('latin-1') )
+        view = memoryview(data)
+        for start in range(0, len(data), chunk):
+            writer.write(view[start:start + chunk])
+            await writer.drain()
+        await writer.drain()
+
+    async def _render(self, content_type, body, query):
+        """
+        Queue the render of a figure, return the status, content type
+        and the rendered bytes.
+        """
+
+        self._counters['requests'] += 1
+        try:
+            figure_spec, payloads, savefig = _parse_render_request(content_type, body, query)
+            style = figure_spec.get('style', self.style)
+            apply_to = figure_spec.get('apply_to', self.apply_to)
+            _check_style(style, apply_to)
+        except (ValueError, _HTTPError) as error:
+            self._counters['failed'] += 1
+            # JSON of the spec, or a query parameter
+            raise error if isinstance(error, _HTTPError) else _HTTPError(400, 'Malformed request: {0}'.format(error))
+        job = {'build': _build_request, 'fname': None, 'args': (figure_spec, payloads), 'savefig': savefig,
+               'style': style, 'apply_to': apply_to}
+
+        # bounded queue, the rest is rejected right away
+        if( self._queued >= self.max_queue ):
+            self._counters['rejected'] += 1
+            raise _HTTPError(503, 'The render queue is full ({0:d} requests), retry later.'.format(self.max_queue))
+        start = time.perf_counter()
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        queued = time.perf_counter() - start
+
+        # the slot is held until the worker is done, also after a timeout
+        # (a worker can not be interrupted), thus a runaway render never
+        # makes another request wait behind it within the pool
+        self._running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(_render_styled_job, job)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            self._counters['timeouts'] += 1
+            self._latencies['queue'].append(queued)
+            self._latencies['total'].append(time.perf_counter() - start)
+            raise _HTTPError(504, 'The render took longer than {0:.1f} s.'.format(self.timeout))
+        except Exception as error:
+            # e.g. a worker that died
+            self._counters['failed'] += 1
+            raise _HTTPError(500, 'The render failed: {0}'.format(error))
+
+        if( result['error'] is not None ):
+            self._counters['failed'] += 1
+            # the last line of the traceback holds the message
+            raise _HTTPError(400, result['error'].strip().splitlines()[-1])
+
+        self._counters['rendered'] += 1
+        self._counters['bytes'] += result['bytes']
+        self._latencies['queue'].append(queued)
+        self._latencies['render'].append(result['total_time'])
+        self._latencies['total'].append(time.perf_counter() - start)
+        return 200, _CONTENT_TYPES.get(savefig['format'], 'application/octet-stream'), result['data']
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Declarative figure specs (JSON or YAML) rendered with the journal_figure
+helpers, with the outputs cached by a hash of their inputs.
+
+A spec file holds a single figure, or several figures under "figures",
+the "style" (see set_style()) is shared by all the figures of the file:
+
+    style: pretty_style_v1
+    apply_to: [figure, fonts, grid, ticks, legend]
+    figures:
+      - output: graphics/sweep.pdf              # relative to the spec file
+        savefig: {dpi: 600}
+        data:                                   # .npy, .npz (key), .csv/.txt (column)
+          t: data/sweep.npy
+          amplitude: {file: data/sweep.csv, column: 1}
+        layout: {width: IEEE single, rows: 1, columns: 1, names: [[main]]}
+        axes:                                   # created by "rect" or taken from the layout
+          main: {xlim: [0, 10], ylim: [-1, 1], xlabel: Time, grid: true}
+          detail: {rect: [0.6, 0.6, 0.2, 0.2], zorder: 2}
+        plots:
+          - {axes: main, x: t, y: amplitude, label: Signal, options: {color: C0}}
+          - {axes: main, x: t, y: family, method: decimated, colormap: viridis}
+        details:                                # pretty_detail_axis()
+          - {main: main, detail: detail, main_limits: [[0, 10], [-1, 1]],
+             detail_limits: [[1, 2], [0, 0.5]], detail_pos: [[6, 9], [0.2, 0.8]]}
+        ticks:                                  # set_major_ticks()/set_minor_ticks()
+          - {axes: [main, detail], periodicity: 2, along_axis: x}
+          - {axes: main, which: minor, periodicity: 0.5, along_axis: x}
+        legends:                                # pretty_legend()
+          - {axes: main, position: best}
+        colorbars: []                           # add_colorbar()
+        size: {width: 8.5, height: 6, units: cm, tight: false}   # set_figure_size()
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import numpy as np
+import hashlib
+import json
+import os.path
+import traceback
+
+from journal_figure import library_package as jf
+from journal_figure.color_schemes import series_colors
+from journal_figure.layout import solve_layout
+from journal_figure.batch import render_batch
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% loading
+def load_spec(fname):
+    """
+    Load a spec file (.json, .yaml or .yml) as a <dict> with the list
+    of "figures" and the shared "style" and "apply_to".
+
+    Raises
+    ------
+    RuntimeError
+        YAML spec without PyYAML installed.
+    ValueError
+        The spec has no figures or a figure has no "output".
+
+    """
+
+    with open(fname, 'r', encoding='utf-8') as file:
+        if( fname.endswith(('.yaml', '.yml')) ):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError('Rendering the YAML spec "{0}" requires PyYAML (pip install pyyaml), or use a JSON spec.'.format(fname))
+            spec = yaml.safe_load(file)
+        else:
+            spec = json.load(file)
+
+    if( not isinstance(spec, dict) ):
+        raise ValueError('The spec "{0}" has to be a mapping.'.format(fname))
+    figures = spec['figures'] if 'figures' in spec else [spec]
+    for figure_spec in figures:
+        if( 'output' not in figure_spec ):
+            raise ValueError('Every figure of the spec "{0}" requires an "output".'.format(fname))
+
+    return {'style': spec.get('style', 'pretty_style_v1'),
+            'apply_to': spec.get('apply_to', ['figure', 'fonts', 'grid', 'ticks', 'legend']),
+            'figures': figures}
+
+def _data_files(figure_spec, base_directory):
+    """
+    Paths of the data files of a figure, <dict> name: path.
+    """
+
+    files = {}
+    for name, entry in figure_spec.get('data', {}).items():
+        fname = entry if isinstance(entry, str) else entry['file']
+        files[name] = os.path.join(base_directory, fname)
+    return files
+
+def _load_data(entry, fname):
+    """
+    Array of a single data entry of the spec.
+    """
+
+    if( fname.endswith('.npy') ):
+        array = np.load(fname)
+    elif( fname.endswith('.npz') ):
+        with np.load(fname) as archive:
+            array = archive[entry['key']] if isinstance(entry, dict) and 'key' in entry else archive[archive.files[0]]
+    else:
+        delimiter = entry.get('delimiter', ',' if fname.endswith('.csv') else None) if isinstance(entry, dict) else \
+                    (',' if fname.endswith('.csv') else None)
+        skiprows = entry.get('skiprows', 0) if isinstance(entry, dict) else 0
+        array = np.loadtxt(fname, delimiter=delimiter, skiprows=skiprows, ndmin=1)
+
+    if( isinstance(entry, dict) and 'column' in entry ):
+        array = array[:, entry['column']]
+    return array
+
+#%% building
+def build_figure(figure, figure_spec, base_directory='.', arrays={}):
+    """
+    Populate the (empty) "figure" from a figure spec, see the description
+    of the module. Suitable as the "build" of render_batch().
+
+    Parameters
+    ----------
+    figure : <figure handle>
+        Handle of the figure.
+    figure_spec : <dict>
+        Spec of a single figure.
+    base_directory : <string>, optional
+        Directory the paths of the data files are relative to.
+        Default value is \'.\'.
+    arrays : <dict>, optional
+        Data given directly, name: <numpy.ndarray>, used along with the
+        data files of the spec. Default value is {}.
+
+    Raises
+    ------
+    ValueError
+        Unknown axes or data referenced by the spec.
+
+    Returns
+    -------
+    Keyword arguments of savefig <dict>, i.e. {\'bbox_inches\': bbox} for
+    "size" with "tight": true, otherwise {}.
+
+    """
+
+    data = dict(arrays)
+    data.update( {name: _load_data(figure_spec['data'][name], fname)
+                  for name, fname in _data_files(figure_spec, base_directory).items()} )
+    axes = _build_axes(figure, figure_spec)
+
+    def lookup(names):
+        # axes by name, a single name or a list of names
+        if( isinstance(names, str) ):
+            names = [names]
+        unknown = [name for name in names if name not in axes]
+        if( unknown ):
+            raise ValueError('The spec of "{0}" refers to unknown axes {1}.'.format(figure_spec.get('output', '<figure>'), unknown))
+        return [axes[name] for name in names]
+
+    def values(value):
+        # data by name, or the values themselves
+        if( isinstance(value, str) ):
+            if( value not in data ):
+                raise ValueError('The spec of "{0}" refers to unknown data "{1}".'.format(figure_spec.get('output', '<figure>'), value))
+            return data[value]
+        return np.asarray(value)
+
+    for plot in figure_spec.get('plots', []):
+        _plot(lookup(plot['axes'])[0], plot, values)
+
+    for detail in figure_spec.get('details', []):
+        settings = {key: value for key, value in detail.items() if key not in ['main', 'detail']}
+        jf.pretty_detail_axis(lookup(detail['main'])[0], lookup(detail['detail'])[0], **settings)
+
+    # the ticks are recorded and applied in one pass before the figure is drawn
+    for ticks in figure_spec.get('ticks', []):
+        settings = {key: value for key, value in ticks.items() if key not in ['axes', 'which']}
+        if( ticks.get('which', 'major') == 'minor' ):
+            jf.set_minor_ticks(lookup(ticks['axes']), deferred=True, **settings)
+        else:
+            jf.set_major_ticks(lookup(ticks['axes']), deferred=True, **settings)
+
+    for legend in figure_spec.get('legends', []):
+        settings = {key: value for key, value in legend.items() if key not in ['axes', 'label_source']}
+        jf.pretty_legend(lookup(legend['axes'])[0], label_source=lookup(legend.get('label_source', [])), **settings)
+
+    for colorbar in figure_spec.get('colorbars', []):
+        settings = {key: value for key, value in colorbar.items() if key not in ['axes']}
+        jf.add_colorbar(lookup(colorbar['axes'])[0], **settings)
+
+    size = figure_spec.get('size', None)
+    if( size is not None ):
+        bbox = jf.set_figure_size(figure, size['width'], size['height'], units=size.get('units', 'cm'),
+                                  tight=size.get('tight', False))
+        if( bbox is not None ):
+            return {'bbox_inches': bbox}
+    return {}
+
+def _build_axes(figure, figure_spec):
+    """
+    Create the axes of the "layout" and of "axes" (by "rect"),
+    set their properties, return <dict> name: <axes handle>.
+    """
+
+    axes = {}
+    layout_spec = figure_spec.get('layout', None)
+    if( layout_spec is not None ):
+        settings = {key: value for key, value in layout_spec.items() if key not in ['names']}
+        layout = solve_layout(**settings)
+        figure.set_size_inches(layout['size'])
+        rows, columns = layout['axes'].shape[:2]
+        names = layout_spec.get('names', [['{0:d},{1:d}'.format(row, column) for column in range(columns)] for row in range(rows)])
+        for row in range(rows):
+            for column in range(columns):
+                axes[names[row][column]] = figure.add_axes(layout['axes'][row, column])
+        if( layout['colorbar'] is not None ):
+            axes['colorbar'] = figure.add_axes(layout['colorbar'])
+        for idx, rectangle in enumerate(layout['insets']):
+            inset = layout_spec['insets'][idx]
+            axes[inset.get('name', 'inset {0:d}'.format(idx))] = figure.add_axes(rectangle, zorder=2)
+
+    for name, properties in figure_spec.get('axes', {}).items():
+        if( name not in axes ):
+            if( 'rect' not in properties ):
+                raise ValueError('The axes "{0}" of "{1}" is neither in the layout nor has a "rect".'.format(name, figure_spec.get('output', '<figure>')))
+            axes[name] = figure.add_axes(properties['rect'])
+        _set_axes_properties(axes[name], properties)
+
+    return axes
+
+def _set_axes_properties(axes, properties):
+    """
+    Limits, labels, title, grid and z-order of an axes from its spec.
+    """
+
+    if( 'xlim' in properties ):
+        axes.set_xlim(properties['xlim'])
+    if( 'ylim' in properties ):
+        axes.set_ylim(properties['ylim'])
+    if( 'xlabel' in properties ):
+        axes.set_xlabel(properties['xlabel'])
+    if( 'ylabel' in properties ):
+        axes.set_ylabel(properties['ylabel'])
+    if( 'title' in properties ):
+        axes.set_title(properties['title'])
+    if( properties.get('grid', False) ):
+        axes.grid(True, which=properties.get('grid_which', 'major'))
+    if( 'zorder' in properties ):
+        axes.set_zorder(properties['zorder'])
+    if( properties.get('visible', True) is False ):
+        axes.set_axis_off()
+
+def _plot(axes, plot, values):
+    """
+    Plot a single entry of "plots", a 2D "y" is a series per column
+    (colored by "colormap" if given).
+    """
+
+    y = values(plot['y'])
+    x = values(plot['x']) if 'x' in plot else np.arange(y.shape[0])
+    series = y.reshape(y.shape[0], -1)
+    labels = plot.get('label', None)
+    if( not isinstance(labels, list) ):
+        labels = [labels] + [None] * (series.shape[1] - 1)
+    colors = series_colors(series.shape[1], plot['colormap']) if 'colormap' in plot else [None] * series.shape[1]
+    method = plot.get('method', 'plot')
+
+    for column in range(series.shape[1]):
+        options = dict(plot.get('options', {}))
+        if( labels[column] is not None ):
+            options['label'] = labels[column]
+        if( colors[column] is not None ):
+            options['color'] = colors[column]
+        if( method == 'plot' ):
+            axes.plot(x, series[:, column], **options)
+        elif( method == 'scatter' ):
+            axes.scatter(x, series[:, column], **options)
+        elif( method in ['decimated', 'minmax', 'lttb'] ):
+            jf.plot_decimated(axes, x, series[:, column], method='minmax' if method == 'decimated' else method, **options)
+        else:
+            raise ValueError('Unknown plot "method" {0!r}, valid are \'plot\', \'scatter\', \'decimated\' and \'lttb\'.'.format(method))
+
+#%% caching
+# manifest of the rendered outputs, next to the spec file
+CACHE_FILE = '.journal_figure_cache.json'
+
+# digests of the files {path: ((modification time, size), sha256)}
+_file_digests = {}
+
+def _file_digest(fname):
+    """
+    sha256 of the content of a file, hashed again only when its
+    modification time or size changes (thus cheap to call repeatedly).
+    """
+
+    stat = os.stat(fname)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if( fname not in _file_digests or _file_digests[fname][0] != signature ):
+        digest = hashlib.sha256()
+        with open(fname, 'rb') as file:
+            for chunk in iter(lambda: file.read(2**20), b''):
+                digest.update(chunk)
+        _file_digests[fname] = (signature, digest.hexdigest())
+    return _file_digests[fname][1]
+
+def _package_files():
+    """
+    Code and stylelib files of the package, sorted.
+    """
+
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    fnames = []
+    for directory, subdirectories, names in os.walk(package_directory):
+        subdirectories[:] = [name for name in subdirectories if name != '__pycache__']
+        fnames += [os.path.join(directory, name) for name in names if name.endswith(('.py', '.mplstyle'))]
+    return sorted(fnames)
+
+# installed version of the package, looked up once per process
+_installed_version = None
+
+def library_version():
+    """
+    Version of the library that changes with any change of its code or
+    styles: the installed version, the matplotlib version and a digest
+    of the package files.
+    """
+
+    global _installed_version
+
+    if( _installed_version is None ):
+        try:
+            import importlib.metadata
+            _installed_version = importlib.metadata.version('journal_figure')
+        except Exception:
+            _installed_version = 'unknown'
+
+    digest = hashlib.sha256()
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    for fname in _package_files():
+        digest.update( '{0:s}:{1:s}'.format(os.path.relpath(fname, package_directory), _file_digest(fname)).encode() )
+    return '{0:s}+{1:s} (matplotlib {2:s})'.format(_installed_version, digest.hexdigest()[:16], mpl.__version__)
+
+def figure_key(figure_spec, base_directory, style, apply_to):
+    """
+    Hash of everything the output of a figure depends on: the figure spec,
+    the style, the content of the data files and the library version.
+    """
+
+    digest = hashlib.sha256()
+    digest.update( json.dumps({'figure': figure_spec, 'style': style, 'apply_to': apply_to,
+                               'library': library_version()}, sort_keys=True, default=str).encode() )
+    for name, fname in sorted(_data_files(figure_spec, base_directory).items()):
+        digest.update( '{0:s}:{1:s}'.format(name, _file_digest(fname)).encode() )
+    return digest.hexdigest()
+
+def _load_cache(fname):
+    if( not os.path.isfile(fname) ):
+        return {}
+    try:
+        with open(fname, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except ValueError:
+        # a corrupted manifest only costs a full render
+        return {}
+
+def _save_cache(fname, cache):
+    with open(fname, 'w', encoding='utf-8') as file:
+        json.dump(dict(sorted(cache.items())), file, indent=1)
+        file.write('\n')
+
+#%% rendering
+def render_spec(fname, force=False, processes=0, executor=None):
+    """
+    Render the figures of a spec file, skipping the figures whose output
+    exists and whose inputs (figure spec, style, data files, library
+    version) did not change since the last render.
+
+    Parameters
+    ----------
+    fname : <string>
+        Path of the spec file (.json, .yaml or .yml).
+    force : <bool>, optional
+        Render all the figures regardless of the cache. Default value is False.
+    processes : <int>, optional
+        Number of worker processes, see render_batch(). Default value is 0,
+        which renders in the calling process.
+    executor : <concurrent.futures.ProcessPoolExecutor>, optional
+        Warm pool of workers made by worker_pool(), see render_batch().
+        Default value is None.
+
+    Returns
+    -------
+    results : <list(<dict>)>
+        Report of every figure as returned by render_batch(), with
+        \'skipped\': True for the unchanged figures. A figure whose data
+        files can not be read is reported as failed, the other figures
+        are rendered.
+
+    """
+
+    spec = load_spec(fname)
+    base_directory = os.path.dirname(os.path.abspath(fname))
+    cache_fname = os.path.join(base_directory, CACHE_FILE)
+    cache = _load_cache(cache_fname)
+
+    jobs = []
+    keys = {}
+    results = []
+    for figure_spec in spec['figures']:
+        output = os.path.join(base_directory, figure_spec['output'])
+        try:
+            key = figure_key(figure_spec, base_directory, spec['style'], spec['apply_to'])
+        except OSError:
+            # e.g. a missing data file, reported as a failed render of this figure only
+            results.append( {'fname': output, 'build_time': None, 'save_time': None, 'total_time': None,
+                             'bytes': None, 'pid': os.getpid(), 'error': traceback.format_exc(), 'skipped': False} )
+            cache.pop(figure_spec['output'], None)
+            continue
+        if( not force and cache.get(figure_spec['output']) == key and os.path.isfile(output) ):
+            results.append( {'fname': output, 'skipped': True, 'error': None} )
+            continue
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        jobs.append( {'build': build_figure, 'fname': output, 'args': (figure_spec, base_directory),
+                      'savefig': figure_spec.get('savefig', {})} )
+        keys[output] = (figure_spec['output'], key)
+        results.append( None )
+
+    if( jobs ):
+        rendered = iter(render_batch(jobs, processes=processes, style=spec['style'], apply_to=spec['apply_to'],
+                                     executor=executor))
+        for idx, result in enumerate(results):
+            if( result is not None ):
+                continue
+            results[idx] = {**next(rendered), 'skipped': False}
+            # only the successful outputs are cached
+            output, key = keys[results[idx]['fname']]
+            if( results[idx]['error'] is None ):
+                cache[output] = key
+            else:
+                cache.pop(output, None)
+    if( jobs or any(result is not None and result['error'] is not None for result in results) ):
+        _save_cache(cache_fname, cache)
+
+    return results
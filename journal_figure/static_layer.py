@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cached static layer of a figure, re-rendering only the data artists.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import matplotlib.image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% static layer
+class StaticLayer():
+    """
+    Render the static layer of a figure (style, grids, ticks, labels,
+    detail frames and connectors, legends, colorbars) once into a cached
+    background buffer, then render every frame (or variant) by compositing
+    only the data artists on top of it.
+
+        layer = StaticLayer(figure)
+        for idx in range(number_of_frames):
+            line.set_ydata(data[idx])
+            layer.render('frame_{0:04d}.png'.format(idx))
+
+    Every frame runs the pre-draw callbacks of journal_figure first, thus
+    the lines of plot_decimated() are re-decimated and the deferred ticks
+    are applied as in a regular draw. A frame which changed the limits of
+    any axes, or deferred new ticks, renders the static layer again
+    (see cache()).
+
+    The axes are composited in the order of their zorder. An axes stacked
+    above an axes with data (e.g. a detail axes created by
+    pretty_detail_axis()) is drawn over that data, followed by its own
+    data artists. The static artists a regular draw puts above the data
+    (spines, detail frames and connectors, legends, legend pages and figure
+    legends) are not cached, they are drawn with every frame, thus a frame
+    is the same image as a full draw of the figure.
+
+    Parameters
+    ----------
+    figure : <figure handle>
+        Handle of the figure with the final layout.
+    data_artists : <list(<artist handle>)>, optional
+        Artists changing between the frames. Default value is None, which
+        takes all the lines, collections and images of every axes, except
+        those created by journal_figure (detail frames and connectors)
+        and the colorbars.
+    dpi : <float>, optional
+        Resolution of the frames. Default value is None, which keeps
+        the dpi of the figure.
+    """
+
+    def __init__(self, figure, data_artists=None, dpi=None):
+        self.figure = figure
+        if( dpi is not None ):
+            self.figure.set_dpi(dpi)
+        # blitting requires a raster canvas
+        if( not hasattr(self.figure.canvas, 'copy_from_bbox') ):
+            FigureCanvasAgg(self.figure)
+
+        # data artists grouped by their axes
+        if( data_artists is None ):
+            data_artists = []
+            for axes in self.figure.get_axes():
+                if( getattr(axes, '_colorbar', None) is not None ):
+                    continue
+                data_artists.extend( [artist for artist in list(axes.lines) + list(axes.collections) + list(axes.images)
+                                      if not getattr(artist, '_journal_figure_static', False)] )
+        self.data_artists = {}
+        for artist in data_artists:
+            self.data_artists.setdefault(artist.axes, []).append(artist)
+
+        self._overlays = {}
+        self._background = None
+        self._layout = None
+        self.cache()
+
+    def _draw_order(self, axes):
+        """
+        Children of the axes in the order of Axes.draw() (by zorder), 
+        without the axes patch.
+        """
+
+        artists = [artist for artist in axes.get_children() if artist is not axes.patch]
+        if( not (axes.axison and axes.get_frame_on()) ):
+            artists = [artist for artist in artists if artist not in axes.spines.values()]
+        if( not axes.axison ):
+            artists = [artist for artist in artists if artist not in (axes.xaxis, axes.yaxis)]
+        return sorted(artists, key=lambda artist: artist.get_zorder())
+
+    def _find_overlays(self):
+        """
+        Static artists drawn above the data by a regular draw, grouped by
+        their axes: the spines and axis labels above the lines, detail frames
+        and connectors, legends and legend pages. The figure legends and the
+        axes stacked above the data (e.g. detail axes) are kept under the key
+        None. All of them are left out of the static layer and drawn with the
+        data, thus every pixel is drawn once, as in a regular draw.
+        """
+
+        overlays = {}
+        for axes, artists in self.data_artists.items():
+            order = self._draw_order(axes)
+            first = min(order.index(artist) for artist in artists)
+            overlays[axes] = [artist for artist in order[first:] if artist not in artists]
+
+        # axes and figure legends drawn after (over) the axes with data
+        overlays[None] = []
+        drawn = []
+        for axes in sorted(self.figure.get_axes(), key=lambda axes: axes.get_zorder()):
+            if( any(axes.bbox.overlaps(bbox) for bbox in drawn) ):
+                overlays[None].append(axes)
+            if( axes in self.data_artists ):
+                drawn.append(axes.bbox)
+        data_zorder = min([axes.get_zorder() for axes in self.data_artists], default=np.inf)
+        overlays[None].extend( [legend for legend in self.figure.legends if legend.get_zorder() >= data_zorder] )
+
+        return overlays
+
+    def cache(self):
+        """
+        Render the static layer into the background buffer. Call it again
+        after the layout (not the data) has changed.
+        """
+
+        # data artists are excluded from the regular draw
+        artists = [artist for artists in self.data_artists.values() for artist in artists]
+        for artist in artists:
+            artist.set_animated(True)
+
+        # the axes of older matplotlib versions composite their images
+        # regardless of the animated flag, thus the data artists are hidden
+        # while the static layer is drawn, and so are the overlays (drawn 
+        # twice, their antialiased edges and transparent frames would differ)
+        self._overlays = self._find_overlays()
+        artists = artists + [artist for overlays in self._overlays.values() for artist in overlays]
+        visible = [artist.get_visible() for artist in artists]
+        for artist in artists:
+            artist.set_visible(False)
+        try:
+            self.figure.canvas.draw()
+        finally:
+            for artist, artist_visible in zip(artists, visible):
+                artist.set_visible(artist_visible)
+        self._background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        self._layout = self._layout_key()
+
+    def _layout_key(self):
+        """
+        Limits and positions of the axes, the static layer is valid as long
+        as these do not change.
+        """
+
+        return tuple( (axes.get_xlim(), axes.get_ylim(), tuple(axes.bbox.bounds)) for axes in self.figure.get_axes() )
+
+    def _pre_draw(self):
+        """
+        Run the pre-draw callbacks of the figure (deferred ticks, decimation
+        of the lines), which draw_artist() does not call.
+        """
+
+        hook = getattr(self.figure, '_journal_figure_hook', None)
+        if( hook is not None ):
+            for callback in hook.callbacks:
+                callback(self.figure)
+
+    def release(self):
+        """
+        Return the data artists to the regular draw of the figure.
+        """
+
+        for artists in self.data_artists.values():
+            for artist in artists:
+                artist.set_animated(False)
+        self._background = None
+
+    def render(self, fname=None):
+        """
+        Render a frame: restore the cached static layer and draw only
+        the data artists (and the overlays which must stay on top of them).
+
+        Parameters
+        ----------
+        fname : <string>, optional
+            Path of the PNG file the frame is written to. Default value is
+            None, which only returns the frame.
+
+        Returns
+        -------
+        RGBA image of the frame <numpy.ndarray>.
+        """
+
+        # ticks deferred since the last frame change the static layer
+        stale = any(getattr(axes, '_journal_figure_deferred', None) for axes in self.figure.get_axes())
+        self._pre_draw()
+        # the ticks (and the rest of the static layer) follow the limits
+        if( stale or self._layout_key() != self._layout ):
+            self.cache()
+
+        canvas = self.figure.canvas
+        canvas.restore_region(self._background)
+
+        # axes and figure legends in the order of a regular draw
+        figure_artists = [artist for artist in self.figure.get_children() 
+                          if artist in self.figure.axes or artist in self._overlays[None]]
+        for axes in sorted(figure_artists, key=lambda artist: artist.get_zorder()):
+            # figure legend
+            if( axes not in self.figure.axes ):
+                self.figure.draw_artist(axes)
+                continue
+
+            overlays = self._overlays.get(axes, [])
+            # axes stacked above data has to be drawn on top of it
+            if( axes in self._overlays[None] ):
+                visible = [artist.get_visible() for artist in overlays]
+                for artist in overlays:
+                    artist.set_visible(False)
+                try:
+                    self.figure.draw_artist(axes)
+                finally:
+                    for artist, artist_visible in zip(overlays, visible):
+                        artist.set_visible(artist_visible)
+
+            if( axes not in self.data_artists ):
+                continue
+
+            # data and the static artists on top of it, in the order of a regular draw
+            artists = set(self.data_artists[axes] + overlays)
+            for artist in self._draw_order(axes):
+                if( artist in artists ):
+                    axes.draw_artist(artist)
+
+        frame = np.array(canvas.buffer_rgba())
+        if( fname is not None ):
+            mpl.image.imsave(fname, frame)
+
+        return frame
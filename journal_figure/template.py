@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Figure templates, the layout is built once and refilled with new data.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from journal_figure.library_package import apply_deferred_ticks
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------CLASSES----------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% template
+class FigureTemplate():
+    """
+    Layout of a figure built once (axes positions, detail axes, ticks and
+    their labels, legend, colorbar, figure size) and refilled with new data
+    for every output. The figure is pooled: refilling only removes the data
+    artists of the previous output and adds the new ones, thus the layout
+    is never rebuilt.
+
+        def layout(figure):
+            axes = figure.add_axes([0.10,0.10,0.80,0.80])
+            axes.set_xlim([0, 10])
+            axes.set_ylim([-1, 1])
+            set_major_ticks(axes, 2, along_axis='x', deferred=True)
+            axes.plot([], [], color='C0', label='Signal') # legend entry
+            pretty_legend(axes, position='upper right')
+            set_figure_size(figure, 8, 6, units='cm')
+            return axes
+
+        def fill(axes, x, y):
+            axes.plot(x, y, color='C0')
+
+        template = FigureTemplate(layout)
+        for idx, (x, y) in enumerate(datasets):
+            template.render('figure_{0:d}.pdf'.format(idx), fill, x, y)
+
+    The axes limits are frozen after the layout is built (the ticks and
+    their labels are computed for these limits). Everything created by
+    "layout" is kept, e.g. the empty lines providing the legend entries.
+    Every fill starts the property cycle of the axes from its first entry,
+    the cycle is rcParams['axes.prop_cycle'] in effect while the layout
+    was built (a custom cycle of an axes is set in "fill").
+
+    Parameters
+    ----------
+    layout : <callable>
+        Called once as layout(figure, *args, **kwargs) to build the layout
+        with journal_figure helpers. Its return value (e.g. the axes handles)
+        is stored as "axes" and passed to "fill".
+    *args, **kwargs
+        Arguments of "layout".
+    """
+
+    def __init__(self, layout, *args, **kwargs):
+        # plain figure, not registered by pyplot
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.axes = layout(self.figure, *args, **kwargs)
+
+        # fix the ticks and labels, freeze the limits
+        apply_deferred_ticks(self.figure)
+        for axes in self.figure.get_axes():
+            axes.set_autoscale_on(False)
+
+        # artists of the layout
+        self._layout_artists = {axes: set(axes.get_children()) for axes in self.figure.get_axes()}
+        self._layout_legends = set(self.figure.legends)
+        # property cycle of the axes (every fill starts from the same color)
+        self._prop_cycle = mpl.rcParams['axes.prop_cycle']
+
+    def reset(self):
+        """
+        Remove the data artists and legends added since the layout was 
+        built and restart the property cycles of the axes.
+        """
+
+        for axes, layout_artists in self._layout_artists.items():
+            artists = (list(axes.lines) + list(axes.collections) + list(axes.images) + list(axes.patches) 
+                       + list(axes.texts) + list(axes.artists) + [axes.get_legend()])
+            for artist in artists:
+                if( artist is not None and artist not in layout_artists ):
+                    artist.remove()
+            # lines registered by plot_decimated()
+            if( hasattr(axes, '_journal_figure_decimated') ):
+                axes._journal_figure_decimated = [line for line in axes._journal_figure_decimated if line in layout_artists]
+            # legends placed by pretty_legend(position='best-grid')
+            if( hasattr(axes, '_journal_figure_grid_legends') ):
+                axes._journal_figure_grid_legends = [legend for legend in axes._journal_figure_grid_legends if legend in layout_artists]
+            axes.set_prop_cycle(self._prop_cycle)
+
+        for legend in list(self.figure.legends):
+            if( legend not in self._layout_legends ):
+                legend.remove()
+
+    def fill(self, fill, *args, **kwargs):
+        """
+        Replace the data of the figure.
+
+        Parameters
+        ----------
+        fill : <callable>
+            Called as fill(axes, *args, **kwargs) to plot the new data, where
+            "axes" is the value returned by "layout".
+        *args, **kwargs
+            Arguments of "fill".
+
+        Returns
+        -------
+        Handle of the figure <figure handle>.
+        """
+
+        self.reset()
+        fill(self.axes, *args, **kwargs)
+
+        return self.figure
+
+    def render(self, fname, fill, *args, savefig=None, **kwargs):
+        """
+        Replace the data of the figure and save it.
+
+        Parameters
+        ----------
+        fname : <string>
+            Path of the output file.
+        fill : <callable>
+            Called as fill(axes, *args, **kwargs), see fill().
+        *args, **kwargs
+            Arguments of "fill".
+        savefig : <dict>, optional
+            Keyword arguments of figure.savefig(), e.g. {'dpi':600}. 
+            Default value is None (no arguments).
+
+        Returns
+        -------
+        None.
+        """
+
+        self.fill(fill, *args, **kwargs)
+        self.figure.savefig(fname, **({} if savefig is None else savefig))
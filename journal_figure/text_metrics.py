@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderer-free text measurement based on a cached table of font metrics.
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import matplotlib as mpl
+import matplotlib.cbook
+import matplotlib.font_manager
+import matplotlib.ft2font
+from matplotlib.transforms import Bbox
+import numpy as np
+import functools
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% font metrics
+# flag of the unhinted glyph outlines (renamed in matplotlib 3.10)
+_NO_HINTING = (mpl.ft2font.LoadFlags.NO_HINTING if hasattr(mpl.ft2font, 'LoadFlags')
+               else mpl.ft2font.LOAD_NO_HINTING)
+
+# matplotlib 3.11 spaces the lines by the font metrics, the older versions by the extent of "lp"
+_LEGACY_LAYOUT = tuple(mpl.__version_info__[:2]) < (3, 11)
+
+# metrics of the fonts, keyed by (path of the font file, size in points)
+_font_metrics_cache = {}
+
+def font_metrics(prop):
+    """
+    Metrics of a font, measured once and cached. The glyphs are measured
+    lazily (on the first use of a character).
+
+    Parameters
+    ----------
+    prop : <matplotlib.font_manager.FontProperties>
+        Properties of the font.
+
+    Returns
+    -------
+    metrics : <dict>
+        'ascent' : ascent of the font in points.
+        'descent' : descent of the font in points.
+        'line_gap' : line gap of the font in points.
+        'glyphs' : <dict> of the measured characters, every character maps
+            to (advance, xmin, ymin, xmax, ymax) in points.
+
+    """
+
+    path = mpl.font_manager.findfont(prop)
+    size = prop.get_size_in_points()
+    metrics = _font_metrics_cache.get((path, size), None)
+    if( metrics is not None ):
+        return metrics
+
+    font = mpl.font_manager.get_font(path)
+    units_per_em = font.get_sfnt_table('head')['unitsPerEm']
+    metrics = {'ascent':None, 'descent':None, 'line_gap':None, 'glyphs':{},
+               '_path':path, '_size':size}
+    # vertical extent of the font (the same tables matplotlib uses for the layout)
+    for table_name, line_gap_key, ascent_key, descent_key in [('OS/2', 'sTypoLineGap', 'sTypoAscender', 'sTypoDescender'),
+                                                              ('hhea', 'lineGap', 'ascent', 'descent')]:
+        table = font.get_sfnt_table(table_name)
+        # the typographic metrics of OS/2 are read by ft2font since matplotlib 3.11
+        if( table is None or ascent_key not in table ):
+            continue
+        scale = size / units_per_em
+        metrics['line_gap'] = table[line_gap_key] * scale
+        metrics['ascent'] = table[ascent_key] * scale
+        metrics['descent'] = -table[descent_key] * scale
+        break
+    if( metrics['ascent'] is None ):
+        # fallback to the measurement of the glyphs
+        _, height, descent = _string_extent('lp', metrics)
+        metrics['ascent'] = height - descent
+        metrics['descent'] = descent
+        metrics['line_gap'] = 0.0
+
+    _font_metrics_cache[(path, size)] = metrics
+    return metrics
+
+def _glyph_metrics(character, metrics):
+    """
+    Advance and ink box of a single character in points.
+    """
+
+    glyph = metrics['glyphs'].get(character, None)
+    if( glyph is None ):
+        font = mpl.font_manager.get_font(metrics['_path'])
+        # the font object is shared, the size is set before every use
+        font.set_size(metrics['_size'], 72)
+        loaded = font.load_char(ord(character), flags=_NO_HINTING)
+        xmin, ymin, xmax, ymax = loaded.bbox
+        glyph = (loaded.linearHoriAdvance/65536, xmin/64, ymin/64, xmax/64, ymax/64)
+        metrics['glyphs'][character] = glyph
+
+    return glyph
+
+def _string_extent(text, metrics):
+    """
+    Width, height and descent of a plain string in points.
+    """
+
+    pen = 0.0
+    xmin = ymin = np.inf
+    xmax = ymax = -np.inf
+    for character in text:
+        advance, glyph_xmin, glyph_ymin, glyph_xmax, glyph_ymax = _glyph_metrics(character, metrics)
+        xmin = min(xmin, pen + glyph_xmin)
+        xmax = max(xmax, pen + glyph_xmax)
+        ymin = min(ymin, glyph_ymin)
+        ymax = max(ymax, glyph_ymax)
+        pen += advance
+    if( xmin > xmax ):
+        return 0.0, 0.0, 0.0
+
+    # the width spans the advances (as laid out by FreeType), the height the ink
+    return max(pen, xmax) - min(0.0, xmin), ymax - ymin, -ymin
+
+# parser of the mathtext, it is created on the first use
+_mathtext_parser = None
+
+def text_extent(text, prop, ismath=False):
+    """
+    Width, height and descent of a single line of text, without asking
+    the renderer.
+
+    Parameters
+    ----------
+    text : <string>
+        Single line of text.
+    prop : <matplotlib.font_manager.FontProperties>
+        Properties of the font.
+    ismath : <bool>/<string>, optional
+        True for mathtext, \'TeX\' for text rendered by LaTeX.
+        Default value is False.
+
+    Returns
+    -------
+    Width, height and descent in points <tuple(<float>)>.
+
+    """
+
+    global _mathtext_parser
+
+    # the mathtext and TeX machinery is imported only when needed
+    if( ismath == 'TeX' ):
+        from matplotlib import texmanager
+        return texmanager.TexManager().get_text_width_height_descent(text, prop.get_size_in_points())
+    elif( ismath ):
+        if( _mathtext_parser is None ):
+            from matplotlib import mathtext
+            # the Agg renderer of matplotlib 3.10 and older measures the rasterised mathtext
+            _mathtext_parser = mathtext.MathTextParser('agg' if _LEGACY_LAYOUT else 'path')
+        layout = _mathtext_parser.parse(text, 72, prop)
+        return layout[2:5] if _LEGACY_LAYOUT else layout[:3]
+
+    return _string_extent(text, font_metrics(prop))
+
+#%% text extent cache
+# number of text layouts kept by the LRU cache (a layout is a few floats)
+TEXT_EXTENT_CACHE_SIZE = 2**16
+
+def _font_key(prop):
+    """
+    Immutable snapshot of the font properties (FontProperties is mutable).
+    """
+
+    return (tuple(prop.get_family()), prop.get_style(), prop.get_variant(),
+            prop.get_weight(), prop.get_stretch(), prop.get_size_in_points(),
+            prop.get_file(), prop.get_math_fontfamily())
+
+def _preprocess_math(line, usetex, parse_math):
+    """
+    Strip the line and decide how it is rendered,
+    see matplotlib.text.Text._preprocess_math().
+    """
+
+    if( usetex ):
+        return (r'\ ' if line == ' ' else line), 'TeX'
+    elif( not parse_math ):
+        return line, False
+    elif( mpl.cbook.is_math_text(line) ):
+        return line, True
+    return line.replace(r'\$', '$'), False
+
+@functools.lru_cache(maxsize=TEXT_EXTENT_CACHE_SIZE)
+def _text_layout(text, font_key, rotation, linespacing, usetex, parse_math):
+    """
+    Layout of a text in points, independent of its position and alignment:
+    corners of the unrotated box, corners of the rotated box, baseline of
+    the first line and descent of the last line.
+    """
+
+    family, style, variant, weight, stretch, size, fname, math_fontfamily = font_key
+    prop = mpl.font_manager.FontProperties(family=list(family), style=style, variant=variant,
+                                           weight=weight, stretch=stretch, size=size,
+                                           fname=fname, math_fontfamily=math_fontfamily)
+
+    lines = text.split('\n')
+    if( _LEGACY_LAYOUT ):
+        return _text_layout_legacy(lines, prop, rotation, linespacing, usetex, parse_math)
+    if( usetex ):
+        _, height, descent = text_extent('lp', prop, ismath='TeX')
+        min_ascent, min_descent, line_gap = height - descent, descent, 0.0
+    else:
+        metrics = font_metrics(prop)
+        min_ascent, min_descent, line_gap = metrics['ascent'], metrics['descent'], metrics['line_gap']
+    if( len(lines) == 1 ):
+        line_gap = 0.0
+
+    # vertical layout of the lines (see matplotlib.text.Text._get_layout)
+    widths = []
+    y = 0.0
+    for line in lines:
+        clean_line, ismath = _preprocess_math(line, usetex, parse_math)
+        if( clean_line ):
+            width, height, descent = text_extent(clean_line, prop, ismath)
+        else:
+            width = height = descent = 0.0
+        ascent = height - descent
+        if( usetex or linespacing == 'normal' ):
+            ascent = max(ascent, min_ascent) + line_gap/2
+            descent = max(descent, min_descent) + line_gap/2
+        else:
+            leading = linespacing*(min_ascent + min_descent) - (ascent + descent)
+            ascent += leading/2
+            descent += leading/2
+        baseline = ascent - y
+        y -= ascent + descent
+        widths.append(width)
+
+    return _rotated_layout(max(widths), y, rotation, baseline, descent)
+
+def _text_layout_legacy(lines, prop, rotation, linespacing, usetex, parse_math):
+    """
+    Layout of the lines as matplotlib 3.10 and older lay them out (the 
+    spacing of the lines is given by the extent of "lp").
+    """
+
+    _, lp_height, lp_descent = text_extent('lp', prop, ismath='TeX' if usetex else False)
+    min_dy = (lp_height - lp_descent)*linespacing
+
+    # vertical layout of the lines (see matplotlib.text.Text._get_layout)
+    widths = []
+    y = 0.0
+    for index, line in enumerate(lines):
+        clean_line, ismath = _preprocess_math(line, usetex, parse_math)
+        if( clean_line ):
+            width, height, descent = text_extent(clean_line, prop, ismath)
+        else:
+            width = height = descent = 0.0
+        height = max(height, lp_height)
+        descent = max(descent, lp_descent)
+        baseline = (height - descent) - y
+        if( index == 0 ):
+            y = -(height - descent)
+        else:
+            y -= max(min_dy, (height - descent)*linespacing)
+        y -= descent
+        widths.append(width)
+
+    return _rotated_layout(max(widths), y, rotation, baseline, descent)
+
+def _rotated_layout(width, y, rotation, baseline, descent):
+    """
+    Corners of the unrotated and the rotated box of a layout.
+    """
+
+    corners = np.array([[0.0, y], [0.0, 0.0], [width, 0.0], [width, y]])
+    angle = np.deg2rad(rotation)
+    rotated = corners @ np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
+
+    return (tuple(corners.ravel()), tuple(rotated.ravel()), baseline, descent)
+
+def text_extent_cache_info():
+    """
+    Statistics of the process-wide cache of text layouts used by 
+    text_bbox() (thus by tight_bbox() and the legend placement).
+
+    Returns
+    -------
+    Named tuple with the "hits", "misses", "maxsize" and "currsize" 
+    of the cache.
+
+    """
+
+    return _text_layout.cache_info()
+
+def text_extent_cache_clear():
+    """
+    Empty the process-wide cache of text layouts and reset its statistics.
+    """
+
+    _text_layout.cache_clear()
+
+#%% text bounding box
+def _root_figure(artist):
+    """
+    Root figure of an artist, also within a SubFigure (the same as
+    artist.get_figure(root=True) of matplotlib 3.10 and later).
+    """
+
+    figure = artist.figure
+    while( figure is not None and figure.figure is not figure ):
+        figure = figure.figure
+    return figure
+
+def _ha_for_angle(angle, valign):
+    """
+    Horizontal alignment of the rotation mode "xtick" (matplotlib 3.11).
+    """
+
+    anchor_at_bottom = valign == 'bottom'
+    if( angle <= 10 or 85 <= angle <= 95 or 350 <= angle or 170 <= angle <= 190 or 265 <= angle <= 275 ):
+        return 'center'
+    elif( 10 < angle < 85 or 190 < angle < 265 ):
+        return 'left' if anchor_at_bottom else 'right'
+    return 'right' if anchor_at_bottom else 'left'
+
+def _va_for_angle(angle, halign):
+    """
+    Vertical alignment of the rotation mode "ytick" (matplotlib 3.11).
+    """
+
+    anchor_at_left = halign == 'left'
+    if( angle <= 10 or 350 <= angle or 170 <= angle <= 190 or 80 <= angle <= 100 or 260 <= angle <= 280 ):
+        return 'center'
+    elif( 190 < angle < 260 or 10 < angle < 80 ):
+        return 'baseline' if anchor_at_left else 'top'
+    return 'top' if anchor_at_left else 'baseline'
+
+def text_bbox(text_object, position=None, dpi=None):
+    """
+    Bounding box of a text artist in display coordinates, computed from
+    the font metrics (the same layout as matplotlib, without a renderer).
+    The layout of every (text, font properties, rotation) is kept by an
+    LRU cache, see text_extent_cache_info().
+
+    Parameters
+    ----------
+    text_object : <matplotlib.text.Text>
+        Handle of the text.
+    position : <tuple(<float>)>, optional
+        Position of the text anchor in display coordinates. Default value
+        is None, which transforms the position of the text.
+    dpi : <float>, optional
+        Resolution used to convert points to display coordinates. Default
+        value is None, which takes the dpi of the figure.
+
+    Returns
+    -------
+    Bounding box <matplotlib.transforms.Bbox>, or None for an empty text.
+
+    """
+
+    text = text_object._get_wrapped_text()
+    if( not text.replace('\n', '') ):
+        return None
+
+    if( dpi is None ):
+        dpi = _root_figure(text_object).dpi
+    if( position is None ):
+        position = text_object.get_transform().transform(text_object.get_unitless_position())
+    scale = dpi/72
+
+    rotation = text_object.get_rotation()
+    corners, rotated, baseline, descent = _text_layout(text, _font_key(text_object.get_fontproperties()), rotation,
+                                                       text_object._linespacing, text_object.get_usetex(),
+                                                       text_object.get_parse_math())
+    xmin_h, ymin_h, _, _, xmax_h, ymax_h, _, _ = [value*scale for value in corners]
+    rotated = np.array(rotated).reshape(4, 2)*scale
+    xmin, ymin = rotated.min(axis=0)
+    xmax, ymax = rotated.max(axis=0)
+    baseline *= scale
+    descent *= scale
+
+    # offset given by the alignment
+    halign = text_object.get_horizontalalignment()
+    valign = text_object.get_verticalalignment()
+    rotation_mode = text_object.get_rotation_mode()
+    if( rotation_mode != 'anchor' ):
+        if( rotation_mode == 'xtick' ):
+            halign = _ha_for_angle(rotation, valign)
+        elif( rotation_mode == 'ytick' ):
+            valign = _va_for_angle(rotation, halign)
+        offset_x = {'left':xmin, 'right':xmax}.get(halign, (xmin + xmax)/2)
+        offset_y = {'bottom':ymin, 'top':ymax, 'center':(ymin + ymax)/2,
+                    'baseline':ymin + descent}.get(valign, ymax - baseline/2)
+    else:
+        angle = np.deg2rad(rotation)
+        offset = np.array([{'left':xmin_h, 'right':xmax_h}.get(halign, (xmin_h + xmax_h)/2),
+                           {'bottom':ymin_h, 'top':ymax_h, 'center':(ymin_h + ymax_h)/2,
+                            'baseline':ymax_h - baseline}.get(valign, ymax_h - baseline/2)])
+        offset_x, offset_y = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]) @ offset
+
+    return Bbox([[xmin - offset_x + position[0], ymin - offset_y + position[1]],
+                 [xmax - offset_x + position[0], ymax - offset_y + position[1]]])
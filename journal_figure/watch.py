@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode: a long-running loop keeping a pool of warm workers (matplotlib,
+the helpers and the parsed styles in memory) and re-rendering only the
+figures whose inputs changed.
+
+    journal-figure watch figures.yaml --jobs 4
+
+@author: Martin Garaj
+"""
+
+#%% ---------------------------------------------------------------------------
+#   ----------------------------------IMPORTS----------------------------------
+#   ---------------------------------------------------------------------------
+import os.path
+import time
+
+from journal_figure.library_package import package_path
+from journal_figure.batch import worker_pool
+from journal_figure.spec import load_spec, render_spec, _data_files, _package_files
+
+#%% ---------------------------------------------------------------------------
+#   ---------------------------------FUNCTIONS---------------------------------
+#   ---------------------------------------------------------------------------
+
+#%% dependencies
+def figure_dependencies(figure_spec, base_directory, style, apply_to):
+    """
+    Files the output of a figure depends on besides its spec: the data
+    files and the stylelib files of the style (as resolved by set_style()).
+
+    Returns
+    -------
+    Absolute paths <set(<string>)>.
+
+    """
+
+    dependencies = {os.path.abspath(fname) for fname in _data_files(figure_spec, base_directory).values()}
+    dependencies |= {package_path('stylelib/'+entry, style+'.mplstyle') for entry in apply_to}
+    return dependencies
+
+def spec_dependencies(fname):
+    """
+    Files the figures of a spec file depend on, the spec file included.
+
+    Returns
+    -------
+    Absolute paths <set(<string>)>.
+
+    """
+
+    spec = load_spec(fname)
+    base_directory = os.path.dirname(os.path.abspath(fname))
+    dependencies = {os.path.abspath(fname)}
+    for figure_spec in spec['figures']:
+        dependencies |= figure_dependencies(figure_spec, base_directory, spec['style'], spec['apply_to'])
+    return dependencies
+
+def _signatures(paths):
+    """
+    Modification time and size of the files, None for a missing file.
+    """
+
+    signatures = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signatures[path] = None
+    return signatures
+
+#%% watch loop
+def watch_specs(specs, processes=None, interval=0.5, force=False, callback=None, polls=None):
+    """
+    Render the figures of the spec files, then poll their dependencies
+    (spec file, data files, stylelib files) and re-render a spec file
+    whenever any of them changes. Within a spec file only the figures
+    whose key changed are rendered (see render_spec()), thus editing one
+    figure or one data file re-renders the affected figures only.
+
+    The figures are rendered by a pool of warm workers (see worker_pool())
+    which is kept for the whole session. Every job applies the style of its
+    spec file and restores the rcParams of the worker afterwards (see
+    style_context()), the parsed style files stay cached in the worker.
+    A change of the code of journal_figure restarts the pool.
+
+    Parameters
+    ----------
+    specs : <list(<string>)>
+        Paths of the spec files.
+    processes : <int>, optional
+        Number of worker processes. Default value is None, which uses all
+        the available cores. Value 0 renders in the calling process.
+    interval : <float>, optional
+        Time between the polls of the files in seconds. Default value is 0.5.
+    force : <bool>, optional
+        Render all the figures on start regardless of the cache.
+        Default value is False.
+    callback : <callable>, optional
+        Called as callback(fname, results) after every render of the spec
+        file "fname", "results" is the <list> returned by render_spec(), or
+        the <Exception> if the spec could not be rendered (e.g. a syntax error
+        while it is being edited). Default value is None.
+    polls : <int>, optional
+        Number of polls before returning. Default value is None, which
+        watches until interrupted (KeyboardInterrupt).
+
+    Raises
+    ------
+    RuntimeError
+        The code of journal_figure changed while rendering in the calling
+        process ("processes" 0), which can not reload it.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    executor = worker_pool(processes) if processes != 0 else None
+    dependencies = {fname: {os.path.abspath(fname)} for fname in specs}
+    code = _signatures( [fname for fname in _package_files() if fname.endswith('.py')] )
+    signatures = {}
+    pending = list(specs)
+    poll = 0
+
+    try:
+        while True:
+            for fname in pending:
+                try:
+                    dependencies[fname] = spec_dependencies(fname)
+                    results = render_spec(fname, force=force, processes=0, executor=executor)
+                except Exception as error:
+                    # the spec file is watched and rendered again once fixed
+                    results = error
+                if( callback is not None ):
+                    callback(fname, results)
+            force = False
+            # files added to the dependencies are watched from now on
+            paths = set().union(*dependencies.values())
+            signatures.update( _signatures(paths - set(signatures)) )
+
+            if( polls is not None and poll >= polls ):
+                return
+            poll += 1
+            time.sleep(interval)
+
+            current = _signatures(paths)
+            changed = {path for path in paths if current[path] != signatures.get(path)}
+            signatures = current
+            # workers with stale code are replaced (and everything rendered again)
+            current_code = _signatures(code)
+            if( current_code != code ):
+                # the code loaded in this process can not be reloaded, the
+                # outputs would be cached under the key of the new code
+                if( executor is None ):
+                    raise RuntimeError('watch_specs: the code of journal_figure changed, restart the watcher (the figures are rendered in this process, "processes" is 0).')
+                code = current_code
+                executor.shutdown()
+                executor = worker_pool(processes)
+                changed = paths
+            pending = [fname for fname in specs if dependencies[fname] & changed]
+    finally:
+        if( executor is not None ):
+            executor.shutdown()
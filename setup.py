@@ -14,7 +14,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/martin-garaj/journal_figure",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['benchmarks', 'benchmarks.*']),
     package_dir={'journal_figure': 'journal_figure'},
     package_data={'journal_figure': ['stylelib/*','stylelib/*/*','stylelib/*/*/*']},
     classifiers=[
@@ -23,4 +23,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.6',
+    install_requires=['matplotlib>=3.8', 'numpy'],
+    extras_require={'yaml': ['PyYAML']},
+    entry_points={'console_scripts': ['journal-figure=journal_figure.cli:main']},
 )